@@ -0,0 +1,70 @@
+"""add analytics rollups
+
+Revision ID: 5c1e9a7d2b40
+Revises: add_initial_users
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2b40'
+down_revision: Union[str, None] = 'add_initial_users'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_sales_rollups',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('SalesDate', sa.Date(), nullable=False),
+    sa.Column('BusinessId', sa.Integer(), nullable=False),
+    sa.Column('ProductId', sa.Integer(), nullable=False),
+    sa.Column('OrderType', sa.Enum('Booked', 'Requested', name='ordertypeenum'), nullable=False),
+    sa.Column('OrderCount', sa.Integer(), nullable=False),
+    sa.Column('Quantity', sa.Integer(), nullable=False),
+    sa.Column('TotalCost', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('ModifiedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('TenantId', 'SalesDate', 'BusinessId', 'ProductId', 'OrderType', name='uq_daily_sales_rollup')
+    )
+    op.create_index('ix_daily_sales_rollup_tenant_product', 'daily_sales_rollups', ['TenantId', 'ProductId', 'SalesDate'])
+    op.create_table('stock_level_rollups',
+    sa.Column('TenantId', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('ProductCount', sa.Integer(), nullable=False),
+    sa.Column('TotalQuantity', sa.Integer(), nullable=False),
+    sa.Column('StockValue', sa.DECIMAL(precision=16, scale=2), nullable=False),
+    sa.Column('OutOfStockCount', sa.Integer(), nullable=False),
+    sa.Column('ModifiedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('TenantId')
+    )
+    # Populate from existing data; afterwards the rollups are maintained by the API write paths
+    # and can be recomputed at any time with `python -m backend.rollups`.
+    op.execute("""
+        INSERT INTO daily_sales_rollups (TenantId, SalesDate, BusinessId, ProductId, OrderType, OrderCount, Quantity, TotalCost, ModifiedAt)
+        SELECT o.TenantId, DATE(o.OrderDateTime), o.BusinessId, op.ProductId, o.Type,
+               COUNT(DISTINCT o.Id), SUM(op.Quantity), SUM(op.TotalCost), NOW()
+        FROM orders o
+        JOIN ordered_products op ON op.OrderId = o.Id
+        WHERE o.isDeleted = 0 AND op.isDeleted = 0 AND o.OrderStatus != 'Cancelled'
+        GROUP BY o.TenantId, DATE(o.OrderDateTime), o.BusinessId, op.ProductId, o.Type
+    """)
+    op.execute("""
+        INSERT INTO stock_level_rollups (TenantId, ProductCount, TotalQuantity, StockValue, OutOfStockCount, ModifiedAt)
+        SELECT TenantId, COUNT(Id), COALESCE(SUM(Quantity), 0), COALESCE(SUM(Quantity * MRP), 0),
+               SUM(CASE WHEN Quantity <= 0 THEN 1 ELSE 0 END), NOW()
+        FROM products
+        WHERE isDeleted = 0
+        GROUP BY TenantId
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('stock_level_rollups')
+    op.drop_index('ix_daily_sales_rollup_tenant_product', table_name='daily_sales_rollups')
+    op.drop_table('daily_sales_rollups')
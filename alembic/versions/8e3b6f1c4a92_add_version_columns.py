@@ -0,0 +1,28 @@
+"""add version columns to products and orders
+
+Revision ID: 8e3b6f1c4a92
+Revises: 5c1e9a7d2b40
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b6f1c4a92'
+down_revision: Union[str, None] = '5c1e9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('Version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('orders', sa.Column('Version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('orders', 'Version')
+    op.drop_column('products', 'Version')
@@ -0,0 +1,45 @@
+"""add daily order rollups
+
+Revision ID: a4d6e8f0b2c3
+Revises: f3c9a1e5b7d2
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4d6e8f0b2c3'
+down_revision: Union[str, None] = 'f3c9a1e5b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('daily_order_rollups',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('SalesDate', sa.Date(), nullable=False),
+    sa.Column('BusinessId', sa.Integer(), nullable=False),
+    sa.Column('OrderType', sa.Enum('Booked', 'Requested', name='ordertypeenum'), nullable=False),
+    sa.Column('OrderCount', sa.Integer(), nullable=False),
+    sa.Column('ModifiedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id'),
+    sa.UniqueConstraint('TenantId', 'SalesDate', 'BusinessId', 'OrderType', name='uq_daily_order_rollup')
+    )
+    # One count per order, without the product dimension of daily_sales_rollups
+    op.execute("""
+        INSERT INTO daily_order_rollups (TenantId, SalesDate, BusinessId, OrderType, OrderCount, ModifiedAt)
+        SELECT o.TenantId, DATE(o.OrderDateTime), o.BusinessId, o.Type, COUNT(DISTINCT o.Id), NOW()
+        FROM orders o
+        JOIN ordered_products op ON op.OrderId = o.Id
+        WHERE o.isDeleted = 0 AND op.isDeleted = 0 AND o.OrderStatus != 'Cancelled'
+        GROUP BY o.TenantId, DATE(o.OrderDateTime), o.BusinessId, o.Type
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('daily_order_rollups')
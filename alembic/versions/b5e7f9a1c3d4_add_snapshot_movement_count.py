@@ -0,0 +1,28 @@
+"""add stock snapshot movement count
+
+Revision ID: b5e7f9a1c3d4
+Revises: a4d6e8f0b2c3
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e7f9a1c3d4'
+down_revision: Union[str, None] = 'a4d6e8f0b2c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Left NULL for existing snapshots: whether movements before them were pruned is unknown,
+    # so stock-at-date queries that would need those movements report no answer
+    op.add_column('stock_snapshots', sa.Column('MovementCount', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stock_snapshots', 'MovementCount')
@@ -0,0 +1,62 @@
+"""add inventory ledger
+
+Revision ID: b7d2e4f6a1c3
+Revises: 8e3b6f1c4a92
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f6a1c3'
+down_revision: Union[str, None] = '8e3b6f1c4a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('stock_movements',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('ProductId', sa.Integer(), nullable=False),
+    sa.Column('MovementType', sa.Enum('Booking', 'Cancellation', 'Adjustment', name='stockmovementtypeenum'), nullable=False),
+    sa.Column('QuantityDelta', sa.Integer(), nullable=False),
+    sa.Column('OrderId', sa.Integer(), nullable=True),
+    sa.Column('Note', sa.String(length=255), nullable=True),
+    sa.Column('CreatedBy', sa.Integer(), nullable=True),
+    sa.Column('CreatedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('ix_stock_movements_product_created', 'stock_movements', ['ProductId', 'CreatedAt'])
+    op.create_index('ix_stock_movements_tenant_created', 'stock_movements', ['TenantId', 'CreatedAt'])
+    op.create_table('stock_snapshots',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('ProductId', sa.Integer(), nullable=False),
+    sa.Column('Quantity', sa.Integer(), nullable=False),
+    sa.Column('LastMovementId', sa.Integer(), nullable=False),
+    sa.Column('AsOf', sa.DateTime(), nullable=False),
+    sa.Column('CreatedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('ix_stock_snapshots_product_asof', 'stock_snapshots', ['ProductId', 'AsOf'])
+
+    # Opening balance: the ledger starts from the current stock of every product
+    op.execute("""
+        INSERT INTO stock_snapshots (TenantId, ProductId, Quantity, LastMovementId, AsOf, CreatedAt)
+        SELECT TenantId, Id, Quantity, 0, UTC_TIMESTAMP(), UTC_TIMESTAMP()
+        FROM products
+        WHERE isDeleted = 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stock_snapshots_product_asof', table_name='stock_snapshots')
+    op.drop_table('stock_snapshots')
+    op.drop_index('ix_stock_movements_tenant_created', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_product_created', table_name='stock_movements')
+    op.drop_table('stock_movements')
@@ -0,0 +1,54 @@
+"""add order status history and StatusChangedAt
+
+Revision ID: c4a8f2d9e6b1
+Revises: b7d2e4f6a1c3
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8f2d9e6b1'
+down_revision: Union[str, None] = 'b7d2e4f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('orders', sa.Column('StatusChangedAt', sa.DateTime(), nullable=True))
+    op.execute("UPDATE orders SET StatusChangedAt = ModifiedAt")
+    op.alter_column('orders', 'StatusChangedAt', existing_type=sa.DateTime(), nullable=False)
+    op.create_index('ix_orders_tenant_status_changed', 'orders', ['TenantId', 'OrderStatus', 'StatusChangedAt'])
+
+    op.create_table('order_status_history',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('OrderId', sa.Integer(), nullable=False),
+    sa.Column('FromStatus', sa.Enum('New', 'InProgress', 'Done', 'Cancelled', name='orderstatusenum'), nullable=True),
+    sa.Column('ToStatus', sa.Enum('New', 'InProgress', 'Done', 'Cancelled', name='orderstatusenum'), nullable=False),
+    sa.Column('ChangedBy', sa.Integer(), nullable=True),
+    sa.Column('ChangedAt', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('ix_order_status_history_order', 'order_status_history', ['OrderId', 'ChangedAt'])
+    op.create_index('ix_order_status_history_tenant_status', 'order_status_history', ['TenantId', 'ToStatus', 'ChangedAt'])
+
+    # Seed the history with each order's current status
+    op.execute("""
+        INSERT INTO order_status_history (TenantId, OrderId, FromStatus, ToStatus, ChangedBy, ChangedAt)
+        SELECT TenantId, Id, NULL, OrderStatus, ModifiedBy, ModifiedAt
+        FROM orders
+        WHERE isDeleted = 0
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_order_status_history_tenant_status', table_name='order_status_history')
+    op.drop_index('ix_order_status_history_order', table_name='order_status_history')
+    op.drop_table('order_status_history')
+    op.drop_index('ix_orders_tenant_status_changed', table_name='orders')
+    op.drop_column('orders', 'StatusChangedAt')
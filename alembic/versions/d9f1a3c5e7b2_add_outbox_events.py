@@ -0,0 +1,42 @@
+"""add outbox events
+
+Revision ID: d9f1a3c5e7b2
+Revises: c4a8f2d9e6b1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f1a3c5e7b2'
+down_revision: Union[str, None] = 'c4a8f2d9e6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('outbox_events',
+    sa.Column('Id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('TenantId', sa.Integer(), nullable=False),
+    sa.Column('AggregateType', sa.String(length=50), nullable=False),
+    sa.Column('AggregateId', sa.Integer(), nullable=False),
+    sa.Column('EventType', sa.String(length=100), nullable=False),
+    sa.Column('Payload', sa.JSON(), nullable=True),
+    sa.Column('Status', sa.Enum('Pending', 'Done', 'Failed', name='outboxstatusenum'), nullable=False),
+    sa.Column('Attempts', sa.Integer(), nullable=False),
+    sa.Column('AvailableAt', sa.DateTime(), nullable=False),
+    sa.Column('LastError', sa.Text(), nullable=True),
+    sa.Column('CreatedAt', sa.DateTime(), nullable=False),
+    sa.Column('ProcessedAt', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('Id')
+    )
+    op.create_index('ix_outbox_events_status_available', 'outbox_events', ['Status', 'AvailableAt', 'Id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_events_status_available', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,26 @@
+"""add user token version
+
+Revision ID: e2b7c4d8f1a6
+Revises: d9f1a3c5e7b2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4d8f1a6'
+down_revision: Union[str, None] = 'd9f1a3c5e7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('TokenVersion', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'TokenVersion')
@@ -0,0 +1,42 @@
+"""add user lookup columns
+
+Revision ID: f3c9a1e5b7d2
+Revises: e2b7c4d8f1a6
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c9a1e5b7d2'
+down_revision: Union[str, None] = 'e2b7c4d8f1a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('UserNameKey', sa.String(length=100), nullable=True))
+    op.add_column('users', sa.Column('EmailKey', sa.String(length=255), nullable=True))
+    op.add_column('users', sa.Column('SearchText', sa.String(length=620), nullable=True))
+    # Same normalization as models.user_lookup_values
+    op.execute(
+        "UPDATE users SET UserNameKey = LOWER(UserName), EmailKey = LOWER(Email), "
+        "SearchText = LOWER(CONCAT_WS(' ', NULLIF(Name, ''), NULLIF(UserName, ''), NULLIF(Email, '')))"
+    )
+    op.create_index('ix_users_username_key', 'users', ['UserNameKey'], unique=False)
+    op.create_index('ix_users_email_key', 'users', ['EmailKey'], unique=False)
+    op.create_index('ft_users_search', 'users', ['SearchText'], unique=False,
+                    mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade() -> None:
+    op.drop_index('ft_users_search', table_name='users')
+    op.drop_index('ix_users_email_key', table_name='users')
+    op.drop_index('ix_users_username_key', table_name='users')
+    op.drop_column('users', 'SearchText')
+    op.drop_column('users', 'EmailKey')
+    op.drop_column('users', 'UserNameKey')
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List, Optional
+from datetime import datetime
+from backend.models import DailySalesRollup, DailyOrderRollup, StockLevelRollup
+from backend.auth import get_current_user
+from backend.database import get_db
+from backend.schemas import SalesRollupRow, StockLevelResponse
+from backend import policy
+
+router = APIRouter()
+
+GROUP_BY_COLUMNS = {
+    "day": "SalesDate",
+    "business": "BusinessId",
+    "product": "ProductId",
+    "type": "OrderType",
+}
+
+def _sales_filters(model, user, tenant_id, business_id, order_type, start_date, end_date):
+    """Filters shared by the sales and order-count rollups (both have the same key columns but ProductId)."""
+    filters = [model.TenantId == policy.tenant_for(user, tenant_id)]
+    # Dealers only see their own business
+    if policy.is_dealer(user):
+        filters.append(model.BusinessId == user.BusinessId)
+    elif business_id:
+        filters.append(model.BusinessId == business_id)
+    if order_type:
+        filters.append(model.OrderType == order_type)
+    if start_date:
+        filters.append(model.SalesDate >= datetime.strptime(start_date, '%Y-%m-%d').date())
+    if end_date:
+        filters.append(model.SalesDate <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    return filters
+
+@router.get("/sales", response_model=List[SalesRollupRow])
+def get_sales(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    group_by: str = Query("day", description="Comma separated: day, business, product, type"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    type: Optional[str] = None,
+    businessId: Optional[int] = None,
+    productId: Optional[int] = None,
+    tenantId: Optional[int] = None
+):
+    """
+    Sales totals from the daily rollup table, grouped by any combination of
+    day/business/product/type. Booked vs requested quantities come from grouping by type.
+    OrderCount is the number of distinct orders; per product it is the orders containing that product.
+    """
+    policy.require(user, "analytics", "read")
+    dimensions = [d.strip() for d in group_by.split(",") if d.strip()]
+    invalid = [d for d in dimensions if d not in GROUP_BY_COLUMNS]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by value(s): {', '.join(invalid)}")
+    names = [GROUP_BY_COLUMNS[d] for d in dimensions]
+    filters = (user, tenantId, businessId, type, start_date, end_date)
+
+    group_columns = [getattr(DailySalesRollup, name) for name in names]
+    query = db.query(
+        *[column.label(name) for column, name in zip(group_columns, names)],
+        func.sum(DailySalesRollup.OrderCount).label("OrderCount"),
+        func.sum(DailySalesRollup.Quantity).label("Quantity"),
+        func.sum(DailySalesRollup.TotalCost).label("TotalCost"),
+    ).filter(*_sales_filters(DailySalesRollup, *filters))
+    if productId:
+        query = query.filter(DailySalesRollup.ProductId == productId)
+    if group_columns:
+        query = query.group_by(*group_columns).order_by(*group_columns)
+    rows = query.all()
+
+    # An order with several products has a sales row per product, so unless the result is per product
+    # the distinct order count comes from the order rollup
+    order_counts = None
+    if "product" not in dimensions and not productId:
+        order_columns = [getattr(DailyOrderRollup, name) for name in names]
+        order_query = db.query(*order_columns, func.sum(DailyOrderRollup.OrderCount)).filter(
+            *_sales_filters(DailyOrderRollup, *filters)
+        )
+        if order_columns:
+            order_query = order_query.group_by(*order_columns)
+        order_counts = {tuple(row[:-1]): row[-1] for row in order_query.all()}
+
+    return [
+        SalesRollupRow(
+            **{name: getattr(row, name) for name in names},
+            OrderCount=(row.OrderCount if order_counts is None else order_counts.get(tuple(row[:len(names)]))) or 0,
+            Quantity=row.Quantity or 0,
+            TotalCost=row.TotalCost or 0,
+        )
+        for row in rows
+    ]
+
+@router.get("/stock", response_model=StockLevelResponse)
+def get_stock_levels(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    tenantId: Optional[int] = None
+):
+    """Current stock totals for a tenant from the stock rollup table."""
+    policy.require(user, "analytics", "read")
+    tenant_id = policy.tenant_for(user, tenantId)
+    rollup = db.query(StockLevelRollup).filter(StockLevelRollup.TenantId == tenant_id).first()
+    if not rollup:
+        return StockLevelResponse(TenantId=tenant_id)
+    return rollup
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from .. import crud, schemas, auth
+from .. import crud, schemas, auth, policy, models
 from ..database import get_db
+from ..cache import TENANT_OVERVIEW, bump_generation
+from ..business_directory import business_directory
+from .. import dealer_import
 
 router = APIRouter()
 
@@ -22,20 +25,50 @@ def get_businesses(
     - WholesalerAdmin, Wholesaler: Can view businesses for their tenant
     - DealerAdmin, Dealer: Can only view their own business
     """
+    policy.require(current_user, "businesses", "read")
     # Check if user has access to the requested tenant
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
-        if current_user.TenantId != tenantId:
-            raise HTTPException(status_code=403, detail="Not authorized to access businesses for this tenant")
+    if not policy.can_access(current_user, tenantId):
+        raise HTTPException(status_code=403, detail="Not authorized to access businesses for this tenant")
+    if policy.is_dealer(current_user) and not current_user.BusinessId:
+        raise HTTPException(status_code=403, detail="No business associated with user")
     
-    # For dealer roles, they can only see their own business
-    if current_user.Role in ["DealerAdmin", "Dealer"]:
-        if not current_user.BusinessId:
-            raise HTTPException(status_code=403, detail="No business associated with user")
-        business = crud.get_business(db, current_user.BusinessId)
-        return [business] if business else []
+    # Served from the business directory; dealer roles only see their own business
+    businesses = business_directory.list(
+        db, tenantId, business_type=type,
+        business_id=current_user.BusinessId if policy.is_dealer(current_user) else None
+    )
+    return businesses[skip:skip + limit]
+
+@router.post("/import", response_model=schemas.DealerImportResponse)
+def import_dealers(
+    tenantId: int = Query(..., description="ID of the tenant"),
+    file: UploadFile = File(..., description="CSV with one dealer per row"),
+    create_admins: bool = Query(True, description="Create DealerAdmin users from the Admin* columns"),
+    dry_run: bool = Query(False, description="Validate and report without writing"),
+    db: Session = Depends(get_db),
+    current_user: schemas.UserResponse = Depends(auth.get_current_user)
+):
+    """
+    Import a tenant's dealers (and optionally their admin users) from CSV in one
+    transaction. Dealers whose email already exists in the tenant are skipped.
+    Only accessible by SuperAdmin, TechAdmin, and WholesalerAdmin roles; creating
+    admin users requires a platform role.
+    """
+    policy.require(current_user, "businesses", "create", detail="Not authorized to create businesses")
+    if not policy.can_access(current_user, tenantId):
+        raise HTTPException(status_code=403, detail="Not authorized to create businesses for other tenants")
+    
+    try:
+        rows = dealer_import.read_csv(file.file.read().decode("utf-8"))
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+    if len(rows) > dealer_import.DEALER_IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {dealer_import.DEALER_IMPORT_MAX_ROWS} rows per import")
+    if create_admins and not policy.is_platform(current_user) and any(row.has_admin() for row in rows):
+        # Same rule as user creation: only platform roles may create DealerAdmin users
+        raise HTTPException(status_code=403, detail="Not authorized to create dealer admin users")
     
-    businesses = crud.get_businesses(db, tenant_id=tenantId, business_type=type, skip=skip, limit=limit)
-    return businesses
+    return dealer_import.import_dealers(db, tenantId, rows, current_user.Id, create_admins=create_admins, dry_run=dry_run)
 
 @router.get("/{business_id}", response_model=schemas.BusinessResponse)
 def get_business(
@@ -55,11 +88,8 @@ def get_business(
         raise HTTPException(status_code=404, detail="Business not found")
     
     # Check if user has access to this business
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
-        if current_user.TenantId != business.TenantId:
-            raise HTTPException(status_code=403, detail="Not authorized to access this business")
-        if current_user.Role in ["DealerAdmin", "Dealer"] and current_user.BusinessId != business_id:
-            raise HTTPException(status_code=403, detail="Not authorized to access this business")
+    if not policy.can_access(current_user, business.TenantId, business.Id):
+        raise HTTPException(status_code=403, detail="Not authorized to access this business")
     
     return business
 
@@ -73,14 +103,15 @@ def create_business(
     Create a new business.
     Only accessible by SuperAdmin, TechAdmin, and WholesalerAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "WholesalerAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to create businesses")
+    policy.require(current_user, "businesses", "create", detail="Not authorized to create businesses")
     
     # WholesalerAdmin can only create businesses in their tenant
-    if current_user.Role == "WholesalerAdmin" and current_user.TenantId != business.TenantId:
+    if not policy.can_access(current_user, business.TenantId):
         raise HTTPException(status_code=403, detail="Not authorized to create businesses for other tenants")
     
-    return crud.create_business(db, business, current_user.Id)
+    db_business = crud.create_business(db, business, current_user.Id)
+    bump_generation(TENANT_OVERVIEW, db_business.TenantId)
+    return db_business
 
 @router.put("/{business_id}", response_model=schemas.BusinessResponse)
 def update_business(
@@ -93,8 +124,7 @@ def update_business(
     Update a business.
     Only accessible by SuperAdmin, TechAdmin, and WholesalerAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "WholesalerAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update businesses")
+    policy.require(current_user, "businesses", "update", detail="Not authorized to update businesses")
     
     # Check if business exists
     existing_business = crud.get_business(db, business_id)
@@ -102,10 +132,15 @@ def update_business(
         raise HTTPException(status_code=404, detail="Business not found")
     
     # WholesalerAdmin can only update businesses in their tenant
-    if current_user.Role == "WholesalerAdmin" and current_user.TenantId != existing_business.TenantId:
+    if not policy.can_access(current_user, existing_business.TenantId):
         raise HTTPException(status_code=403, detail="Not authorized to update businesses for other tenants")
     
-    return crud.update_business(db, business_id, business, current_user.Id)
+    tenant_id = existing_business.TenantId
+    db_business = crud.update_business(db, business_id, business, current_user.Id)
+    bump_generation(TENANT_OVERVIEW, tenant_id)
+    if db_business.TenantId != tenant_id:
+        bump_generation(TENANT_OVERVIEW, db_business.TenantId)
+    return db_business
 
 @router.delete("/{business_id}", response_model=schemas.BusinessResponse)
 def delete_business(
@@ -117,8 +152,7 @@ def delete_business(
     Soft delete a business.
     Only accessible by SuperAdmin, TechAdmin, and WholesalerAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "WholesalerAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete businesses")
+    policy.require(current_user, "businesses", "delete", detail="Not authorized to delete businesses")
     
     # Check if business exists
     existing_business = crud.get_business(db, business_id)
@@ -126,7 +160,10 @@ def delete_business(
         raise HTTPException(status_code=404, detail="Business not found")
     
     # WholesalerAdmin can only delete businesses in their tenant
-    if current_user.Role == "WholesalerAdmin" and current_user.TenantId != existing_business.TenantId:
+    if not policy.can_access(current_user, existing_business.TenantId):
         raise HTTPException(status_code=403, detail="Not authorized to delete businesses for other tenants")
     
-    return crud.delete_business(db, business_id, current_user.Id) 
\ No newline at end of file
+    tenant_id = existing_business.TenantId
+    db_business = crud.delete_business(db, business_id, current_user.Id)
+    bump_generation(TENANT_OVERVIEW, tenant_id)
+    return db_business 
\ No newline at end of file
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timedelta
+from backend.models import Product, StockMovement, StockMovementTypeEnum
+from backend.auth import get_current_user
+from backend.database import get_db
+from backend.schemas import StockMovementResponse, StockAdjustmentCreate, StockAtResponse
+from backend import inventory, rollups, policy
+from backend.http_cache import commit_or_conflict
+from backend.cache import CATALOG, bump_generation
+
+router = APIRouter()
+
+def get_scoped_product(db: Session, user, product_id: int) -> Product:
+    product = db.query(Product).filter(
+        Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+    ).first()
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+@router.get("/products/{product_id}/stock", response_model=StockAtResponse)
+def get_stock_at(
+    product_id: int,
+    at: Optional[datetime] = Query(None, description="Point in time (UTC, ISO 8601); defaults to now"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """
+    Stock of a product at a point in time, from the latest snapshot plus later ledger movements.
+    404 if the movements needed for that time have been pruned (or it predates the ledger).
+    """
+    policy.require(user, "inventory", "read")
+    get_scoped_product(db, user, product_id)
+    quantity = inventory.stock_at(db, product_id, at)
+    if quantity is None:
+        raise HTTPException(status_code=404, detail="Stock history for this time is no longer available")
+    return StockAtResponse(ProductId=product_id, At=at or datetime.utcnow(), Quantity=quantity)
+
+@router.get("/products/{product_id}/movements", response_model=List[StockMovementResponse])
+def list_movements(
+    product_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=500),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    type: Optional[str] = None
+):
+    policy.require(user, "inventory", "read")
+    get_scoped_product(db, user, product_id)
+    query = db.query(StockMovement).filter(
+        StockMovement.ProductId == product_id, *policy.scope_clauses(user, StockMovement.TenantId)
+    )
+    if type:
+        query = query.filter(StockMovement.MovementType == type)
+    if start_date:
+        query = query.filter(StockMovement.CreatedAt >= datetime.strptime(start_date, '%Y-%m-%d'))
+    if end_date:
+        query = query.filter(StockMovement.CreatedAt < datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1))
+    return query.order_by(StockMovement.CreatedAt.desc(), StockMovement.Id.desc()).offset((page - 1) * size).limit(size).all()
+
+@router.post("/products/{product_id}/adjustments", response_model=StockAtResponse, status_code=201)
+def create_adjustment(
+    product_id: int,
+    adjustment: StockAdjustmentCreate,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Manual stock correction (stock take, damage, returns); recorded in the ledger."""
+    policy.require(user, "inventory", "adjust")
+    if adjustment.QuantityDelta == 0:
+        raise HTTPException(status_code=400, detail="QuantityDelta must not be zero")
+    product = get_scoped_product(db, user, product_id)
+    if product.Quantity + adjustment.QuantityDelta < 0:
+        raise HTTPException(status_code=400, detail="Adjustment would make stock negative")
+
+    stock_before = rollups.product_stock_state(product)
+    product.Quantity += adjustment.QuantityDelta
+    product.ModifiedBy = user.Id
+    rollups.apply_stock_deltas(db, product.TenantId, rollups.stock_delta(stock_before, rollups.product_stock_state(product)))
+    inventory.record_movements(db, [inventory.movement(
+        product.TenantId, product.Id, StockMovementTypeEnum.Adjustment, adjustment.QuantityDelta,
+        note=adjustment.Note, user_id=user.Id
+    )])
+    quantity = product.Quantity
+    tenant_id = product.TenantId
+    commit_or_conflict(db)
+    bump_generation(CATALOG, tenant_id)
+    return StockAtResponse(ProductId=product_id, At=datetime.utcnow(), Quantity=quantity)
@@ -1,68 +1,87 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, and_
+from sqlalchemy import desc, asc, and_, select, func, update
 from typing import List, Optional
+from collections import defaultdict
 from datetime import datetime, timedelta
-from backend.models import Order, OrderedProduct, UserRoleEnum, Product, Business
-from backend.auth import get_current_user
-from backend.database import get_db
-from backend.schemas import OrderCreate, OrderResponse, OrderedProductResponse, OrderCreateRequest, OrderCreateResponse, OrderStatusUpdate
+from backend.models import (
+    Order, OrderedProduct, Product, Business, StockMovementTypeEnum, OrderStatusEnum, OrderTypeEnum,
+    OrderStatusHistory
+)
+from backend.auth import get_current_user, user_from_token
+from backend.database import get_db, SessionLocal
+from backend.schemas import (
+    OrderCreate, OrderPatch, OrderResponse, OrderCreateRequest, OrderCreateResponse, OrderStatusUpdate,
+    BulkOrderIds, BulkOrderStatusUpdate, BulkOrderResult, OrderStatusHistoryResponse, StuckOrderResponse
+)
+from backend import rollups, inventory
+from backend.exports import export_response
+from backend.http_cache import (
+    make_etag, etag_matches, has_conditional_header, not_modified, etag_headers,
+    check_if_match, commit_or_conflict
+)
+from backend.serialization import api_response, order_dict, ordered_product_dict, parse_fields, project
+from backend.cache import CATALOG, bump_generation
+from backend.runtime_config import PAGE_SIZE_CEILING, LIMIT_MAX_ORDERS_PER_MONTH, check_page_size
+from backend.entitlements import check_limit
+from backend.patching import changed_values, versioned_update
+from backend import order_workflow, outbox, events, policy
+from backend.business_directory import business_directory
 
 router = APIRouter()
 
-ALL_ROLES = {
-    UserRoleEnum.SuperAdmin,
-    UserRoleEnum.TechAdmin,
-    UserRoleEnum.SalesAdmin,
-    UserRoleEnum.WholesalerAdmin,
-    UserRoleEnum.Wholesaler,
-    UserRoleEnum.DealerAdmin,
-    UserRoleEnum.Dealer,
-}
+# Upper bound on the number of orders one bulk request may touch
+BULK_MAX_ORDERS = 500
+
+# Columns needed to build an OrderResponse, loaded as row tuples for list pages
+ORDER_COLUMNS = (
+    Order.Id, Order.TenantId, Order.BusinessId, Order.Type, Order.SubType, Order.OrderStatus,
+    Order.OrderDateTime, Order.AdditionalData, Order.CreatedAt, Order.ModifiedAt, Order.Version,
+    Order.StatusChangedAt,
+)
+ORDERED_PRODUCT_COLUMNS = (
+    OrderedProduct.Id, OrderedProduct.OrderId, OrderedProduct.ProductId, OrderedProduct.Quantity,
+    OrderedProduct.Price, OrderedProduct.DiscountType, OrderedProduct.DiscountAmount, OrderedProduct.TaxType,
+    OrderedProduct.TaxAmount, OrderedProduct.TotalCost, OrderedProduct.CreatedAt, OrderedProduct.ModifiedAt,
+)
 
-ADMIN_ROLES = {
-    UserRoleEnum.SuperAdmin,
-    UserRoleEnum.TechAdmin,
-    UserRoleEnum.SalesAdmin,
-    UserRoleEnum.WholesalerAdmin,
-    UserRoleEnum.Wholesaler,
+ORDER_FIELDS = list(OrderResponse.model_fields)
+DEALER_FIELDS = {"dealerName": "Name", "dealerEmail": "Email", "dealerPhone": "PhoneNumber"}
+# Named field sets for `fields=`; "grid" is what the orders table view needs
+ORDER_FIELD_PROFILES = {
+    "grid": ["Id", "BusinessId", "Type", "OrderStatus", "OrderDateTime", "dealerName"],
 }
 
-def check_role(user, allowed_roles=ALL_ROLES):
-    if user.Role not in allowed_roles:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+def apply_order_scope(query, user):
+    """Restrict an order query to what the user may see."""
+    return query.filter(*policy.scope_clauses(user, Order.TenantId, Order.BusinessId))
 
-@router.get("/", response_model=List[OrderResponse])
-def list_orders(
-    db: Session = Depends(get_db),
-    user=Depends(get_current_user),
-    page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("CreatedAt"),
-    order: str = Query("desc"),
-    status: Optional[str] = None,
-    type: Optional[str] = None,
-    start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    tenantId: Optional[int] = None
-):
-    check_role(user)
-    
-    # Base query
-    query = db.query(Order).filter(Order.isDeleted == False)
-    
-    # Apply tenant filter
-    if tenantId:
-        if user.Role in {UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin, UserRoleEnum.SalesAdmin}:
-            query = query.filter(Order.TenantId == tenantId)
-        else:
-            query = query.filter(Order.TenantId == user.TenantId)
-    else:
-        query = query.filter(Order.TenantId == user.TenantId)
-    
-    # Apply business filter for Dealers and DealerAdmins
-    if user.Role in {UserRoleEnum.Dealer, UserRoleEnum.DealerAdmin}:
-        query = query.filter(Order.BusinessId == user.BusinessId)
+def order_etag(order_id: int, order_version, line_count, lines_modified_at) -> str:
+    return make_etag("order", order_id, order_version, line_count, lines_modified_at)
+
+def order_lines_etag(order, ordered_products) -> str:
+    return order_etag(
+        order.Id, order.Version, len(ordered_products),
+        max((op.ModifiedAt for op in ordered_products), default=None)
+    )
+
+def sync_order_stock(db: Session, order: Order, ordered_products, held_before: bool, user, note: str) -> bool:
+    """Release a booked order's stock when a write (cancel, delete, type change) stops it holding stock."""
+    held_after = inventory.holds_stock(order)
+    if held_after and not held_before:
+        # Only order creation takes stock; cancelled orders never come back (see order_workflow)
+        raise HTTPException(status_code=409, detail="A requested order cannot be changed into a booked order")
+    if held_before == held_after:
+        return False
+    return inventory.move_order_stock(db, [(order, ordered_products)], user.Id, note)
+
+def apply_order_filters(query, user, status=None, type=None, start_date=None, end_date=None, tenantId=None):
+    """Tenant/business scoping plus the list filters; works on ORM queries and Core selects."""
+    # Lists work on one tenant: the requested one for platform users, otherwise the user's own
+    query = query.filter(*policy.scope_clauses(
+        user, Order.TenantId, Order.BusinessId, tenant_id=policy.tenant_for(user, tenantId)
+    ))
     
     # Apply type filter
     if type:
@@ -80,6 +99,37 @@ def list_orders(
         end_datetime = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)
         query = query.filter(Order.OrderDateTime < end_datetime)
     
+    return query
+
+@router.get("/", response_model=List[OrderResponse])
+def list_orders(
+    request: Request,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    page: int = Query(1, ge=1),
+    size: int = Query(20, ge=1, le=PAGE_SIZE_CEILING),
+    sort_by: str = Query("CreatedAt"),
+    order: str = Query("desc"),
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    tenantId: Optional[int] = None,
+    fields: Optional[str] = Query(None, description="Comma separated field names or a profile (grid)")
+):
+    policy.require(user, "orders", "read")
+    check_page_size(size, user.TenantId)
+    selected = parse_fields(fields, ORDER_FIELDS, ORDER_FIELD_PROFILES)
+    include_lines = selected is None or "ordered_products" in selected
+    include_dealer = selected is None or any(field in DEALER_FIELDS for field in selected)
+    
+    # Base query, narrowed to the requested order columns
+    columns = ORDER_COLUMNS
+    if selected is not None:
+        columns = tuple(column for column in ORDER_COLUMNS if column.key in selected or column.key in ("TenantId", "BusinessId"))
+    query = db.query(*columns).filter(Order.isDeleted == False)
+    query = apply_order_filters(query, user, status, type, start_date, end_date, tenantId)
+    
     # Apply sorting
     sort_column = getattr(Order, sort_by, Order.CreatedAt)
     if order == "desc":
@@ -87,71 +137,197 @@ def list_orders(
     else:
         query = query.order_by(asc(sort_column))
     
-    # Get total count
-    total = query.count()
-    
     # Apply pagination
     orders = query.offset((page - 1) * size).limit(size).all()
     
-    # Attach ordered products and dealer information
-    result = []
-    for o in orders:
-        ordered_products = db.query(OrderedProduct).filter(
-            OrderedProduct.OrderId == o.Id, 
+    # Attach ordered products for the whole page in one query; dealer details come from the business directory
+    order_ids = [o.Id for o in orders]
+    ordered_products = defaultdict(list)
+    if order_ids and include_lines:
+        for op in db.query(*ORDERED_PRODUCT_COLUMNS).filter(
+            OrderedProduct.OrderId.in_(order_ids),
             OrderedProduct.isDeleted == False
-        ).all()
-        
-        # Get dealer information
-        dealer = db.query(Business).filter(
-            Business.Id == o.BusinessId,
-            Business.isDeleted == False
-        ).first()
-        
-        o_dict = OrderResponse.from_orm(o).dict()
-        o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-        o_dict["dealerName"] = dealer.Name if dealer else None
-        o_dict["dealerEmail"] = dealer.Email if dealer else None
-        o_dict["dealerPhone"] = dealer.PhoneNumber if dealer else None
-        
-        result.append(OrderResponse(**o_dict))
+        ).order_by(OrderedProduct.Id):
+            ordered_products[op.OrderId].append(op)
     
-    return result
+    dealers = {}
+    if orders and include_dealer:
+        dealers = business_directory.lookup(db, ((o.TenantId, o.BusinessId) for o in orders))
+    
+    if selected is None:
+        return api_response(request, [order_dict(o, ordered_products[o.Id], dealers.get(o.BusinessId)) for o in orders])
+    
+    column_fields = [field for field in selected if field not in DEALER_FIELDS and field != "ordered_products"]
+    result = []
+    for o in orders:
+        item = project(o, column_fields)
+        if include_lines:
+            item["ordered_products"] = [ordered_product_dict(op) for op in ordered_products[o.Id]]
+        dealer = dealers.get(o.BusinessId)
+        for field, attribute in DEALER_FIELDS.items():
+            if field in selected:
+                item[field] = getattr(dealer, attribute) if dealer else None
+        result.append(item)
+    return api_response(request, result)
+
+@router.get("/export")
+def export_orders(
+    user=Depends(get_current_user),
+    format: str = Query("csv", description="csv or ndjson"),
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    tenantId: Optional[int] = None
+):
+    """
+    Stream all matching orders with their line items flattened to one row per
+    ordered product (orders without line items produce a single row).
+    """
+    policy.require(user, "orders", "read")
+    statement = (
+        select(
+            Order.Id.label("OrderId"),
+            Order.TenantId,
+            Order.BusinessId,
+            Business.Name.label("DealerName"),
+            Business.Email.label("DealerEmail"),
+            Business.PhoneNumber.label("DealerPhone"),
+            Order.Type.label("OrderType"),
+            Order.SubType.label("OrderSubType"),
+            Order.OrderStatus,
+            Order.OrderDateTime,
+            Order.CreatedAt,
+            OrderedProduct.Id.label("OrderedProductId"),
+            OrderedProduct.ProductId,
+            OrderedProduct.Quantity,
+            OrderedProduct.Price,
+            OrderedProduct.DiscountType,
+            OrderedProduct.DiscountAmount,
+            OrderedProduct.TaxType,
+            OrderedProduct.TaxAmount,
+            OrderedProduct.TotalCost,
+        )
+        .select_from(Order)
+        .outerjoin(OrderedProduct, and_(OrderedProduct.OrderId == Order.Id, OrderedProduct.isDeleted == False))
+        .outerjoin(Business, and_(Business.Id == Order.BusinessId, Business.isDeleted == False))
+        .filter(Order.isDeleted == False)
+    )
+    statement = apply_order_filters(statement, user, status, type, start_date, end_date, tenantId)
+    statement = statement.order_by(Order.Id, OrderedProduct.Id)
+    return export_response(statement, format, "orders")
+
+@router.get("/stuck", response_model=List[StuckOrderResponse])
+def list_stuck_orders(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+    status: str = Query("InProgress"),
+    older_than_days: int = Query(7, ge=0),
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=500),
+    tenantId: Optional[int] = None
+):
+    """Orders that entered `status` more than `older_than_days` ago (served by the status/StatusChangedAt index)."""
+    policy.require(user, "orders", "manage")
+    target = order_workflow.parse_status(status)
+    now = datetime.utcnow()
+    query = db.query(
+        Order.Id, Order.TenantId, Order.BusinessId, Order.Type, Order.OrderStatus, Order.StatusChangedAt
+    ).filter(
+        Order.OrderStatus == target,
+        Order.StatusChangedAt < now - timedelta(days=older_than_days),
+        Order.isDeleted == False
+    )
+    query = apply_order_filters(query, user, tenantId=tenantId)
+    rows = query.order_by(Order.StatusChangedAt).offset((page - 1) * size).limit(size).all()
+    return [
+        StuckOrderResponse(
+            Id=row.Id, TenantId=row.TenantId, BusinessId=row.BusinessId, Type=row.Type.value,
+            OrderStatus=row.OrderStatus.value, StatusChangedAt=row.StatusChangedAt,
+            DaysInStatus=(now - row.StatusChangedAt).days
+        )
+        for row in rows
+    ]
+
+def get_stream_user(request: Request, token: Optional[str] = Query(None)):
+    """Authenticate an event stream. EventSource cannot send headers, so the token may come as ?token=.
+    Uses its own short-lived session so no connection is held for the life of the stream."""
+    header = request.headers.get("authorization", "")
+    if not token and header.startswith("Bearer "):
+        token = header[len("Bearer "):]
+    db = SessionLocal()
+    try:
+        return user_from_token(db, token)
+    finally:
+        db.close()
+
+@router.get("/events")
+async def order_events(request: Request, user=Depends(get_stream_user), tenantId: Optional[int] = None):
+    """
+    Server-sent events for orders created or changing status, scoped like the order list:
+    the user's tenant (or `tenantId` for platform roles), and their own business for dealers.
+    """
+    policy.require(user, "orders", "read")
+    business_id = user.BusinessId if policy.is_dealer(user) else None
+    subscriber = events.broker.subscribe(policy.tenant_for(user, tenantId), business_id)
+    return StreamingResponse(
+        events.sse_stream(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{order_id}/history", response_model=List[OrderStatusHistoryResponse])
+def get_order_history(order_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    policy.require(user, "orders", "read")
+    if not apply_order_scope(db.query(Order.Id).filter(Order.Id == order_id, Order.isDeleted == False), user).first():
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db.query(OrderStatusHistory).filter(OrderStatusHistory.OrderId == order_id).order_by(
+        OrderStatusHistory.ChangedAt, OrderStatusHistory.Id
+    ).all()
 
 @router.get("/{order_id}", response_model=OrderResponse)
-def get_order(order_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user)
+def get_order(order_id: int, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    policy.require(user, "orders", "read")
     
-    # Base query with tenant filter
-    query = db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False)
-    
-    # Apply tenant filter
-    if user.Role in {UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin, UserRoleEnum.SalesAdmin}:
-        # SuperAdmins, TechAdmins, and SalesAdmins can access orders from any tenant
-        pass
-    else:
-        # All other roles are restricted to their tenant
-        query = query.filter(Order.TenantId == user.TenantId)
+    if has_conditional_header(request):
+        # Compare row versions (order + its line items) before loading anything else
+        version = apply_order_scope(
+            db.query(Order.Version, func.count(OrderedProduct.Id), func.max(OrderedProduct.ModifiedAt))
+            .outerjoin(OrderedProduct, and_(OrderedProduct.OrderId == Order.Id, OrderedProduct.isDeleted == False))
+            .filter(Order.Id == order_id, Order.isDeleted == False)
+            .group_by(Order.Id, Order.Version),
+            user
+        ).first()
+        if not version:
+            raise HTTPException(status_code=404, detail="Order not found")
+        etag = order_etag(order_id, *version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
     
-    # Apply business filter for Dealers and DealerAdmins
-    if user.Role in {UserRoleEnum.Dealer, UserRoleEnum.DealerAdmin}:
-        query = query.filter(Order.BusinessId == user.BusinessId)
+    # Base query with tenant filter
+    query = apply_order_scope(db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False), user)
     
     order = query.first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     ordered_products = db.query(OrderedProduct).filter(OrderedProduct.OrderId == order.Id, OrderedProduct.isDeleted == False).all()
-    o_dict = OrderResponse.from_orm(order).dict()
-    o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-    return OrderResponse(**o_dict)
+    etag = order_lines_etag(order, ordered_products)
+    return api_response(request, order_dict(order, ordered_products), headers=etag_headers(etag))
 
 @router.post("/", response_model=OrderCreateResponse, status_code=201)
-def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user, allowed_roles=ALL_ROLES)
+def create_order(order_request: OrderCreateRequest, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    policy.require(user, "orders", "create")
+    check_limit(db, user.TenantId, LIMIT_MAX_ORDERS_PER_MONTH, adding=len(order_request.orders))
+    for order in order_request.orders:
+        order_workflow.check_initial(order.OrderStatus)
     
     from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm.exc import StaleDataError
     try:
         booked_order = None
         requested_order = None
+        booked_lines = []
+        requested_lines = []
         
         # Process each order in the request
         for order in order_request.orders:
@@ -162,7 +338,7 @@ def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db
                     BusinessId=order.BusinessId,
                     Type=order.Type,
                     SubType=order.SubType,
-                    OrderStatus=order.OrderStatus or "New",
+                    OrderStatus=OrderStatusEnum.New,
                     AdditionalData=order.AdditionalData,
                     CreatedBy=user.Id,
                     ModifiedBy=user.Id
@@ -172,8 +348,13 @@ def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db
                 
                 # Process ordered products
                 ordered_products = []
+                stock_deltas = []
+                movements = []
                 for op in order.ordered_products:
-                    product = db.query(Product).filter(Product.Id == op.ProductId, Product.isDeleted == False).first()
+                    product = db.query(Product).filter(
+                        Product.Id == op.ProductId, Product.isDeleted == False,
+                        *policy.scope_clauses(user, Product.TenantId, tenant_id=new_order.TenantId)
+                    ).first()
                     if not product:
                         raise HTTPException(status_code=404, detail=f"Product {op.ProductId} not found")
                     
@@ -199,9 +380,19 @@ def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db
                     ordered_products.append(ordered_product)
                     
                     # Update product quantity
+                    stock_before = rollups.product_stock_state(product)
                     product.Quantity -= op.Quantity
+                    stock_deltas.append(rollups.stock_delta(stock_before, rollups.product_stock_state(product)))
+                    movements.append(inventory.movement(
+                        product.TenantId, product.Id, StockMovementTypeEnum.Booking, -op.Quantity,
+                        order_id=new_order.Id, user_id=user.Id
+                    ))
                 
+                rollups.record_order(db, new_order, ordered_products)
+                rollups.apply_stock_deltas(db, user.TenantId, *stock_deltas)
+                inventory.record_movements(db, movements)
                 booked_order = new_order
+                booked_lines = ordered_products
                 
             elif order.Type == "Requested":
                 # Create requested order
@@ -210,7 +401,7 @@ def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db
                     BusinessId=order.BusinessId,
                     Type=order.Type,
                     SubType=order.SubType,
-                    OrderStatus=order.OrderStatus or "New",
+                    OrderStatus=OrderStatusEnum.New,
                     AdditionalData=order.AdditionalData,
                     CreatedBy=user.Id,
                     ModifiedBy=user.Id
@@ -237,127 +428,306 @@ def create_order(order_request: OrderCreateRequest, db: Session = Depends(get_db
                     db.add(ordered_product)
                     ordered_products.append(ordered_product)
                 
+                rollups.record_order(db, new_order, ordered_products)
                 requested_order = new_order
+                requested_lines = ordered_products
+        
+        # Flush so defaults (Ids, timestamps) are populated, then build the response
+        # from the in-memory rows instead of refreshing and re-querying after commit
+        db.flush()
+        order_workflow.record_history(db, [
+            order_workflow.history_row(o, None, o.OrderStatus, user.Id, o.StatusChangedAt)
+            for o in (booked_order, requested_order) if o is not None
+        ])
+        outbox.enqueue(db, [
+            outbox.order_event(o, outbox.ORDER_CREATED, ProductCount=len(lines))
+            for o, lines in ((booked_order, booked_lines), (requested_order, requested_lines)) if o is not None
+        ])
+        response = {
+            "booked_order": order_dict(booked_order, booked_lines) if booked_order else None,
+            "requested_order": order_dict(requested_order, requested_lines) if requested_order else None,
+        }
         
         # Commit all changes
         db.commit()
-        
-        # Prepare response
-        response = OrderCreateResponse()
         if booked_order:
-            db.refresh(booked_order)
-            ordered_products = db.query(OrderedProduct).filter(
-                OrderedProduct.OrderId == booked_order.Id, 
-                OrderedProduct.isDeleted == False
-            ).all()
-            o_dict = OrderResponse.from_orm(booked_order).dict()
-            o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-            response.booked_order = OrderResponse(**o_dict)
-            
-        if requested_order:
-            db.refresh(requested_order)
-            ordered_products = db.query(OrderedProduct).filter(
-                OrderedProduct.OrderId == requested_order.Id, 
-                OrderedProduct.isDeleted == False
-            ).all()
-            o_dict = OrderResponse.from_orm(requested_order).dict()
-            o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-            response.requested_order = OrderResponse(**o_dict)
+            # Booked orders decrement product stock, which is part of the cached catalog
+            bump_generation(CATALOG, user.TenantId)
             
-        return response
+        return api_response(request, response, status_code=201)
         
+    except StaleDataError:
+        # A product's stock was changed by a concurrent order between our read and our write
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Product stock changed while the order was being placed; please retry")
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Order creation failed")
 
 @router.put("/{order_id}", response_model=OrderResponse)
-def update_order(order_id: int, order: OrderCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user, allowed_roles=ADMIN_ROLES)
-    db_order = db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False).first()
+def update_order(order_id: int, order: OrderCreate, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    """
+    Replace the order's fields. Line items cannot be changed here: `ordered_products`
+    in the body is ignored and the response carries the order's existing lines.
+    """
+    policy.require(user, "orders", "update")
+    db_order = apply_order_scope(db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False), user).first()
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
+    ordered_products = db.query(OrderedProduct).filter(OrderedProduct.OrderId == db_order.Id, OrderedProduct.isDeleted == False).all()
+    # If-Match must carry the ETag of the version being edited; the UPDATE itself is version checked
+    check_if_match(request, order_lines_etag(db_order, ordered_products))
+    status_before = db_order.OrderStatus
+    new_status = order_workflow.parse_status(order.OrderStatus)
+    order_workflow.check_transition(status_before, new_status)
+    held_before = inventory.holds_stock(db_order)
+    if rollups.counts_toward_sales(db_order):
+        rollups.record_order(db, db_order, ordered_products, sign=-1)
     for key, value in order.dict(exclude={"ordered_products"}).items():
         setattr(db_order, key, value)
     db_order.ModifiedBy = user.Id
-    db.commit()
+    if new_status != status_before:
+        db_order.StatusChangedAt = datetime.utcnow()
+        order_workflow.record_history(db, [
+            order_workflow.history_row(db_order, status_before, new_status, user.Id, db_order.StatusChangedAt)
+        ])
+    if rollups.counts_toward_sales(db_order):
+        rollups.record_order(db, db_order, ordered_products)
+    stock_moved = sync_order_stock(db, db_order, ordered_products, held_before, user, "Order updated")
+    outbox.enqueue(db, [outbox.order_event(db_order, outbox.ORDER_UPDATED, ModifiedBy=user.Id)])
+    tenant_id = db_order.TenantId
+    commit_or_conflict(db)
+    if stock_moved:
+        bump_generation(CATALOG, tenant_id)
     db.refresh(db_order)
-    # Update ordered products if needed (not implemented here)
+    return api_response(request, order_dict(db_order, ordered_products), headers=etag_headers(order_lines_etag(db_order, ordered_products)))
+
+@router.patch("/{order_id}", response_model=OrderResponse)
+def patch_order(
+    order_id: int,
+    patch: OrderPatch,
+    request: Request,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Update only the order fields sent; one version-checked UPDATE and no refresh SELECT."""
+    policy.require(user, "orders", "update")
+    db_order = apply_order_scope(db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False), user).first()
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Order not found")
     ordered_products = db.query(OrderedProduct).filter(OrderedProduct.OrderId == db_order.Id, OrderedProduct.isDeleted == False).all()
-    o_dict = OrderResponse.from_orm(db_order).dict()
-    o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-    return OrderResponse(**o_dict)
+    check_if_match(request, order_lines_etag(db_order, ordered_products))
+    changes = changed_values(db_order, patch.dict(exclude_unset=True))
+    stock_moved = False
+    if changes:
+        status_before = db_order.OrderStatus
+        if "OrderStatus" in changes:
+            order_workflow.check_transition(status_before, changes["OrderStatus"])
+            changes["StatusChangedAt"] = datetime.utcnow()
+            order_workflow.record_history(db, [order_workflow.history_row(
+                db_order, status_before, changes["OrderStatus"], user.Id, changes["StatusChangedAt"]
+            )])
+        held_before = inventory.holds_stock(db_order)
+        if rollups.counts_toward_sales(db_order):
+            rollups.record_order(db, db_order, ordered_products, sign=-1)
+        versioned_update(db, db_order, changes, user.Id)
+        if rollups.counts_toward_sales(db_order):
+            rollups.record_order(db, db_order, ordered_products)
+        stock_moved = sync_order_stock(db, db_order, ordered_products, held_before, user, "Order updated")
+        outbox.enqueue(db, [outbox.order_event(
+            db_order, outbox.ORDER_UPDATED, ModifiedBy=user.Id, Fields=sorted(changes)
+        )])
+    # Build the response from the merged row before commit expires it
+    response = order_dict(db_order, ordered_products)
+    etag = order_lines_etag(db_order, ordered_products)
+    if changes:
+        tenant_id = db_order.TenantId
+        db.commit()
+        if stock_moved:
+            bump_generation(CATALOG, tenant_id)
+    return api_response(request, response, headers=etag_headers(etag))
 
 @router.delete("/{order_id}", status_code=204)
 def delete_order(order_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user, allowed_roles=ADMIN_ROLES)
-    db_order = db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False).first()
+    policy.require(user, "orders", "delete")
+    db_order = apply_order_scope(db.query(Order).filter(Order.Id == order_id, Order.isDeleted == False), user).first()
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
+    held_before = inventory.holds_stock(db_order)
+    ordered_products = []
+    if held_before or rollups.counts_toward_sales(db_order):
+        ordered_products = db.query(OrderedProduct).filter(OrderedProduct.OrderId == db_order.Id, OrderedProduct.isDeleted == False).all()
+    if rollups.counts_toward_sales(db_order):
+        rollups.record_order(db, db_order, ordered_products, sign=-1)
     db_order.isDeleted = True
     db_order.ModifiedBy = user.Id
-    db.commit()
+    # Deleting a booked order gives its stock back
+    stock_moved = sync_order_stock(db, db_order, ordered_products, held_before, user, "Order deleted")
+    outbox.enqueue(db, [outbox.order_event(db_order, outbox.ORDER_DELETED, ModifiedBy=user.Id)])
+    tenant_id = db_order.TenantId
+    commit_or_conflict(db)
+    if stock_moved:
+        bump_generation(CATALOG, tenant_id)
     return
 
 @router.patch("/{order_id}/status", response_model=OrderResponse)
 def update_order_status(
     order_id: int,
     status_update: OrderStatusUpdate,
+    request: Request,
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    check_role(user, allowed_roles=ADMIN_ROLES)
+    policy.require(user, "orders", "update")
     
     # Get the order with proper filtering
-    query = db.query(Order).filter(
+    order = apply_order_scope(db.query(Order).filter(
         Order.Id == order_id,
         Order.isDeleted == False
-    )
-    
-    # Apply tenant filter
-    if user.Role in {UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin, UserRoleEnum.SalesAdmin}:
-        # SuperAdmins, TechAdmins, and SalesAdmins can access orders from any tenant
-        pass
-    else:
-        # All other roles are restricted to their tenant
-        query = query.filter(Order.TenantId == user.TenantId)
-    
-    # Apply business filter for Dealers and DealerAdmins
-    if user.Role in {UserRoleEnum.Dealer, UserRoleEnum.DealerAdmin}:
-        query = query.filter(Order.BusinessId == user.BusinessId)
-    
-    order = query.first()
+    ), user).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Update status
-    order.OrderStatus = status_update.status
+    # Get ordered products
+    ordered_products = db.query(OrderedProduct).filter(
+        OrderedProduct.OrderId == order.Id,
+        OrderedProduct.isDeleted == False
+    ).all()
+    check_if_match(request, order_lines_etag(order, ordered_products))
+    
+    # Update status, taking a cancelled order out of the sales rollup and giving its stock back
+    status_before = order.OrderStatus
+    new_status = order_workflow.parse_status(status_update.status)
+    order_workflow.check_transition(status_before, new_status)
+    counted_before = rollups.counts_toward_sales(order)
+    held_before = inventory.holds_stock(order)
+    order.OrderStatus = new_status
     order.ModifiedBy = user.Id
+    if new_status != status_before:
+        order.StatusChangedAt = datetime.utcnow()
+        order_workflow.record_history(db, [
+            order_workflow.history_row(order, status_before, new_status, user.Id, order.StatusChangedAt)
+        ])
+    counted_after = rollups.counts_toward_sales(order)
     
     try:
-        db.commit()
+        if counted_before and not counted_after:
+            rollups.record_order(db, order, ordered_products, sign=-1)
+        stock_moved = sync_order_stock(db, order, ordered_products, held_before, user, "Order status changed")
+        tenant_id = order.TenantId
+        commit_or_conflict(db)
+        if stock_moved:
+            bump_generation(CATALOG, tenant_id)
         db.refresh(order)
         
-        # Get ordered products
-        ordered_products = db.query(OrderedProduct).filter(
-            OrderedProduct.OrderId == order.Id,
-            OrderedProduct.isDeleted == False
-        ).all()
-        
         # Get dealer information
-        dealer = db.query(Business).filter(
-            Business.Id == order.BusinessId,
-            Business.isDeleted == False
-        ).first()
+        dealer = business_directory.get(db, order.TenantId, order.BusinessId)
         
         # Prepare response
-        o_dict = OrderResponse.from_orm(order).dict()
-        o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
-        o_dict["dealerName"] = dealer.Name if dealer else None
-        o_dict["dealerEmail"] = dealer.Email if dealer else None
-        o_dict["dealerPhone"] = dealer.PhoneNumber if dealer else None
-        
-        return OrderResponse(**o_dict)
+        return api_response(
+            request,
+            order_dict(order, ordered_products, dealer),
+            headers=etag_headers(order_lines_etag(order, ordered_products))
+        )
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update order status")
+
+def bulk_set_status(db: Session, user, order_ids: List[int], new_status: OrderStatusEnum, note: str) -> List[BulkOrderResult]:
+    """
+    Move many orders to `new_status` in one transaction: one scoped query validates
+    access, stock of booked orders being cancelled is given back with one locking
+    SELECT and one UPDATE, and the orders are updated with a single UPDATE.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    if len(order_ids) > BULK_MAX_ORDERS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ORDERS} orders per request")
+    
+    orders = apply_order_scope(
+        db.query(Order).filter(Order.Id.in_(order_ids), Order.isDeleted == False), user
+    ).with_for_update().all()
+    found = {o.Id: o for o in orders}
+    rejected = {
+        o.Id: order_workflow.transition_error(o.OrderStatus, new_status)
+        for o in orders if not order_workflow.can_transition(o.OrderStatus, new_status)
+    }
+    to_change = [o for o in orders if o.OrderStatus != new_status and o.Id not in rejected]
+    change_ids = [o.Id for o in to_change]
+    
+    stock_tenants = set()
+    if change_ids:
+        if new_status == OrderStatusEnum.Cancelled:
+            # Cancelled is terminal, so only cancelling changes the sales rollup and, for booked orders, stock
+            ordered_products = defaultdict(list)
+            for op in db.query(OrderedProduct).filter(
+                OrderedProduct.OrderId.in_(change_ids),
+                OrderedProduct.isDeleted == False
+            ):
+                ordered_products[op.OrderId].append(op)
+            releasing = []
+            for o in to_change:
+                rollups.record_order(db, o, ordered_products[o.Id], sign=-1)
+                if o.Type == OrderTypeEnum.Booked:
+                    releasing.append((o, ordered_products[o.Id]))
+            if inventory.move_order_stock(db, releasing, user.Id, note):
+                stock_tenants.update(o.TenantId for o, _ in releasing)
+        
+        now = datetime.utcnow()
+        order_workflow.record_history(db, [
+            order_workflow.history_row(o, o.OrderStatus, new_status, user.Id, now) for o in to_change
+        ])
+        result = db.execute(
+            update(Order)
+            .where(Order.Id.in_(change_ids), Order.OrderStatus != new_status)
+            .values(
+                OrderStatus=new_status,
+                StatusChangedAt=now,
+                Version=Order.Version + 1,
+                ModifiedBy=user.Id,
+                ModifiedAt=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(change_ids):
+            # Another request changed one of these orders concurrently; don't move its stock twice
+            db.rollback()
+            raise HTTPException(status_code=409, detail="Some orders were modified concurrently; please retry")
+        db.commit()
+        for tenant_id in stock_tenants:
+            bump_generation(CATALOG, tenant_id)
+    
+    results = []
+    for order_id in order_ids:
+        if order_id not in found:
+            results.append(BulkOrderResult(Id=order_id, Status="not_found"))
+        elif order_id in rejected:
+            results.append(BulkOrderResult(Id=order_id, Status="invalid_transition", Detail=rejected[order_id]))
+        elif order_id in change_ids:
+            results.append(BulkOrderResult(Id=order_id, Status="updated"))
+        else:
+            results.append(BulkOrderResult(Id=order_id, Status="unchanged", Detail=f"Order is already {new_status.value}"))
+    return results
+
+@router.post("/bulk-status", response_model=List[BulkOrderResult])
+def bulk_update_order_status(
+    bulk: BulkOrderStatusUpdate,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Set the status of many orders at once; returns one result per requested Id."""
+    policy.require(user, "orders", "manage")
+    new_status = order_workflow.parse_status(bulk.status)
+    return bulk_set_status(db, user, bulk.OrderIds, new_status, "Bulk status change")
+
+@router.post("/bulk-cancel", response_model=List[BulkOrderResult])
+def bulk_cancel_orders(
+    bulk: BulkOrderIds,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Cancel many orders at once, giving back the stock held by booked orders."""
+    policy.require(user, "orders", "manage")
+    return bulk_set_status(db, user, bulk.OrderIds, OrderStatusEnum.Cancelled, "Bulk cancellation")
@@ -1,94 +1,256 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc, asc
+from sqlalchemy import or_, desc, asc, select, func, case
 from typing import List, Optional
-from backend.schemas import ProductCreate, ProductResponse
-from backend.models import Product, UserRoleEnum
+from backend.schemas import ProductCreate, ProductPatch, ProductResponse
+from backend.models import Product, StockMovementTypeEnum
 from backend.auth import get_current_user
 from backend.database import get_db
 from backend.gcs_utils import upload_product_image, generate_signed_url
+from backend.runtime_config import PAGE_SIZE_CEILING, UPLOAD_MAX_IMAGE_BYTES, LIMIT_MAX_SKUS, check_page_size, setting
+from backend.entitlements import check_limit
 from backend.logging_config import get_logger, log_error
+from backend import rollups, inventory, policy
+from backend.exports import export_response
+from backend.http_cache import (
+    make_etag, etag_matches, has_conditional_header, not_modified, etag_headers, set_etag,
+    check_if_match, commit_or_conflict
+)
+from backend.serialization import api_response, parse_fields, project
+from backend.patching import changed_values, versioned_update
+from backend.cache import CATALOG, versioned_key, cache_get, cache_set, bump_generation
 import os
 
 router = APIRouter()
 logger = get_logger("products")
 
-ALLOWED_ROLES = {
-    UserRoleEnum.SuperAdmin,
-    UserRoleEnum.TechAdmin,
-    UserRoleEnum.SalesAdmin,
-    UserRoleEnum.WholesalerAdmin,
-    UserRoleEnum.Wholesaler,
-    UserRoleEnum.DealerAdmin,
-    UserRoleEnum.Dealer,
+PRODUCT_FIELDS = list(ProductResponse.model_fields)
+# Named field sets for `fields=`; "grid" is what the product table view needs
+PRODUCT_FIELD_PROFILES = {
+    "grid": ["Id", "ProductId", "Name", "Quantity", "MRP"],
 }
 
-def check_role(user, allowed_roles=ALLOWED_ROLES):
-    if user.Role not in allowed_roles:
-        raise HTTPException(status_code=403, detail="Not enough permissions")
+def product_etag(product_id: int, version) -> str:
+    return make_etag("product", product_id, version)
+
+def product_collection_version(db: Session, tenant_id: int):
+    """Row counts, version sum and latest ModifiedAt for a tenant's products; changes on any create/update/delete."""
+    return db.query(
+        func.count(Product.Id),
+        func.sum(case((Product.isDeleted == False, 1), else_=0)),
+        func.sum(Product.Version),
+        func.max(Product.ModifiedAt)
+    ).filter(Product.TenantId == tenant_id).one()
+
+def stock_edit_movement(product: Product, stock_before, user) -> dict:
+    """Ledger entry for a Quantity edited directly through the product form (a zero delta is skipped)."""
+    return inventory.movement(
+        product.TenantId, product.Id, StockMovementTypeEnum.Adjustment, product.Quantity - stock_before[0],
+        note="Product edit", user_id=user.Id
+    )
 
 @router.get("/", response_model=List[ProductResponse])
 def list_products(
+    request: Request,
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
     page: int = Query(1, ge=1),
-    size: int = Query(20, ge=1, le=100),
+    size: int = Query(20, ge=1, le=PAGE_SIZE_CEILING),
     sort_by: str = Query("CreatedAt"),
     order: str = Query("desc"),
+    search: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma separated field names or a profile (grid)")
+):
+    policy.require(user, "products", "read")
+    check_page_size(size, user.TenantId)
+    selected = parse_fields(fields, PRODUCT_FIELDS, PRODUCT_FIELD_PROFILES)
+    field_key = ",".join(selected) if selected else None
+    # Catalog pages are cached per tenant + query parameters; writes bump the tenant's generation
+    cache_key = versioned_key(CATALOG, user.TenantId, "list", page, size, sort_by, order, search, field_key)
+    entry = cache_get(cache_key)
+    if entry is None:
+        etag = make_etag("products", user.TenantId, *product_collection_version(db, user.TenantId), page, size, sort_by, order, search, field_key)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        if selected:
+            # Only SELECT the requested columns
+            query = db.query(*[getattr(Product, field) for field in selected])
+        else:
+            query = db.query(Product)
+        query = query.filter(Product.TenantId == user.TenantId, Product.isDeleted == False)
+        if search:
+            query = query.filter(or_(Product.ProductId.ilike(f"%{search}%"), Product.Name.ilike(f"%{search}%")))
+        sort_column = getattr(Product, sort_by, Product.CreatedAt)
+        if order == "desc":
+            query = query.order_by(desc(sort_column))
+        else:
+            query = query.order_by(asc(sort_column))
+        products = query.offset((page - 1) * size).limit(size).all()
+        if selected:
+            items = [project(p, selected) for p in products]
+        else:
+            items = [ProductResponse.model_validate(p).model_dump(mode="json") for p in products]
+        entry = {"etag": etag, "items": items}
+        cache_set(cache_key, entry)
+    if etag_matches(request, entry["etag"]):
+        return not_modified(entry["etag"])
+    # Cached items are already validated ProductResponse dumps, so skip response_model re-validation
+    return api_response(request, entry["items"], headers=etag_headers(entry["etag"]))
+
+@router.get("/export")
+def export_products(
+    user=Depends(get_current_user),
+    format: str = Query("csv", description="csv or ndjson"),
     search: Optional[str] = None
 ):
-    check_role(user)
-    query = db.query(Product).filter(Product.TenantId == user.TenantId, Product.isDeleted == False)
+    """Stream the tenant's product catalog as CSV or NDJSON."""
+    policy.require(user, "products", "read")
+    statement = select(
+        Product.Id,
+        Product.ProductId,
+        Product.Name,
+        Product.Description,
+        Product.Quantity,
+        Product.MRP,
+        Product.DiscountType,
+        Product.DiscountAmount,
+        Product.TaxType,
+        Product.TaxAmount,
+        Product.ImagePath,
+        Product.CreatedAt,
+        Product.ModifiedAt,
+    ).filter(Product.TenantId == user.TenantId, Product.isDeleted == False)
     if search:
-        query = query.filter(or_(Product.ProductId.ilike(f"%{search}%"), Product.Name.ilike(f"%{search}%")))
-    sort_column = getattr(Product, sort_by, Product.CreatedAt)
-    if order == "desc":
-        query = query.order_by(desc(sort_column))
-    else:
-        query = query.order_by(asc(sort_column))
-    total = query.count()
-    products = query.offset((page - 1) * size).limit(size).all()
-    return products
+        statement = statement.filter(or_(Product.ProductId.ilike(f"%{search}%"), Product.Name.ilike(f"%{search}%")))
+    return export_response(statement.order_by(Product.Id), format, "products")
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user)
-    product = db.query(Product).filter(Product.Id == product_id, Product.isDeleted == False).first()
-    if not product:
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    policy.require(user, "products", "read")
+    # A product's tenant never changes, so remember it to address the tenant-versioned entry directly
+    tenant_id = cache_get(f"product-tenant:{product_id}")
+    if tenant_id is not None and not policy.can_access(user, tenant_id):
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    cache_key = versioned_key(CATALOG, tenant_id, "product", product_id) if tenant_id is not None else None
+    entry = cache_get(cache_key)
+    if entry is None:
+        if has_conditional_header(request):
+            # Check the row version before loading the full row
+            version = db.query(Product.Version).filter(
+                Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+            ).first()
+            if not version:
+                raise HTTPException(status_code=404, detail="Product not found")
+            etag = product_etag(product_id, version.Version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        product = db.query(Product).filter(
+            Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+        ).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = {
+            "etag": product_etag(product.Id, product.Version),
+            "item": ProductResponse.model_validate(product).model_dump(mode="json"),
+        }
+        if tenant_id is None:
+            cache_set(f"product-tenant:{product_id}", product.TenantId)
+            cache_key = versioned_key(CATALOG, product.TenantId, "product", product_id)
+        cache_set(cache_key, entry)
+    if etag_matches(request, entry["etag"]):
+        return not_modified(entry["etag"])
+    return api_response(request, entry["item"], headers=etag_headers(entry["etag"]))
 
 @router.post("/", response_model=ProductResponse, status_code=201)
 def create_product(product: ProductCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user)
+    policy.require(user, "products", "create")
+    check_limit(db, user.TenantId, LIMIT_MAX_SKUS)
     db_product = Product(**product.dict(), TenantId=user.TenantId, CreatedBy=user.Id, ModifiedBy=user.Id)
     db.add(db_product)
+    db.flush()
+    rollups.apply_stock_deltas(db, user.TenantId, rollups.stock_delta(None, rollups.product_stock_state(db_product)))
+    inventory.record_movements(db, [inventory.movement(
+        user.TenantId, db_product.Id, StockMovementTypeEnum.Adjustment, db_product.Quantity or 0,
+        note="Initial stock", user_id=user.Id
+    )])
     db.commit()
+    bump_generation(CATALOG, user.TenantId)
     db.refresh(db_product)
     return db_product
 
 @router.put("/{product_id}", response_model=ProductResponse)
-def update_product(product_id: int, product: ProductCreate, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user)
-    db_product = db.query(Product).filter(Product.Id == product_id, Product.isDeleted == False).first()
+def update_product(
+    product_id: int,
+    product: ProductCreate,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    policy.require(user, "products", "update")
+    db_product = db.query(Product).filter(
+        Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+    ).first()
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
+    # If-Match must carry the ETag of the version being edited; the UPDATE itself is version checked
+    check_if_match(request, product_etag(db_product.Id, db_product.Version))
+    stock_before = rollups.product_stock_state(db_product)
     for key, value in product.dict().items():
         setattr(db_product, key, value)
     db_product.ModifiedBy = user.Id
-    db.commit()
+    rollups.apply_stock_deltas(db, db_product.TenantId, rollups.stock_delta(stock_before, rollups.product_stock_state(db_product)))
+    inventory.record_movements(db, [stock_edit_movement(db_product, stock_before, user)])
+    commit_or_conflict(db)
+    bump_generation(CATALOG, db_product.TenantId)
     db.refresh(db_product)
+    set_etag(response, product_etag(db_product.Id, db_product.Version))
     return db_product
 
+@router.patch("/{product_id}", response_model=ProductResponse)
+def patch_product(
+    product_id: int,
+    patch: ProductPatch,
+    request: Request,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """Update only the fields sent; one version-checked UPDATE and no refresh SELECT."""
+    policy.require(user, "products", "update")
+    db_product = db.query(Product).filter(
+        Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+    ).first()
+    if not db_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    check_if_match(request, product_etag(db_product.Id, db_product.Version))
+    changes = changed_values(db_product, patch.dict(exclude_unset=True))
+    if changes:
+        stock_before = rollups.product_stock_state(db_product)
+        versioned_update(db, db_product, changes, user.Id)
+        rollups.apply_stock_deltas(db, db_product.TenantId, rollups.stock_delta(stock_before, rollups.product_stock_state(db_product)))
+        inventory.record_movements(db, [stock_edit_movement(db_product, stock_before, user)])
+        # Build the response from the merged row before commit expires it
+        item = ProductResponse.model_validate(db_product).model_dump(mode="json")
+        db.commit()
+        bump_generation(CATALOG, item["TenantId"])
+    else:
+        item = ProductResponse.model_validate(db_product).model_dump(mode="json")
+    return api_response(request, item, headers=etag_headers(product_etag(item["Id"], item["Version"])))
+
 @router.delete("/{product_id}", status_code=204)
 def delete_product(product_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
-    check_role(user)
-    db_product = db.query(Product).filter(Product.Id == product_id, Product.isDeleted == False).first()
+    policy.require(user, "products", "delete")
+    db_product = db.query(Product).filter(
+        Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+    ).first()
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
+    stock_before = rollups.product_stock_state(db_product)
     db_product.isDeleted = True
     db_product.ModifiedBy = user.Id
-    db.commit()
+    rollups.apply_stock_deltas(db, db_product.TenantId, rollups.stock_delta(stock_before, None))
+    commit_or_conflict(db)
+    bump_generation(CATALOG, db_product.TenantId)
     return
 
 @router.post("/upload-image")
@@ -122,13 +284,14 @@ def upload_image(
             logger.warning(f"Upload failed: Invalid file type - {file.content_type}")
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        # Check file size (limit to 10MB)
-        if hasattr(file, 'size') and file.size and file.size > 10 * 1024 * 1024:
+        # Check file size (per-tenant limit, 10MB by default)
+        max_bytes = int(setting(UPLOAD_MAX_IMAGE_BYTES, tenantId))
+        if hasattr(file, 'size') and file.size and file.size > max_bytes:
             logger.warning(f"Upload failed: File too large - {file.size} bytes")
-            raise HTTPException(status_code=400, detail="File size must be less than 10MB")
+            raise HTTPException(status_code=400, detail=f"File size must be less than {max_bytes // (1024 * 1024)}MB")
         
         # Validate tenant access
-        if user.TenantId != tenantId and user.Role not in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
+        if not policy.can_access(user, tenantId):
             logger.warning(f"Upload failed: User {user.Id} attempted to upload to tenant {tenantId} but belongs to tenant {user.TenantId}")
             raise HTTPException(status_code=403, detail="Cannot upload to different tenant")
         
@@ -174,8 +337,10 @@ def refresh_image_url(
     db: Session = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    check_role(user)
-    product = db.query(Product).filter(Product.Id == product_id, Product.isDeleted == False).first()
+    policy.require(user, "products", "update")
+    product = db.query(Product).filter(
+        Product.Id == product_id, Product.isDeleted == False, *policy.scope_clauses(user, Product.TenantId)
+    ).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
@@ -198,6 +363,7 @@ def refresh_image_url(
         # Update product with new URL
         product.ImageLink = new_url
         db.commit()
+        bump_generation(CATALOG, product.TenantId)
         
         return {"url": new_url}
     except Exception as e:
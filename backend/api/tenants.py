@@ -1,8 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
-from .. import crud, schemas, auth
+import os
+from .. import crud, schemas, auth, policy
 from ..database import get_db
+from ..entitlements import entitlement_cache
+from ..business_directory import business_directory
+from ..cache import TENANT_OVERVIEW, versioned_key, cache_get, cache_set, bump_generation
+
+# Counts in the tenant overview may lag writes by up to this long
+TENANT_OVERVIEW_TTL_SECONDS = int(os.getenv("TENANT_OVERVIEW_TTL_SECONDS", "30"))
 
 router = APIRouter()
 
@@ -20,7 +27,7 @@ def get_tenants(
     - SuperAdmin, TechAdmin, SalesAdmin: Can view all tenants
     - WholesalerAdmin, Wholesaler, DealerAdmin, Dealer: Can only view their own tenant
     """
-    if current_user.Role in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
+    if policy.is_platform(current_user):
         # Admin roles can see all tenants
         tenants = crud.get_tenants(db, skip=skip, limit=limit, search=search, status=status)
     else:
@@ -39,22 +46,43 @@ def get_tenant(
     Get a specific tenant by ID with its associated businesses.
     Only accessible by SuperAdmin, TechAdmin, and SalesAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to access tenants")
+    policy.require(current_user, "tenants", "read_any", detail="Not authorized to access tenants")
     
     tenant = crud.get_tenant(db, tenant_id)
     if tenant is None:
         raise HTTPException(status_code=404, detail="Tenant not found")
     
     # Get associated businesses
-    wholesaler = crud.get_businesses(db, tenant_id=tenant_id, business_type="WHOLESALER", limit=1)
-    dealers = crud.get_businesses(db, tenant_id=tenant_id, business_type="DEALER")
+    wholesaler = business_directory.list(db, tenant_id, business_type="WHOLESALER")
+    dealers = business_directory.list(db, tenant_id, business_type="DEALER")[:100]
+    
+    return schemas.TenantDetailResponse(
+        **schemas.TenantResponse.model_validate(tenant).model_dump(),
+        wholesaler=wholesaler[0] if wholesaler else None,
+        dealers=dealers
+    )
+
+@router.get("/{tenant_id}/overview", response_model=schemas.TenantOverviewResponse)
+def get_tenant_overview(
+    tenant_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.UserResponse = Depends(auth.get_current_user)
+):
+    """
+    Tenant with its wholesaler, dealers and per-business user, product, open order
+    and stock value counts, from a single aggregated query cached briefly per tenant.
+    Only accessible by SuperAdmin, TechAdmin, and SalesAdmin roles.
+    """
+    policy.require(current_user, "tenants", "read_any", detail="Not authorized to access tenants")
     
-    return {
-        **tenant.__dict__,
-        "wholesaler": wholesaler[0] if wholesaler else None,
-        "dealers": dealers
-    }
+    cache_key = versioned_key(TENANT_OVERVIEW, tenant_id)
+    overview = cache_get(cache_key)
+    if overview is None:
+        overview = crud.get_tenant_overview(db, tenant_id)
+        if overview is None:
+            raise HTTPException(status_code=404, detail="Tenant not found")
+        cache_set(cache_key, overview, TENANT_OVERVIEW_TTL_SECONDS)
+    return overview
 
 @router.post("/", response_model=schemas.TenantResponse)
 def create_tenant(
@@ -66,8 +94,7 @@ def create_tenant(
     Create a new tenant.
     Only accessible by SuperAdmin and TechAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to create tenants")
+    policy.require(current_user, "tenants", "create", detail="Not authorized to create tenants")
     return crud.create_tenant(db, tenant, current_user.Id)
 
 @router.put("/{tenant_id}", response_model=schemas.TenantResponse)
@@ -81,11 +108,12 @@ def update_tenant(
     Update a tenant.
     Only accessible by SuperAdmin and TechAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update tenants")
+    policy.require(current_user, "tenants", "update", detail="Not authorized to update tenants")
     db_tenant = crud.update_tenant(db, tenant_id, tenant, current_user.Id)
     if db_tenant is None:
         raise HTTPException(status_code=404, detail="Tenant not found")
+    entitlement_cache.refresh_tenant(db, tenant_id)
+    bump_generation(TENANT_OVERVIEW, tenant_id)
     return db_tenant
 
 @router.delete("/{tenant_id}", response_model=schemas.TenantResponse)
@@ -98,11 +126,12 @@ def delete_tenant(
     Soft delete a tenant.
     Only accessible by SuperAdmin and TechAdmin roles.
     """
-    if current_user.Role not in ["SuperAdmin", "TechAdmin"]:
-        raise HTTPException(status_code=403, detail="Not authorized to delete tenants")
+    policy.require(current_user, "tenants", "delete", detail="Not authorized to delete tenants")
     db_tenant = crud.delete_tenant(db, tenant_id, current_user.Id)
     if db_tenant is None:
         raise HTTPException(status_code=404, detail="Tenant not found")
+    entitlement_cache.refresh_tenant(db, tenant_id)
+    bump_generation(TENANT_OVERVIEW, tenant_id)
     return db_tenant
 
 
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from backend.schemas import (
     UserLogin, Token, UserResponse, UserCreate, UserUpdate, UserListResponse,
-    BusinessResponse
+    BusinessResponse, BulkUserCreate, BulkUserResult
 )
-from backend.auth import authenticate_user, create_access_token, get_current_user
+from backend.auth import authenticate_user, create_access_token, get_current_user, token_claims, TokenUser, hash_passwords
 from backend.database import get_db
-from backend import crud, models
+from backend import crud, models, policy
 from backend.crud.user import get_available_businesses_for_user_creation
+from backend.http_cache import make_etag, etag_matches, not_modified, set_etag
+from backend.entitlements import check_limit
+from backend.runtime_config import LIMIT_MAX_USERS
 
 router = APIRouter()
 
@@ -21,14 +27,23 @@ def login(user_login: UserLogin, db: Session = Depends(get_db)):
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user.UserName})
+    access_token = create_access_token(data=token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user = Depends(get_current_user)):
+def get_me(request: Request, response: Response, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     """
     Get the current user's information based on their JWT token.
     """
+    if isinstance(current_user, TokenUser):
+        # Claims-only user: the profile itself still comes from the database
+        current_user = crud.get_user(db, current_user.Id, current_user.TenantId)
+        if current_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+    etag = make_etag("me", current_user.Id, current_user.ModifiedAt)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return current_user
 
 @router.get("/", response_model=List[UserListResponse])
@@ -109,15 +124,11 @@ def get_user(
         )
     return user
 
-@router.post("/", response_model=UserResponse, status_code=201)
-def create_user(
-    user: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: UserResponse = Depends(get_current_user)
-):
-    """
-    Create a new user.
-    """
+# Upper bound on the number of users one bulk request may create
+BULK_MAX_USERS = 500
+
+def check_user_creation(current_user, user: UserCreate):
+    """Raise 403 unless `current_user` may create `user`; fills in BusinessId for business admins."""
     # Role-based validation
     if current_user.Role in ["WholesalerAdmin"]:
         # WholesalerAdmin can only create Wholesaler users
@@ -140,7 +151,7 @@ def create_user(
         user.BusinessId = current_user.BusinessId
     
     # Validate tenant access based on user role
-    if current_user.Role not in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
+    if not policy.is_platform(current_user):
         # Non-admin roles can only create users in their own tenant
         if user.TenantId != current_user.TenantId:
             raise HTTPException(
@@ -148,6 +159,17 @@ def create_user(
                 detail="Cannot create users in other tenants"
             )
     # Admin roles (SuperAdmin, TechAdmin, SalesAdmin) can create users in any tenant
+
+@router.post("/", response_model=UserResponse, status_code=201)
+def create_user(
+    user: UserCreate,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Create a new user.
+    """
+    check_user_creation(current_user, user)
     
     # Set TenantId to current user's tenant (commented out since frontend now sends it)
     # user.TenantId = current_user.TenantId
@@ -162,7 +184,7 @@ def create_user(
     
     # Check if email already exists
     existing_email = db.query(models.User).filter(
-        models.User.Email == user.Email,
+        models.User.EmailKey == user.Email.lower(),
         models.User.isDeleted == False
     ).first()
     if existing_email:
@@ -171,9 +193,86 @@ def create_user(
             detail="Email already exists"
         )
     
+    check_limit(db, user.TenantId, LIMIT_MAX_USERS)
     created_user = crud.create_user(db, user, current_user.Id)
     return created_user
 
+@router.post("/bulk", response_model=List[BulkUserResult], status_code=201)
+def create_users_bulk(
+    bulk: BulkUserCreate,
+    db: Session = Depends(get_db),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Create many users at once, e.g. when onboarding a dealer network. Usernames and
+    emails are checked with one query, passwords are hashed in parallel and all
+    accepted users are inserted in one transaction. Returns one result per row;
+    rows that fail validation are reported as rejected and do not block the others.
+    """
+    if len(bulk.Users) > BULK_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_USERS} users per request")
+    
+    rejected = {}
+    for index, user in enumerate(bulk.Users):
+        try:
+            check_user_creation(current_user, user)
+        except HTTPException as e:
+            rejected[index] = e.detail
+    
+    # Usernames and emails are unique (case-insensitively) across all rows, deleted ones included
+    usernames = {user.UserName.lower() for user in bulk.Users}
+    emails = {user.Email.lower() for user in bulk.Users}
+    taken_usernames, taken_emails = set(), set()
+    for username_key, email_key in db.query(models.User.UserNameKey, models.User.EmailKey).filter(
+        or_(models.User.UserNameKey.in_(usernames), models.User.EmailKey.in_(emails))
+    ):
+        taken_usernames.add(username_key)
+        taken_emails.add(email_key)
+    
+    seen_usernames, seen_emails = set(), set()
+    for index, user in enumerate(bulk.Users):
+        if index in rejected:
+            continue
+        username_key, email_key = user.UserName.lower(), user.Email.lower()
+        if username_key in taken_usernames:
+            rejected[index] = "Username already exists"
+        elif email_key in taken_emails:
+            rejected[index] = "Email already exists"
+        elif username_key in seen_usernames:
+            rejected[index] = "Duplicate username in request"
+        elif email_key in seen_emails:
+            rejected[index] = "Duplicate email in request"
+        else:
+            seen_usernames.add(username_key)
+            seen_emails.add(email_key)
+    
+    accepted = defaultdict(list)
+    for index, user in enumerate(bulk.Users):
+        if index not in rejected:
+            accepted[user.TenantId].append(index)
+    for tenant_id, indexes in accepted.items():
+        try:
+            check_limit(db, tenant_id, LIMIT_MAX_USERS, adding=len(indexes))
+        except HTTPException as e:
+            rejected.update((index, e.detail) for index in indexes)
+    
+    to_create = [user for index, user in enumerate(bulk.Users) if index not in rejected]
+    ids = {}
+    if to_create:
+        password_hashes = hash_passwords([user.Password for user in to_create])
+        try:
+            ids = crud.create_users(db, to_create, password_hashes, current_user.Id)
+        except IntegrityError:
+            # A concurrent request took one of the usernames or emails
+            raise HTTPException(status_code=409, detail="Some usernames or emails were taken concurrently; please retry")
+    
+    return [
+        BulkUserResult(Index=index, UserName=user.UserName, Status="rejected", Detail=rejected[index])
+        if index in rejected else
+        BulkUserResult(Index=index, UserName=user.UserName, Status="created", Id=ids.get(user.UserName))
+        for index, user in enumerate(bulk.Users)
+    ]
+
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(
     user_id: int,
@@ -223,7 +322,8 @@ def update_user(
     # Check username uniqueness if being updated
     if user.UserName and user.UserName != db_user.UserName:
         existing_user = crud.get_user_by_username(db, user.UserName)
-        if existing_user:
+        # Only changing the case of one's own username is not a clash
+        if existing_user and existing_user.Id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already exists"
@@ -232,7 +332,7 @@ def update_user(
     # Check email uniqueness if being updated
     if user.Email and user.Email != db_user.Email:
         existing_email = db.query(models.User).filter(
-            models.User.Email == user.Email,
+            models.User.EmailKey == user.Email.lower(),
             models.User.isDeleted == False,
             models.User.Id != user_id
         ).first()
@@ -1,5 +1,9 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
+import multiprocessing
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
@@ -7,12 +11,21 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from backend import models
 from backend.database import get_db
+from backend.entitlements import check_user
+from backend.cache import cache_get, cache_set
 import os
 
 # Config
 SECRET_KEY = os.getenv("JWT_SECRET", "supersecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 day
+# Embed uid/role/tid/bid/tv claims at login and authorize from them without loading the user.
+# Revocation goes through User.TokenVersion, cached for TOKEN_VERSION_TTL_SECONDS per user
+# (use CACHE_BACKEND=redis with several workers so a bump is seen everywhere at once).
+JWT_EMBED_CLAIMS = os.getenv("JWT_EMBED_CLAIMS", "false").lower() in ("1", "true", "yes")
+TOKEN_VERSION_TTL_SECONDS = int(os.getenv("TOKEN_VERSION_TTL_SECONDS", "60"))
+# Worker processes for hashing passwords in bulk user creation (0 or 1 hashes in the request thread)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
@@ -23,6 +36,32 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn, not fork: the API process runs threads that may hold locks
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """bcrypt-hash many passwords across PASSWORD_HASH_WORKERS processes, preserving order."""
+    if PASSWORD_HASH_WORKERS <= 1 or len(passwords) < 2:
+        return [get_password_hash(password) for password in passwords]
+    global _hash_pool
+    try:
+        chunksize = max(1, len(passwords) // (PASSWORD_HASH_WORKERS * 4))
+        return list(_get_hash_pool().map(get_password_hash, passwords, chunksize=chunksize))
+    except BrokenProcessPool:
+        with _hash_pool_lock:
+            _hash_pool = None
+        return [get_password_hash(password) for password in passwords]
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -30,8 +69,60 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def token_claims(user) -> dict:
+    """Claims for a login token: `sub` and the token version, plus the authorization claims when JWT_EMBED_CLAIMS is on."""
+    claims = {"sub": user.UserName, "tv": user.TokenVersion}
+    if JWT_EMBED_CLAIMS:
+        claims.update({
+            "uid": user.Id,
+            "role": user.Role.value if hasattr(user.Role, "value") else user.Role,
+            "tid": user.TenantId,
+            "bid": user.BusinessId,
+        })
+    return claims
+
+class TokenUser:
+    """The current user as described by verified token claims; carries only what authorization needs."""
+
+    def __init__(self, claims: dict):
+        self.Id = claims["uid"]
+        self.UserName = claims["sub"]
+        self.Role = models.UserRoleEnum(claims["role"])
+        self.TenantId = claims["tid"]
+        self.BusinessId = claims.get("bid")
+        self.TokenVersion = claims["tv"]
+
+def _token_version_key(user_id: int) -> str:
+    return f"tokenver:{user_id}"
+
+def current_token_version(db: Session, user_id: int) -> Optional[int]:
+    """The user's TokenVersion (None if deleted), from the cache or one indexed lookup on a miss."""
+    key = _token_version_key(user_id)
+    cached = cache_get(key)
+    if cached is not None:
+        return cached if cached >= 0 else None
+    row = db.query(models.User.TokenVersion).filter(models.User.Id == user_id, models.User.isDeleted == False).first()
+    version = row.TokenVersion if row else None
+    cache_set(key, version if version is not None else -1, TOKEN_VERSION_TTL_SECONDS)
+    return version
+
+def revoke_tokens(db_user):
+    """Invalidate the user's outstanding tokens; call before committing a role/tenant/password change or delete."""
+    db_user.TokenVersion = (db_user.TokenVersion or 1) + 1
+
+def publish_token_version(db_user):
+    """After commit: push the user's new TokenVersion into the cache so revocation applies immediately."""
+    cache_set(
+        _token_version_key(db_user.Id),
+        -1 if db_user.isDeleted else db_user.TokenVersion,
+        TOKEN_VERSION_TTL_SECONDS,
+    )
+
 def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.UserName == username, models.User.isDeleted == False).first()
+    # UserNameKey is the indexed, lower-cased UserName, so the lookup is case-insensitive on every database
+    return db.query(models.User).filter(
+        models.User.UserNameKey == username.lower(), models.User.isDeleted == False
+    ).first()
 
 def authenticate_user(db: Session, username: str, password: str):
     user = get_user_by_username(db, username)
@@ -39,12 +130,14 @@ def authenticate_user(db: Session, username: str, password: str):
         return None
     return user
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+def user_from_token(db: Session, token: Optional[str]):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if not token:
+        raise credentials_exception
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -52,12 +145,20 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user_by_username(db, username)
-    if user is None:
-        raise credentials_exception
+    if JWT_EMBED_CLAIMS and "uid" in payload:
+        try:
+            user = TokenUser(payload)
+        except (KeyError, ValueError):
+            raise credentials_exception
+        if current_token_version(db, user.Id) != user.TokenVersion:
+            raise credentials_exception
+    else:
+        user = get_user_by_username(db, username)
+        if user is None or ("tv" in payload and payload["tv"] != user.TokenVersion):
+            raise credentials_exception
+    # Inactive/expired tenants are rejected here from the precomputed entitlement cache
+    check_user(user)
     return user
 
-
-
-
-
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    return user_from_token(db, token)
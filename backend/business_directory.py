@@ -0,0 +1,113 @@
+"""
+Per-tenant business directory.
+
+Business metadata (name, email, phone, type, ...) is read far more often than
+it changes: dealer details on every order list page and status change, the
+business dropdowns on the bookings page and user creation form. The directory
+keeps every non-deleted business of a tenant in process memory, loaded with one
+query the first time the tenant is needed.
+
+Each tenant's entry is tagged with the tenant's `businesses` generation from
+backend.cache. `crud.business` bumps it after every create/update/delete, so the
+next lookup sees a newer generation and reloads; with CACHE_BACKEND=redis the
+generation is shared, so every worker picks up the change. With CACHE_BACKEND=none
+there are no generations to check, so nothing is kept and every lookup queries.
+
+Configuration:
+    BUSINESS_DIRECTORY_MAX_TENANTS  tenants kept in memory, least recently used evicted (default 1000)
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.models import Business
+from backend.cache import BUSINESSES, caching_enabled, generation, bump_generation
+from backend.logging_config import get_logger
+
+logger = get_logger("business_directory")
+
+BUSINESS_DIRECTORY_MAX_TENANTS = int(os.getenv("BUSINESS_DIRECTORY_MAX_TENANTS", "1000"))
+
+# Same fields as schemas.BusinessResponse
+BUSINESS_COLUMNS = (
+    Business.Id, Business.TenantId, Business.Type, Business.SubType, Business.Name, Business.Description,
+    Business.AddressLine1, Business.AddressLine2, Business.Email, Business.PhoneNumber, Business.Status,
+    Business.StartDateTime, Business.EndDateTime, Business.CreatedAt, Business.ModifiedAt,
+)
+
+class BusinessEntry:
+    """Read-only copy of a business row; usable wherever a Business is only read."""
+
+    __slots__ = tuple(column.key for column in BUSINESS_COLUMNS)
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, getattr(row, name))
+
+class BusinessDirectory:
+    def __init__(self, max_tenants: int = BUSINESS_DIRECTORY_MAX_TENANTS):
+        self.max_tenants = max_tenants
+        self._tenants: "OrderedDict[int, Tuple[int, Dict[int, BusinessEntry]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tenant(self, db: Session, tenant_id: int) -> Dict[int, BusinessEntry]:
+        """All non-deleted businesses of the tenant by Id, reloaded when the tenant's generation moved
+        (or on every call when the generation can't be read or caching is disabled)."""
+        try:
+            current = generation(BUSINESSES, tenant_id) if caching_enabled() else None
+        except Exception as e:
+            logger.error(f"Failed to read business directory generation for tenant {tenant_id}: {str(e)}")
+            current = None
+        with self._lock:
+            cached = self._tenants.get(tenant_id)
+            if cached is not None and current is not None and cached[0] == current:
+                self._tenants.move_to_end(tenant_id)
+                return cached[1]
+        businesses = {
+            row.Id: BusinessEntry(row)
+            for row in db.query(*BUSINESS_COLUMNS).filter(Business.TenantId == tenant_id, Business.isDeleted == False)
+        }
+        if current is not None:
+            with self._lock:
+                self._tenants[tenant_id] = (current, businesses)
+                self._tenants.move_to_end(tenant_id)
+                while len(self._tenants) > self.max_tenants:
+                    self._tenants.popitem(last=False)
+        return businesses
+
+    def get(self, db: Session, tenant_id: int, business_id: Optional[int]) -> Optional[BusinessEntry]:
+        if business_id is None:
+            return None
+        return self.tenant(db, tenant_id).get(business_id)
+
+    def lookup(self, db: Session, pairs: Iterable[Tuple[int, int]]) -> Dict[int, BusinessEntry]:
+        """Businesses by Id for (TenantId, BusinessId) pairs, e.g. the orders on a page."""
+        found = {}
+        for tenant_id, business_id in set(pairs):
+            entry = self.get(db, tenant_id, business_id)
+            if entry is not None:
+                found[business_id] = entry
+        return found
+
+    def list(self, db: Session, tenant_id: int, business_type: Optional[str] = None,
+             business_id: Optional[int] = None) -> List[BusinessEntry]:
+        """The tenant's businesses, newest first, optionally of one type or just one business."""
+        entries = [
+            entry for entry in self.tenant(db, tenant_id).values()
+            if (business_type is None or entry.Type == business_type)
+            and (business_id is None or entry.Id == business_id)
+        ]
+        return sorted(entries, key=lambda entry: entry.CreatedAt, reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._tenants.clear()
+
+business_directory = BusinessDirectory()
+
+def invalidate(tenant_id: int):
+    """Make every worker reload the tenant's businesses on next use. Call after the write commits."""
+    bump_generation(BUSINESSES, tenant_id)
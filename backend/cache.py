@@ -0,0 +1,220 @@
+"""
+Read-through cache with pluggable backends.
+
+Entries are keyed by namespace + tenant + a per-tenant generation counter, so
+invalidating everything cached for a tenant is a single counter bump; stale
+entries simply stop being addressed and age out via LRU/TTL.
+
+Configuration:
+    CACHE_BACKEND      memory (default), redis or none
+    CACHE_URL          redis URL when CACHE_BACKEND=redis (default redis://localhost:6379/0)
+    CACHE_TTL_SECONDS  default entry TTL (default 300)
+    CACHE_MAX_ENTRIES  in-process LRU capacity (default 10000)
+
+The memory backend is per process; use redis when running several workers.
+"""
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from backend.logging_config import get_logger
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = get_logger("cache")
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+
+CATALOG = "catalog"
+TENANT_OVERVIEW = "tenant_overview"
+BUSINESSES = "businesses"
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def get_counter(self, key: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+class NullCache(CacheBackend):
+    """Caching disabled: every read goes to the loader."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def get_counter(self, key):
+        return 0
+
+    def incr(self, key):
+        return 0
+
+class MemoryCache(CacheBackend):
+    """In-process LRU with per-entry TTL. Counters are kept apart so they are never evicted."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl: int = CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+class RedisCache(CacheBackend):
+    """Redis (or any Redis-compatible server) backend; values are stored as JSON."""
+
+    def __init__(self, url: str = CACHE_URL, ttl: int = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key):
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, json.dumps(value, default=str), ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def get_counter(self, key):
+        raw = self.client.get(key)
+        return int(raw) if raw is not None else 0
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+_backend: Optional[CacheBackend] = None
+_backend_lock = threading.Lock()
+
+def _create_backend() -> CacheBackend:
+    if CACHE_BACKEND == "none":
+        return NullCache()
+    if CACHE_BACKEND == "redis":
+        if redis is None:
+            logger.error("CACHE_BACKEND=redis but the redis package is not installed; using in-process cache")
+        else:
+            logger.info("Using redis cache backend")
+            return RedisCache()
+    return MemoryCache()
+
+def get_cache() -> CacheBackend:
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend
+
+def caching_enabled() -> bool:
+    """False with CACHE_BACKEND=none, where generations are not tracked (always 0)."""
+    return not isinstance(get_cache(), NullCache)
+
+def _generation_key(namespace: str, tenant_id) -> str:
+    return f"gen:{namespace}:{tenant_id}"
+
+def generation(namespace: str, tenant_id) -> int:
+    return get_cache().get_counter(_generation_key(namespace, tenant_id))
+
+def bump_generation(namespace: str, tenant_id):
+    """Invalidate everything cached under `namespace` for the tenant. Call after the write commits."""
+    try:
+        get_cache().incr(_generation_key(namespace, tenant_id))
+    except Exception as e:
+        logger.error(f"Failed to bump cache generation for {namespace}:{tenant_id}: {str(e)}")
+
+def versioned_key(namespace: str, tenant_id, *parts) -> Optional[str]:
+    """Cache key embedding the tenant's current generation, or None if the backend is unreachable."""
+    try:
+        current = generation(namespace, tenant_id)
+    except Exception as e:
+        logger.error(f"Failed to read cache generation for {namespace}:{tenant_id}: {str(e)}")
+        return None
+    return ":".join(str(part) for part in (namespace, tenant_id, current) + parts)
+
+def cache_get(key: Optional[str]) -> Optional[Any]:
+    """Cached value for `key`, or None on a miss. Backend errors are logged and treated as misses."""
+    if key is None:
+        return None
+    try:
+        return get_cache().get(key)
+    except Exception as e:
+        logger.error(f"Cache read failed for {key}: {str(e)}")
+        return None
+
+def cache_set(key: Optional[str], value: Any, ttl: Optional[int] = None):
+    if key is None or value is None:
+        return
+    try:
+        get_cache().set(key, value, ttl)
+    except Exception as e:
+        logger.error(f"Cache write failed for {key}: {str(e)}")
+
+def read_through(key: Optional[str], loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+    """Return the cached value for `key`, calling `loader` and caching its result on a miss.
+    Cache backend errors fall back to the loader so the cache can never take reads down."""
+    value = cache_get(key)
+    if value is None:
+        value = loader()
+        cache_set(key, value, ttl)
+    return value
@@ -0,0 +1,193 @@
+"""
+Negotiated response compression.
+
+Responses larger than COMPRESSION_MIN_SIZE are compressed with brotli (when the
+`brotli` package is installed and the client accepts it) or gzip. Small bodies
+are compressed in one go; streaming responses (exports, static files) are
+compressed chunk by chunk once the threshold is reached, so they are never
+buffered whole. Event streams, already encoded bodies and images are passed
+through untouched.
+
+A compressed body is not byte-identical to the identity one, so its ETag is
+made weak (W/"..."); backend.http_cache compares ETags weakly, so conditional
+requests keep matching. 304s to clients that accept compression get the same
+weak ETag and Vary header as the 200 they revalidate.
+
+Configuration:
+    COMPRESSION_MIN_SIZE    smallest body (bytes) worth compressing (default 1024)
+    COMPRESSION_GZIP_LEVEL  gzip level 1-9 (default 6)
+    COMPRESSION_BR_QUALITY  brotli quality 0-11 (default 4, tuned for dynamic responses)
+"""
+import gzip
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only without it
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BR_QUALITY = int(os.getenv("COMPRESSION_BR_QUALITY", "4"))
+
+# Content types that are already compressed or must not be buffered
+EXCLUDED_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, honouring q=0 exclusions."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BR_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        self.encoding = encoding
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION_BR_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL)
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.buffer = b""
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    def _skip(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            "content-encoding" in headers
+            or self.start_message["status"] in (204, 304)
+            or any(content_type.startswith(excluded) for excluded in EXCLUDED_CONTENT_TYPES)
+        )
+
+    def _mark_negotiated(self, headers: MutableHeaders):
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        vary = headers.get("vary")
+        if not vary:
+            headers["Vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["Vary"] = f"{vary}, Accept-Encoding"
+
+    def _mark_encoded(self, headers: MutableHeaders):
+        headers["Content-Encoding"] = self.encoding
+        self._mark_negotiated(headers)
+
+    async def send_with_compression(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Hold the start message until the first body chunk shows what we are dealing with
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            headers = Headers(raw=self.start_message["headers"])
+            if self._skip(headers):
+                self.passthrough = True
+                if self.start_message["status"] == 304:
+                    self._mark_negotiated(MutableHeaders(raw=self.start_message["headers"]))
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            # Bodies often arrive in several chunks (e.g. through BaseHTTPMiddleware), so
+            # buffer until we know whether the response is big enough to be worth compressing
+            self.buffer += body
+            if more_body and len(self.buffer) < self.minimum_size:
+                return
+            body, self.buffer = self.buffer, b""
+
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            self._mark_encoded(headers)
+            if not more_body:
+                compressed = compress_body(body, self.encoding)
+                headers["Content-Length"] = str(len(compressed))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+
+            # Streaming body: length is unknown up front
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            self.compressor = _Compressor(self.encoding)
+            await self.send(self.start_message)
+
+        chunk = self.compressor.compress(body)
+        if not more_body:
+            chunk += self.compressor.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -3,6 +3,7 @@ __all__ = [
     # Tenant functions
     'get_tenant',
     'get_tenants',
+    'get_tenant_overview',
     'create_tenant',
     'update_tenant',
     'delete_tenant',
@@ -18,6 +19,7 @@ __all__ = [
     'get_user',
     'get_users',
     'create_user',
+    'create_users',
     'update_user',
     'delete_user',
     'get_user_by_username',
@@ -49,13 +51,13 @@ __all__ = [
 def __getattr__(name):
     if name in __all__:
         if name.startswith(('get_tenant', 'create_tenant', 'update_tenant', 'delete_tenant')):
-            from .tenant import get_tenant, get_tenants, create_tenant, update_tenant, delete_tenant
+            from .tenant import get_tenant, get_tenants, get_tenant_overview, create_tenant, update_tenant, delete_tenant
             return locals()[name]
         elif name.startswith(('get_business', 'create_business', 'update_business', 'delete_business')):
             from .business import get_business, get_businesses, create_business, update_business, delete_business
             return locals()[name]
         elif name.startswith(('get_user', 'create_user', 'update_user', 'delete_user', 'get_available_businesses_for_user_creation')):
-            from .user import get_user, get_users, create_user, update_user, delete_user, get_user_by_username, get_available_businesses_for_user_creation
+            from .user import get_user, get_users, create_user, create_users, update_user, delete_user, get_user_by_username, get_available_businesses_for_user_creation
             return locals()[name]
         elif name.startswith(('get_product', 'create_product', 'update_product', 'delete_product')):
             from .product import get_product, get_products, create_product, update_product, delete_product
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from typing import List, Optional
+from typing import List, Optional, Sequence
 from .. import models, schemas
+from ..business_directory import invalidate
 
 def get_business(db: Session, business_id: int) -> Optional[models.Business]:
     return db.query(models.Business).filter(models.Business.Id == business_id, models.Business.isDeleted == False).first()
@@ -11,11 +12,14 @@ def get_businesses(
     tenant_id: int, 
     business_type: Optional[str] = None,
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    scope: Sequence = ()
 ) -> List[models.Business]:
+    """`scope` takes extra filter clauses, e.g. policy.scope_clauses for the requesting user."""
     query = db.query(models.Business).filter(
         models.Business.TenantId == tenant_id,
-        models.Business.isDeleted == False
+        models.Business.isDeleted == False,
+        *scope
     )
     
     if business_type:
@@ -32,16 +36,21 @@ def create_business(db: Session, business: schemas.BusinessCreate, user_id: int)
     db.add(db_business)
     db.commit()
     db.refresh(db_business)
+    invalidate(db_business.TenantId)
     return db_business
 
 def update_business(db: Session, business_id: int, business: schemas.BusinessCreate, user_id: int) -> Optional[models.Business]:
     db_business = get_business(db, business_id)
     if db_business:
+        tenant_id = db_business.TenantId
         for key, value in business.model_dump().items():
             setattr(db_business, key, value)
         db_business.ModifiedBy = user_id
         db.commit()
         db.refresh(db_business)
+        invalidate(tenant_id)
+        if db_business.TenantId != tenant_id:
+            invalidate(db_business.TenantId)
     return db_business
 
 def delete_business(db: Session, business_id: int, user_id: int) -> Optional[models.Business]:
@@ -51,4 +60,5 @@ def delete_business(db: Session, business_id: int, user_id: int) -> Optional[mod
         db_business.ModifiedBy = user_id
         db.commit()
         db.refresh(db_business)
+        invalidate(db_business.TenantId)
     return db_business 
\ No newline at end of file
@@ -1,7 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select, and_, true
 from typing import List, Optional
 from .. import models, schemas
+from ..order_workflow import OPEN_STATUSES
+from ..serialization import plain
 
 # Tenant CRUD operations
 def get_tenant(db: Session, tenant_id: int) -> Optional[models.Tenant]:
@@ -49,3 +51,64 @@ def delete_tenant(db: Session, tenant_id: int, user_id: int) -> Optional[models.
         db.commit()
         db.refresh(db_tenant)
     return db_tenant
+
+def get_tenant_overview(db: Session, tenant_id: int) -> Optional[dict]:
+    """
+    Tenant with its wholesaler, dealers and per-business counts, in one query:
+    the tenant row outer-joined to its businesses and to grouped user and open
+    order counts, plus a one-row subquery of tenant-wide totals. Products belong
+    to the tenant, so product count and stock value (Quantity * MRP) are reported
+    on the wholesaler. Returns plain JSON values so the result can be cached.
+    """
+    User, Order, Product, Business, Tenant = models.User, models.Order, models.Product, models.Business, models.Tenant
+    users = select(User.BusinessId, func.count(User.Id).label("UserCount")).where(
+        User.TenantId == tenant_id, User.isDeleted == False
+    ).group_by(User.BusinessId).subquery()
+    open_orders = select(Order.BusinessId, func.count(Order.Id).label("OpenOrderCount")).where(
+        Order.TenantId == tenant_id, Order.isDeleted == False, Order.OrderStatus.in_(OPEN_STATUSES)
+    ).group_by(Order.BusinessId).subquery()
+    totals = select(
+        func.count(Product.Id).label("ProductCount"),
+        func.coalesce(func.sum(Product.Quantity * Product.MRP), 0).label("StockValue"),
+        select(func.count(User.Id)).where(
+            User.TenantId == tenant_id, User.isDeleted == False
+        ).scalar_subquery().label("UserCount"),
+    ).where(Product.TenantId == tenant_id, Product.isDeleted == False).subquery()
+
+    rows = db.execute(
+        select(Tenant, Business, users.c.UserCount.label("BusinessUserCount"), open_orders.c.OpenOrderCount, totals)
+        .select_from(Tenant)
+        .outerjoin(Business, and_(Business.TenantId == Tenant.TenantId, Business.isDeleted == False))
+        .outerjoin(users, users.c.BusinessId == Business.Id)
+        .outerjoin(open_orders, open_orders.c.BusinessId == Business.Id)
+        .join(totals, true())
+        .where(Tenant.TenantId == tenant_id, Tenant.isDeleted == False)
+        .order_by(desc(Business.CreatedAt))
+    ).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    overview = {column: plain(getattr(first.Tenant, column)) for column in schemas.TenantResponse.model_fields}
+    overview.update({
+        "UserCount": first.UserCount,
+        "ProductCount": first.ProductCount,
+        "OpenOrderCount": 0,
+        "StockValue": float(first.StockValue),
+        "wholesaler": None,
+        "dealers": [],
+    })
+    for row in rows:
+        if row.Business is None:
+            continue
+        business = {column: plain(getattr(row.Business, column)) for column in schemas.BusinessResponse.model_fields}
+        business["UserCount"] = row.BusinessUserCount or 0
+        business["OpenOrderCount"] = row.OpenOrderCount or 0
+        overview["OpenOrderCount"] += business["OpenOrderCount"]
+        if row.Business.Type == "WHOLESALER" and overview["wholesaler"] is None:
+            business["ProductCount"] = overview["ProductCount"]
+            business["StockValue"] = overview["StockValue"]
+            overview["wholesaler"] = business
+        elif row.Business.Type == "DEALER":
+            overview["dealers"].append(business)
+    return overview
@@ -1,10 +1,38 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_
-from typing import List, Optional
-from backend import models, schemas
-from backend.auth import get_password_hash
+import re
+from datetime import datetime
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import desc, and_, or_, insert
+from sqlalchemy.dialects.mysql import match
+from typing import Dict, List, Optional
+from backend import models, schemas, policy
+from backend.auth import get_password_hash, revoke_tokens, publish_token_version
+from backend.business_directory import business_directory
 
 
+# Shortest term the MySQL ngram FULLTEXT parser indexes (ngram_token_size)
+NGRAM_TOKEN_SIZE = 2
+
+def search_clause(db: Session, search: str):
+    """
+    Index-backed match of `search` against a user's name, username or email.
+    On MySQL every word long enough for the ngram FULLTEXT index over SearchText
+    must appear in it; a term with no such word falls back to prefix range scans
+    on the lower-cased username/email keys, which is also what other databases
+    (dev/sqlite) use, plus a substring match on SearchText.
+    """
+    term = search.strip().lower()
+    words = [w for w in re.findall(r"\w+", term) if len(w) >= NGRAM_TOKEN_SIZE]
+    if db.get_bind().dialect.name == "mysql" and words:
+        against = " ".join(f'+"{w}"' for w in words)
+        return match(models.User.SearchText, against=against).in_boolean_mode()
+    prefix = or_(
+        models.User.UserNameKey.startswith(term, autoescape=True),
+        models.User.EmailKey.startswith(term, autoescape=True),
+    )
+    if db.get_bind().dialect.name == "mysql":
+        return prefix
+    return or_(prefix, models.User.SearchText.contains(term, autoescape=True))
+
 def get_users(
     db: Session, 
     tenant_id: int, 
@@ -26,29 +54,27 @@ def get_users(
     )
     
     # Apply role-based filtering
-    if current_user_role in ["DealerAdmin", "Dealer"]:
+    if current_user_role in policy.DEALER_ROLES:
         # Only see Dealer users
-        query = query.join(models.Business).filter(models.Business.Type == "DEALER")
-    elif current_user_role in ["WholesalerAdmin", "Wholesaler"]:
+        query = query.join(models.User.business).filter(models.Business.Type == "DEALER")
+    elif current_user_role in policy.WHOLESALER_ROLES:
         # See Wholesaler and Dealer users
-        query = query.join(models.Business).filter(
+        query = query.join(models.User.business).filter(
             or_(
                 models.Business.Type == "WHOLESALER",
                 models.Business.Type == "DEALER"
             )
         )
-    # SuperAdmin, TechAdmin, SalesAdmin see all users (no additional filtering)
+    else:
+        # SuperAdmin, TechAdmin, SalesAdmin see all users, including those without a business
+        query = query.outerjoin(models.User.business)
+    
+    # Populate user.business from the join so listing never lazy-loads it per row
+    query = query.options(contains_eager(models.User.business))
     
     # Apply search filter
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                models.User.Name.ilike(search_term),
-                models.User.UserName.ilike(search_term),
-                models.User.Email.ilike(search_term)
-            )
-        )
+    if search and search.strip():
+        query = query.filter(search_clause(db, search))
     
     return query.order_by(desc(models.User.CreatedAt)).offset(skip).limit(limit).all()
 
@@ -89,6 +115,41 @@ def create_user(db: Session, user: schemas.UserCreate, created_by: int) -> model
     return db_user
 
 
+def create_users(db: Session, users: List[schemas.UserCreate], password_hashes: List[str], created_by: int) -> Dict[str, int]:
+    """
+    Insert many users with one multi-row INSERT in a single transaction; passwords
+    are already hashed (see auth.hash_passwords). Returns the new Ids by UserName.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            **user.model_dump(exclude={"Password"}),
+            **models.user_lookup_values(user.UserName, user.Email, user.Name),
+            "PasswordHash": password_hash,
+            "UserStatus": models.UserStatusEnum.Active,
+            "TokenVersion": 1,
+            "isDeleted": False,
+            "CreatedBy": created_by,
+            "ModifiedBy": created_by,
+            "CreatedAt": now,
+            "ModifiedAt": now,
+        }
+        for user, password_hash in zip(users, password_hashes)
+    ]
+    try:
+        db.execute(insert(models.User), rows)
+        ids = dict(db.query(models.User.UserName, models.User.Id).filter(
+            models.User.UserName.in_([row["UserName"] for row in rows])
+        ).all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return ids
+
+# User columns whose change invalidates issued tokens
+TOKEN_FIELDS = ("Role", "TenantId", "BusinessId", "PasswordHash", "UserStatus")
+
 def update_user(db: Session, user_id: int, user: schemas.UserUpdate, modified_by: int) -> Optional[models.User]:
     """Update an existing user"""
     db_user = db.query(models.User).filter(
@@ -107,12 +168,22 @@ def update_user(db: Session, user_id: int, user: schemas.UserUpdate, modified_by
         update_data["PasswordHash"] = get_password_hash(update_data["Password"])
         del update_data["Password"]
     
+    # Changes to what a token grants (or the password) revoke the user's existing tokens
+    revoke = any(
+        key in update_data and update_data[key] != getattr(db_user, key)
+        for key in TOKEN_FIELDS
+    )
+    
     for key, value in update_data.items():
         setattr(db_user, key, value)
     
+    if revoke:
+        revoke_tokens(db_user)
     db_user.ModifiedBy = modified_by
     db.commit()
     db.refresh(db_user)
+    if revoke:
+        publish_token_version(db_user)
     return db_user
 
 
@@ -127,16 +198,18 @@ def delete_user(db: Session, user_id: int, modified_by: int) -> Optional[models.
         return None
     
     db_user.isDeleted = True
+    revoke_tokens(db_user)
     db_user.ModifiedBy = modified_by
     db.commit()
     db.refresh(db_user)
+    publish_token_version(db_user)
     return db_user
 
 
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
-    """Get user by username (for authentication)"""
+    """Get user by username (for authentication), case-insensitively via the indexed UserNameKey"""
     return db.query(models.User).filter(
-        models.User.UserName == username,
+        models.User.UserNameKey == username.lower(),
         models.User.isDeleted == False
     ).first()
 
@@ -146,35 +219,25 @@ def get_available_businesses_for_user_creation(
     tenant_id: int, 
     current_user_role: str,
     current_user_business_id: Optional[int] = None
-) -> List[models.Business]:
+) -> List:
     """
     Get businesses that can be selected when creating users based on current user's role
     """
-    # Start with base query filtering out deleted businesses
-    query = db.query(models.Business).filter(
-        models.Business.isDeleted == False
-    )
+    if current_user_role in policy.PLATFORM_ROLES:
+        # Admin roles can select any business from any tenant (no tenant or type filtering)
+        return db.query(models.Business).filter(
+            models.Business.isDeleted == False
+        ).order_by(models.Business.Name).all()
     
-    # Apply tenant filtering based on role
-    if current_user_role in ["SuperAdmin", "TechAdmin", "SalesAdmin"]:
-        # Admin roles can see businesses from all tenants (no tenant filtering)
-        pass
-    else:
-        # Other roles are restricted to their own tenant
-        query = query.filter(models.Business.TenantId == tenant_id)
+    # Other roles are restricted to their own tenant, served from the business directory
+    businesses = business_directory.tenant(db, tenant_id).values()
     
     # Apply role-specific business filtering
-    if current_user_role in ["DealerAdmin", "Dealer"]:
+    if current_user_role in policy.DEALER_ROLES:
         # Can only create users for their own business
-        query = query.filter(models.Business.Id == current_user_business_id)
-    elif current_user_role in ["WholesalerAdmin", "Wholesaler"]:
+        businesses = [b for b in businesses if b.Id == current_user_business_id]
+    elif current_user_role in policy.WHOLESALER_ROLES:
         # Can create users for Wholesaler and Dealer businesses
-        query = query.filter(
-            or_(
-                models.Business.Type == "WHOLESALER",
-                models.Business.Type == "DEALER"
-            )
-        )
-    # SuperAdmin, TechAdmin, SalesAdmin can select any business (no type filtering)
+        businesses = [b for b in businesses if b.Type in ("WHOLESALER", "DEALER")]
     
-    return query.order_by(models.Business.Name).all()
+    return sorted(businesses, key=lambda b: b.Name)
@@ -0,0 +1,284 @@
+"""
+Bulk dealer import.
+
+Sets up a tenant's dealer network from a CSV file instead of one
+`POST /api/v1/businesses/` per dealer or hand-written data migrations. One row
+per dealer:
+
+    Name, Email                      required; Email identifies the dealer within the tenant
+    PhoneNumber, Description, AddressLine1, AddressLine2, SubType, Status
+                                     optional business fields
+    AdminUserName, AdminPassword     optional: also create a DealerAdmin user for the dealer
+    AdminName, AdminEmail            (name and email default to the dealer's)
+
+Dealers whose email already exists in the tenant (or appears earlier in the
+file) are skipped, so re-running an import is safe. Existing dealers are found
+with one query, admin usernames/emails are checked with one more, and the new
+businesses and users are written with chunked multi-row INSERTs inside a single
+transaction: either the whole file is imported or nothing is.
+
+Available as `POST /api/v1/businesses/import` and from the command line:
+
+    python -m backend.dealer_import <tenant_id> dealers.csv [--created-by ID] [--no-admins] [--dry-run]
+
+Configuration:
+    DEALER_IMPORT_CHUNK_SIZE  rows per INSERT statement (default 500)
+    DEALER_IMPORT_MAX_ROWS    largest file accepted by the API (default 5000)
+"""
+import csv
+import io
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, or_
+from sqlalchemy.orm import Session
+
+from backend import schemas
+from backend.models import Business, BusinessTypeEnum, User, UserRoleEnum, UserStatusEnum, user_lookup_values
+from backend.auth import hash_passwords
+from backend.business_directory import invalidate
+from backend.cache import TENANT_OVERVIEW, bump_generation
+from backend.entitlements import check_limit
+from backend.runtime_config import LIMIT_MAX_USERS
+from backend.logging_config import get_logger
+
+logger = get_logger("dealer_import")
+
+DEALER_IMPORT_CHUNK_SIZE = int(os.getenv("DEALER_IMPORT_CHUNK_SIZE", "500"))
+DEALER_IMPORT_MAX_ROWS = int(os.getenv("DEALER_IMPORT_MAX_ROWS", "5000"))
+
+BUSINESS_FIELDS = ("Name", "Email", "PhoneNumber", "Description", "AddressLine1", "AddressLine2", "SubType", "Status")
+ADMIN_FIELDS = ("AdminUserName", "AdminPassword", "AdminName", "AdminEmail")
+
+class ImportRow:
+    def __init__(self, line: int, values: Dict[str, str]):
+        self.line = line
+        self.values = values
+        self.business: Optional[schemas.BusinessCreate] = None
+        self.admin: Optional[schemas.UserCreate] = None
+        self.status = "created"
+        self.detail: Optional[str] = None
+        self.business_id: Optional[int] = None
+        self.admin_user_id: Optional[int] = None
+
+    def has_admin(self) -> bool:
+        return any(self.values.get(field) for field in ADMIN_FIELDS)
+
+    def reject(self, status: str, detail: str):
+        self.status = status
+        self.detail = detail
+
+    def result(self) -> schemas.DealerImportResult:
+        return schemas.DealerImportResult(
+            Line=self.line,
+            Name=self.values.get("Name") or "",
+            Email=self.values.get("Email"),
+            Status=self.status,
+            BusinessId=self.business_id,
+            AdminUserId=self.admin_user_id,
+            Detail=self.detail,
+        )
+
+def _error_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors())
+
+def read_csv(text: str) -> List[ImportRow]:
+    """Parse the CSV into rows; blank cells are treated as missing."""
+    reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+    if not reader.fieldnames or "Name" not in reader.fieldnames or "Email" not in reader.fieldnames:
+        raise ValueError("CSV must have a header row with at least Name and Email columns")
+    rows = []
+    for line, record in enumerate(reader, start=2):
+        values = {key.strip(): (value or "").strip() for key, value in record.items() if key}
+        rows.append(ImportRow(line, {key: value for key, value in values.items() if value}))
+    return rows
+
+def _validate(rows: List[ImportRow], tenant_id: int, create_admins: bool):
+    for row in rows:
+        values = row.values
+        if not values.get("Email"):
+            row.reject("rejected", "Email is required")
+            continue
+        try:
+            row.business = schemas.BusinessCreate(
+                TenantId=tenant_id,
+                Type=BusinessTypeEnum.DEALER.value,
+                **{field: values[field] for field in BUSINESS_FIELDS if field in values},
+            )
+        except ValidationError as e:
+            row.reject("rejected", _error_message(e))
+            continue
+        if create_admins and values.get("AdminUserName"):
+            if not values.get("AdminPassword"):
+                row.reject("rejected", "AdminPassword is required with AdminUserName")
+                continue
+            try:
+                row.admin = schemas.UserCreate(
+                    TenantId=tenant_id,
+                    Role=UserRoleEnum.DealerAdmin.value,
+                    UserName=values["AdminUserName"],
+                    Password=values["AdminPassword"],
+                    Name=values.get("AdminName") or row.business.Name,
+                    Email=values.get("AdminEmail") or row.business.Email,
+                    PhoneNumber=row.business.PhoneNumber,
+                )
+            except ValidationError as e:
+                row.reject("rejected", _error_message(e))
+
+def _dedupe(db: Session, rows: List[ImportRow], tenant_id: int):
+    """Skip dealers already in the tenant or repeated in the file; reject taken admin logins."""
+    pending = [row for row in rows if row.status == "created"]
+    emails = {row.business.Email.lower() for row in pending}
+    existing = {}
+    if emails:
+        existing = {
+            email.lower(): business_id
+            for business_id, email in db.query(Business.Id, Business.Email).filter(
+                Business.TenantId == tenant_id,
+                Business.isDeleted == False,
+                func.lower(Business.Email).in_(emails),
+            )
+        }
+    seen = set()
+    for row in pending:
+        email = row.business.Email.lower()
+        if email in existing:
+            row.reject("skipped", "A business with this email already exists")
+            row.business_id = existing[email]
+        elif email in seen:
+            row.reject("skipped", "Duplicate email in file")
+        else:
+            seen.add(email)
+
+    admins = [row for row in rows if row.status == "created" and row.admin]
+    if not admins:
+        return
+    # Usernames and emails are unique across all users, deleted ones included
+    usernames = {row.admin.UserName.lower() for row in admins}
+    admin_emails = {row.admin.Email.lower() for row in admins}
+    taken_usernames, taken_emails = set(), set()
+    for username_key, email_key in db.query(User.UserNameKey, User.EmailKey).filter(
+        or_(User.UserNameKey.in_(usernames), User.EmailKey.in_(admin_emails))
+    ):
+        taken_usernames.add(username_key)
+        taken_emails.add(email_key)
+    seen_usernames, seen_emails = set(), set()
+    for row in admins:
+        username_key, email_key = row.admin.UserName.lower(), row.admin.Email.lower()
+        if username_key in taken_usernames or username_key in seen_usernames:
+            row.reject("rejected", "Admin username already exists")
+        elif email_key in taken_emails or email_key in seen_emails:
+            row.reject("rejected", "Admin email already exists")
+        else:
+            seen_usernames.add(username_key)
+            seen_emails.add(email_key)
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def import_dealers(
+    db: Session,
+    tenant_id: int,
+    rows: List[ImportRow],
+    created_by: Optional[int] = None,
+    create_admins: bool = True,
+    dry_run: bool = False,
+    chunk_size: int = DEALER_IMPORT_CHUNK_SIZE,
+) -> schemas.DealerImportResponse:
+    """Import parsed rows into the tenant; returns one result per row."""
+    _validate(rows, tenant_id, create_admins)
+    _dedupe(db, rows, tenant_id)
+    to_create = [row for row in rows if row.status == "created"]
+    admins = [row for row in to_create if row.admin]
+
+    if to_create and not dry_run:
+        check_limit(db, tenant_id, LIMIT_MAX_USERS, adding=len(admins))
+        now = datetime.utcnow()
+        audit = {"isDeleted": False, "CreatedBy": created_by, "ModifiedBy": created_by, "CreatedAt": now, "ModifiedAt": now}
+        try:
+            for chunk in _chunks(to_create, chunk_size):
+                db.execute(insert(Business), [{**row.business.model_dump(), **audit} for row in chunk])
+            # Emails are unique per tenant among live businesses, so they map the new rows back to their Ids
+            ids = {}
+            for chunk in _chunks([row.business.Email.lower() for row in to_create], chunk_size):
+                ids.update(
+                    (email.lower(), business_id)
+                    for business_id, email in db.query(Business.Id, Business.Email).filter(
+                        Business.TenantId == tenant_id,
+                        Business.isDeleted == False,
+                        func.lower(Business.Email).in_(chunk),
+                    )
+                )
+            for row in to_create:
+                row.business_id = ids.get(row.business.Email.lower())
+
+            if admins:
+                password_hashes = hash_passwords([row.admin.Password for row in admins])
+                for chunk in _chunks(list(zip(admins, password_hashes)), chunk_size):
+                    db.execute(insert(User), [
+                        {
+                            **row.admin.model_dump(exclude={"Password", "BusinessId"}),
+                            **user_lookup_values(row.admin.UserName, row.admin.Email, row.admin.Name),
+                            **audit,
+                            "BusinessId": row.business_id,
+                            "PasswordHash": password_hash,
+                            "UserStatus": UserStatusEnum.Active,
+                            "TokenVersion": 1,
+                        }
+                        for row, password_hash in chunk
+                    ])
+                user_ids = {}
+                for chunk in _chunks([row.admin.UserName.lower() for row in admins], chunk_size):
+                    user_ids.update(db.query(User.UserNameKey, User.Id).filter(User.UserNameKey.in_(chunk)).all())
+                for row in admins:
+                    row.admin_user_id = user_ids.get(row.admin.UserName.lower())
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        invalidate(tenant_id)
+        bump_generation(TENANT_OVERVIEW, tenant_id)
+        logger.info(f"Imported {len(to_create)} dealers and {len(admins)} admin users into tenant {tenant_id}")
+
+    results = [row.result() for row in rows]
+    return schemas.DealerImportResponse(
+        Created=sum(1 for r in results if r.Status == "created"),
+        Skipped=sum(1 for r in results if r.Status == "skipped"),
+        Rejected=sum(1 for r in results if r.Status == "rejected"),
+        DryRun=dry_run,
+        Results=results,
+    )
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Import a tenant's dealers (and optional admin users) from CSV")
+    parser.add_argument("tenant_id", type=int)
+    parser.add_argument("csv_file")
+    parser.add_argument("--created-by", type=int, default=None, help="User Id recorded as CreatedBy")
+    parser.add_argument("--no-admins", action="store_true", help="Ignore the Admin* columns")
+    parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing")
+    parser.add_argument("--chunk-size", type=int, default=DEALER_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with open(args.csv_file, encoding="utf-8") as f:
+        csv_rows = read_csv(f.read())
+    db = SessionLocal()
+    try:
+        report = import_dealers(
+            db, args.tenant_id, csv_rows, args.created_by,
+            create_admins=not args.no_admins, dry_run=args.dry_run, chunk_size=args.chunk_size,
+        )
+    finally:
+        db.close()
+    for result in report.Results:
+        if result.Status != "created":
+            print(f"line {result.Line}: {result.Status}: {result.Detail}", file=sys.stderr)
+    print(f"{'Would create' if report.DryRun else 'Created'} {report.Created} dealers, "
+          f"skipped {report.Skipped}, rejected {report.Rejected}")
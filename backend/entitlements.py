@@ -0,0 +1,190 @@
+"""
+Tenant entitlements.
+
+Whether a tenant may use the system, and its plan limits, are precomputed for
+all tenants into an in-process map (two queries: tenants and their
+subscriptions) refreshed every ENTITLEMENTS_REFRESH_SECONDS. `check_user` runs
+inside authentication, so gating costs one dict lookup per request.
+
+A tenant is entitled when it is not deleted, its TenantStatus is Active, now is
+within TenantStartDateTime/TenantEndDateTime and, if it has any `subscriptions`
+rows (Type="Tenant", RefId=<TenantId>), an Active subscription covers now.
+Back-to-back subscriptions are merged, so `valid_until` is the end of the
+continuous coverage and an expiry between refreshes is still caught.
+
+Plan limits come from runtime configuration (limits.max_users,
+limits.max_skus, limits.max_orders_per_month; per tenant or global, unset means
+unlimited) and are enforced on create with `check_limit`.
+
+Platform roles (SuperAdmin, TechAdmin, SalesAdmin) are never gated.
+
+Configuration:
+    ENTITLEMENTS_REFRESH_SECONDS  refresh interval (default 60)
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.models import Tenant, Subscription, User, Product, Order, UserRoleEnum
+from backend.runtime_config import (
+    PeriodicRefresh, setting, LIMIT_MAX_USERS, LIMIT_MAX_SKUS, LIMIT_MAX_ORDERS_PER_MONTH
+)
+from backend.logging_config import get_logger
+
+logger = get_logger("entitlements")
+
+ENTITLEMENTS_REFRESH_SECONDS = float(os.getenv("ENTITLEMENTS_REFRESH_SECONDS", "60"))
+
+EXEMPT_ROLES = {UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin, UserRoleEnum.SalesAdmin}
+LIMIT_KEYS = (LIMIT_MAX_USERS, LIMIT_MAX_SKUS, LIMIT_MAX_ORDERS_PER_MONTH)
+
+class TenantEntitlement:
+    def __init__(self, tenant_id: int, active: bool, reason: Optional[str] = None,
+                 valid_until: Optional[datetime] = None, limits: Optional[Dict[str, Optional[int]]] = None):
+        self.tenant_id = tenant_id
+        self.active = active
+        self.reason = reason
+        self.valid_until = valid_until
+        self.limits = limits or {}
+
+    def allowed(self, now: datetime) -> bool:
+        return self.active and not (self.valid_until and now >= self.valid_until)
+
+def _limits(tenant_id: int) -> Dict[str, Optional[int]]:
+    limits = {}
+    for key in LIMIT_KEYS:
+        value = setting(key, tenant_id)
+        limits[key] = int(value) if value is not None else None
+    return limits
+
+def _coverage_end(subscriptions, now: datetime) -> Optional[datetime]:
+    """End of the continuous run of subscriptions covering `now`, or None if none covers it."""
+    end = None
+    for start_at, end_at in sorted(subscriptions):
+        cursor = end or now
+        if start_at <= cursor < end_at:
+            end = end_at
+    return end
+
+def evaluate(tenant, subscriptions, now: datetime) -> TenantEntitlement:
+    limits = _limits(tenant.TenantId)
+    if tenant.isDeleted or (tenant.TenantStatus or "").lower() != "active":
+        return TenantEntitlement(tenant.TenantId, False, f"Tenant is {tenant.TenantStatus or 'inactive'}", limits=limits)
+    if tenant.TenantStartDateTime and now < tenant.TenantStartDateTime:
+        return TenantEntitlement(tenant.TenantId, False, "Tenant has not started yet", limits=limits)
+    valid_until = tenant.TenantEndDateTime
+    if subscriptions:
+        covered_until = _coverage_end(subscriptions, now)
+        if covered_until is None:
+            return TenantEntitlement(tenant.TenantId, False, "No active subscription", limits=limits)
+        valid_until = min(valid_until, covered_until) if valid_until else covered_until
+    if valid_until and now >= valid_until:
+        return TenantEntitlement(tenant.TenantId, False, "Tenant subscription has expired", limits=limits)
+    return TenantEntitlement(tenant.TenantId, True, valid_until=valid_until, limits=limits)
+
+class EntitlementCache(PeriodicRefresh):
+    name = "entitlements"
+
+    def __init__(self):
+        super().__init__()
+        self._entitlements: Dict[int, TenantEntitlement] = {}
+
+    def refresh(self, db: Session) -> bool:
+        now = datetime.utcnow()
+        tenants = db.query(
+            Tenant.TenantId, Tenant.TenantStatus, Tenant.TenantStartDateTime, Tenant.TenantEndDateTime, Tenant.isDeleted
+        ).all()
+        subscriptions = defaultdict(list)
+        for ref_id, subscription_status, start_at, end_at in db.query(
+            Subscription.RefId, Subscription.Status, Subscription.StartDateTime, Subscription.EndDateTime
+        ).filter(Subscription.Type == "Tenant", Subscription.isDeleted == False):
+            # Keep an entry even for tenants whose subscriptions are all inactive: they are still gated
+            active = subscriptions[ref_id]
+            if subscription_status == "Active":
+                active.append((start_at, end_at))
+        entitlements = {}
+        for tenant in tenants:
+            ref_id = str(tenant.TenantId)
+            if ref_id in subscriptions and not subscriptions[ref_id]:
+                entitlements[tenant.TenantId] = TenantEntitlement(
+                    tenant.TenantId, False, "No active subscription", limits=_limits(tenant.TenantId)
+                )
+            else:
+                entitlements[tenant.TenantId] = evaluate(tenant, subscriptions.get(ref_id, []), now)
+        self._entitlements = entitlements
+        return True
+
+    def refresh_tenant(self, db: Session, tenant_id: int):
+        """Re-evaluate one tenant right away, e.g. after an admin changed its status or dates."""
+        tenant = db.query(
+            Tenant.TenantId, Tenant.TenantStatus, Tenant.TenantStartDateTime, Tenant.TenantEndDateTime, Tenant.isDeleted
+        ).filter(Tenant.TenantId == tenant_id).first()
+        entitlements = dict(self._entitlements)
+        if tenant is None:
+            entitlements.pop(tenant_id, None)
+        else:
+            rows = db.query(Subscription.Status, Subscription.StartDateTime, Subscription.EndDateTime).filter(
+                Subscription.Type == "Tenant", Subscription.RefId == str(tenant_id), Subscription.isDeleted == False
+            ).all()
+            active = [(row.StartDateTime, row.EndDateTime) for row in rows if row.Status == "Active"]
+            if rows and not active:
+                entitlements[tenant_id] = TenantEntitlement(
+                    tenant_id, False, "No active subscription", limits=_limits(tenant_id)
+                )
+            else:
+                entitlements[tenant_id] = evaluate(tenant, active, datetime.utcnow())
+        self._entitlements = entitlements
+
+    def get(self, tenant_id: int) -> TenantEntitlement:
+        entitlement = self._entitlements.get(tenant_id)
+        if entitlement is None:
+            # Created since the last refresh: allow until the next refresh evaluates it
+            entitlement = TenantEntitlement(tenant_id, True, limits=_limits(tenant_id))
+        return entitlement
+
+    def start(self, interval: float = ENTITLEMENTS_REFRESH_SECONDS):
+        super().start(interval)
+
+entitlement_cache = EntitlementCache()
+
+def check_user(user):
+    """Reject requests from users of tenants that are inactive or expired (platform roles exempt)."""
+    if user.Role in EXEMPT_ROLES:
+        return
+    entitlement = entitlement_cache.get(user.TenantId)
+    if not entitlement.allowed(datetime.utcnow()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=entitlement.reason or "Tenant subscription has expired",
+        )
+
+def _month_start(now: datetime) -> datetime:
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def check_limit(db: Session, tenant_id: int, key: str, adding: int = 1):
+    """Raise 403 if creating `adding` more users/products/orders would exceed the tenant's plan limit."""
+    limit = entitlement_cache.get(tenant_id).limits.get(key)
+    if limit is None:
+        return
+    if key == LIMIT_MAX_USERS:
+        current = db.query(func.count(User.Id)).filter(User.TenantId == tenant_id, User.isDeleted == False).scalar()
+        label = "users"
+    elif key == LIMIT_MAX_SKUS:
+        current = db.query(func.count(Product.Id)).filter(Product.TenantId == tenant_id, Product.isDeleted == False).scalar()
+        label = "products"
+    else:
+        # Deleted orders still count: the limit is on orders placed this month
+        current = db.query(func.count(Order.Id)).filter(
+            Order.TenantId == tenant_id, Order.CreatedAt >= _month_start(datetime.utcnow())
+        ).scalar()
+        label = "orders this month"
+    if current + adding > limit:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Plan limit reached: at most {limit} {label}",
+        )
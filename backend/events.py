@@ -0,0 +1,137 @@
+"""
+Live order events over server-sent events.
+
+Committed order events (the same ones written to the outbox, see backend.outbox)
+are fanned out in-process to every open `/api/v1/orders/events` stream whose
+scope matches: the order's tenant, and for dealer roles also its business. Each
+subscriber has a bounded queue; a client that falls behind has its backlog
+dropped and receives a single `resync` event telling it to refetch.
+
+Events are published from a SQLAlchemy after_commit hook, so rolled back writes
+are never pushed. Request handlers run in the threadpool, so delivery onto each
+subscriber's event loop goes through `call_soon_threadsafe`.
+
+The broker is per process: with several API workers each one only sees the
+writes it handled, so run a single worker (the default) when relying on streams.
+
+Configuration:
+    SSE_QUEUE_SIZE          events buffered per client before it is told to resync (default 100)
+    SSE_HEARTBEAT_SECONDS   keep-alive comment interval (default 15)
+"""
+import asyncio
+import os
+import threading
+from typing import AsyncIterator, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend import outbox
+from backend.logging_config import get_logger
+from backend.serialization import dumps
+
+logger = get_logger("events")
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+# Outbox event types pushed to live streams
+STREAMED_EVENTS = {outbox.ORDER_CREATED, outbox.ORDER_STATUS_CHANGED}
+RESYNC = {"type": "resync"}
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, tenant_id: int, business_id: Optional[int] = None,
+                 queue_size: int = SSE_QUEUE_SIZE):
+        self.loop = loop
+        self.tenant_id = tenant_id
+        self.business_id = business_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def wants(self, tenant_id: int, business_id: Optional[int]) -> bool:
+        if tenant_id != self.tenant_id:
+            return False
+        return self.business_id is None or business_id == self.business_id
+
+    def offer(self, message: dict):
+        """Queue a message; runs on the subscriber's loop."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too slow to keep up: replace the backlog with a single resync
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, tenant_id: int, business_id: Optional[int] = None) -> Subscriber:
+        """Register a subscriber; must be called from the event loop that will consume it."""
+        subscriber = Subscriber(asyncio.get_running_loop(), tenant_id, business_id)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, message: dict, tenant_id: int, business_id: Optional[int] = None):
+        """Deliver `message` to matching subscribers; safe to call from any thread."""
+        with self._lock:
+            targets = [s for s in self._subscribers if s.wants(tenant_id, business_id)]
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, message)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup will unsubscribe it
+                pass
+
+broker = EventBroker()
+
+def stream_message(outbox_row: dict) -> dict:
+    payload = outbox_row["Payload"]
+    return {"type": outbox_row["EventType"], "orderId": outbox_row["AggregateId"], **payload}
+
+def publish_committed(events: Iterable[dict]):
+    for outbox_row in events:
+        if outbox_row["EventType"] in STREAMED_EVENTS:
+            broker.publish(stream_message(outbox_row), outbox_row["TenantId"], outbox_row["Payload"].get("BusinessId"))
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session):
+    events = session.info.pop(outbox.UNCOMMITTED_KEY, None)
+    if events and broker.subscriber_count():
+        try:
+            publish_committed(events)
+        except Exception as e:
+            logger.error(f"Failed to publish order events: {str(e)}")
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_after_rollback(session: Session, previous_transaction):
+    session.info.pop(outbox.UNCOMMITTED_KEY, None)
+
+def format_sse(message: dict) -> str:
+    return f"event: {message['type']}\ndata: {dumps(message).decode('utf-8')}\n\n"
+
+async def sse_stream(subscriber: Subscriber, is_disconnected) -> AsyncIterator[str]:
+    """Yield SSE frames for `subscriber` until the client goes away."""
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        broker.unsubscribe(subscriber)
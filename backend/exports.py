@@ -0,0 +1,77 @@
+"""
+Streaming CSV/NDJSON exports.
+
+Rows are read with a server-side cursor (`stream_results` + `yield_per`) and
+written to the response in chunks, so memory stays flat no matter how many
+rows a tenant has. The export owns its own session because the request-scoped
+one may be closed before a streaming body finishes.
+"""
+import csv
+import io
+import json
+from typing import Iterator, List
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.sql import Select
+
+from backend.database import SessionLocal
+from backend.logging_config import get_logger, log_error
+from backend.serialization import plain
+
+logger = get_logger("exports")
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+YIELD_PER = 1000
+
+def _iter_rows(statement: Select) -> Iterator[tuple]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(stream_results=True, yield_per=YIELD_PER))
+        for partition in result.partitions():
+            yield from partition
+    except Exception as e:
+        log_error(logger, e, context="Export stream failed")
+        raise
+    finally:
+        db.close()
+
+def _csv_chunks(statement: Select, columns: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 0
+    for row in _iter_rows(statement):
+        writer.writerow([plain(value) for value in row])
+        pending += 1
+        if pending >= YIELD_PER:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+    yield buffer.getvalue()
+
+def _ndjson_chunks(statement: Select, columns: List[str]) -> Iterator[str]:
+    lines = []
+    for row in _iter_rows(statement):
+        lines.append(json.dumps({column: plain(value) for column, value in zip(columns, row)}, default=str))
+        if len(lines) >= YIELD_PER:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def export_response(statement: Select, format: str, filename: str) -> StreamingResponse:
+    """Stream the rows of `statement` as CSV or NDJSON; column names come from the select labels."""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    columns = [column.name for column in statement.selected_columns]
+    chunks = _csv_chunks(statement, columns) if format == "csv" else _ndjson_chunks(statement, columns)
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
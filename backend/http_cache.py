@@ -0,0 +1,63 @@
+"""
+Conditional request helpers.
+
+ETags are derived from row versions (the Version column, see models.Product /
+models.Order) or, for collections, from a cheap aggregate over the collection,
+so a matching `If-None-Match` can be answered with 304 before the main query and
+serialization run. On writes, `If-Match` carries the ETag the client last saw;
+a mismatch, or a concurrent write detected by the version check, is a 409.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+def _normalize(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def _header_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return _normalize(etag) in {_normalize(tag) for tag in header.split(",")}
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match header matches `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    return bool(header) and _header_matches(header, etag)
+
+def has_conditional_header(request: Request) -> bool:
+    return bool(request.headers.get("if-none-match"))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+def etag_headers(etag: Optional[str]) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag else {}
+
+def set_etag(response: Response, etag: Optional[str]):
+    response.headers.update(etag_headers(etag))
+
+CONFLICT_DETAIL = "The resource was modified by someone else; reload it and retry"
+
+def check_if_match(request: Request, etag: str):
+    """Raise 409 if the request has an If-Match header that does not match the current `etag`."""
+    header = request.headers.get("if-match")
+    if header and not _header_matches(header, etag):
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
+
+def commit_or_conflict(db: Session):
+    """Commit, turning a failed version check (a concurrent write won the race) into a 409."""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
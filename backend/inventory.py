@@ -0,0 +1,267 @@
+"""
+Inventory ledger.
+
+Every change to `Product.Quantity` is also appended to `stock_movements` as a
+signed delta (bookings, cancellations, manual adjustments) in the same
+transaction. `Product.Quantity` stays the fast "current stock" column; the
+ledger gives the history behind it.
+
+Periodically the ledger is compacted into `stock_snapshots`: one row per
+product holding the stock after all movements up to `LastMovementId`. The
+stock of a product at any time is then the latest snapshot at or before that
+time plus the movements recorded after it:
+
+    python -m backend.inventory compact [--tenant-id N] [--prune-days D]
+
+`--prune-days` deletes movements older than D days once a snapshot covers
+them. Each snapshot records how many movements it folded in, so `stock_at` can
+tell when movements it needs are gone: stock at a time whose movements were
+pruned (or that predates the ledger) is reported as unknown, never guessed.
+
+Booked orders hold stock from creation until they are cancelled or deleted;
+`move_order_stock` gives it back for any number of orders with one locking
+SELECT and one UPDATE.
+"""
+import argparse
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+from backend.models import (
+    Order, OrderedProduct, Product, StockMovement, StockSnapshot,
+    StockMovementTypeEnum, OrderTypeEnum, OrderStatusEnum
+)
+from backend import rollups
+from backend.logging_config import get_logger
+
+logger = get_logger("inventory")
+
+# Movements younger than this are left out of a compaction so transactions still
+# in flight (which may hold lower Ids) are never skipped by a snapshot
+COMPACTION_LAG_SECONDS = int(os.getenv("INVENTORY_COMPACTION_LAG_SECONDS", "300"))
+
+def movement(tenant_id: int, product_id: int, movement_type: StockMovementTypeEnum, quantity_delta: int,
+             order_id: Optional[int] = None, note: Optional[str] = None, user_id: Optional[int] = None) -> dict:
+    return {
+        "TenantId": tenant_id,
+        "ProductId": product_id,
+        "MovementType": movement_type,
+        "QuantityDelta": quantity_delta,
+        "OrderId": order_id,
+        "Note": note,
+        "CreatedBy": user_id,
+        "CreatedAt": datetime.utcnow(),
+    }
+
+def record_movements(db: Session, movements: Iterable[dict]):
+    """Append movements (built with `movement`) in a single multi-row INSERT; zero deltas are skipped."""
+    rows = [m for m in movements if m["QuantityDelta"]]
+    if rows:
+        db.execute(insert(StockMovement), rows)
+
+def holds_stock(order: Order) -> bool:
+    """Booked orders hold (have taken) their products' stock until cancelled or deleted."""
+    return order.Type == OrderTypeEnum.Booked and not order.isDeleted and order.OrderStatus != OrderStatusEnum.Cancelled
+
+def move_order_stock(db: Session, orders: Iterable[Tuple[Order, Iterable[OrderedProduct]]],
+                     user_id: Optional[int] = None, note: Optional[str] = None) -> bool:
+    """
+    Give the stock of the given (order, ordered_products) pairs back on cancellation/deletion.
+
+    All affected products are locked with a single SELECT ... FOR UPDATE and updated
+    with a single UPDATE ... SET Quantity = Quantity + CASE Id ... END; the stock
+    rollup and the ledger are updated to match. Returns whether any stock moved.
+    """
+    totals = defaultdict(int)
+    movements = []
+    for order, ordered_products in orders:
+        per_product = defaultdict(int)
+        for op in ordered_products:
+            per_product[op.ProductId] += op.Quantity
+        for product_id, quantity in per_product.items():
+            totals[product_id] += quantity
+            movements.append(movement(
+                order.TenantId, product_id, StockMovementTypeEnum.Cancellation, quantity,
+                order_id=order.Id, note=note, user_id=user_id
+            ))
+    totals = {product_id: delta for product_id, delta in totals.items() if delta}
+    if not totals:
+        return False
+
+    locked = db.execute(
+        select(Product.Id, Product.TenantId, Product.Quantity, Product.MRP, Product.isDeleted)
+        .where(Product.Id.in_(list(totals)))
+        .with_for_update()
+    ).all()
+
+    # Bulk UPDATEs bypass the ORM version check, so bump Version explicitly
+    db.execute(
+        update(Product)
+        .where(Product.Id.in_(list(totals)))
+        .values(
+            Quantity=Product.Quantity + case(totals, value=Product.Id),
+            Version=Product.Version + 1,
+            ModifiedAt=datetime.utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    stock_deltas = defaultdict(list)
+    for row in locked:
+        if row.isDeleted:
+            continue
+        mrp = row.MRP if row.MRP is not None else Decimal(0)
+        stock_deltas[row.TenantId].append(
+            rollups.stock_delta((row.Quantity, mrp), (row.Quantity + totals[row.Id], mrp))
+        )
+    for tenant_id, deltas in stock_deltas.items():
+        rollups.apply_stock_deltas(db, tenant_id, *deltas)
+    record_movements(db, movements)
+    return True
+
+def _latest_snapshot(db: Session, product_id: int, at: Optional[datetime] = None) -> Optional[StockSnapshot]:
+    query = db.query(StockSnapshot).filter(StockSnapshot.ProductId == product_id)
+    if at is not None:
+        query = query.filter(StockSnapshot.AsOf <= at)
+    return query.order_by(StockSnapshot.AsOf.desc(), StockSnapshot.Id.desc()).first()
+
+def stock_at(db: Session, product_id: int, at: Optional[datetime] = None) -> Optional[int]:
+    """
+    Stock of a product at `at` (now if None): latest snapshot at or before `at` plus later movements.
+    None if some of those movements have been pruned, or `at` is before the product's opening balance.
+    """
+    snapshot = _latest_snapshot(db, product_id, at)
+    after = snapshot.LastMovementId if snapshot else 0
+    if at is not None:
+        # Only movements covered by a later snapshot can have been pruned; they are all
+        # still there if as many remain as that snapshot folded in
+        following = (
+            db.query(StockSnapshot)
+            .filter(StockSnapshot.ProductId == product_id, StockSnapshot.AsOf > at)
+            .order_by(StockSnapshot.AsOf, StockSnapshot.Id)
+            .first()
+        )
+        if following is not None:
+            remaining = db.query(func.count(StockMovement.Id)).filter(
+                StockMovement.ProductId == product_id,
+                StockMovement.Id > after,
+                StockMovement.Id <= following.LastMovementId,
+            ).scalar()
+            if following.MovementCount is None or remaining != following.MovementCount:
+                return None
+    query = db.query(func.coalesce(func.sum(StockMovement.QuantityDelta), 0)).filter(
+        StockMovement.ProductId == product_id,
+        StockMovement.Id > after,
+    )
+    if at is not None:
+        query = query.filter(StockMovement.CreatedAt <= at)
+    return (snapshot.Quantity if snapshot else 0) + int(query.scalar())
+
+def compact(db: Session, tenant_id: Optional[int] = None, as_of: Optional[datetime] = None,
+            prune_before: Optional[datetime] = None) -> int:
+    """
+    Write a snapshot for every product with movements since its last snapshot, covering
+    movements up to `as_of` (default: now minus the compaction lag). Optionally delete
+    the movements older than `prune_before` that are now covered. Returns snapshots written.
+    """
+    as_of = as_of or datetime.utcnow() - timedelta(seconds=COMPACTION_LAG_SECONDS)
+    boundary_query = db.query(func.max(StockMovement.Id)).filter(StockMovement.CreatedAt <= as_of)
+    if tenant_id:
+        boundary_query = boundary_query.filter(StockMovement.TenantId == tenant_id)
+    boundary = boundary_query.scalar()
+    if boundary is None:
+        return 0
+
+    latest = (
+        select(StockSnapshot.ProductId, func.max(StockSnapshot.Id).label("Id"))
+        .group_by(StockSnapshot.ProductId)
+        .subquery()
+    )
+    previous = aliased(StockSnapshot)
+    pending = (
+        select(
+            StockMovement.TenantId,
+            StockMovement.ProductId,
+            func.coalesce(previous.Quantity, 0),
+            func.sum(StockMovement.QuantityDelta),
+            func.max(StockMovement.Id),
+            func.count(StockMovement.Id),
+        )
+        .outerjoin(latest, latest.c.ProductId == StockMovement.ProductId)
+        .outerjoin(previous, previous.Id == latest.c.Id)
+        .where(
+            StockMovement.Id <= boundary,
+            StockMovement.Id > func.coalesce(previous.LastMovementId, 0),
+        )
+        .group_by(StockMovement.TenantId, StockMovement.ProductId, previous.Quantity)
+    )
+    if tenant_id:
+        pending = pending.where(StockMovement.TenantId == tenant_id)
+
+    snapshots = [
+        {
+            "TenantId": row_tenant_id,
+            "ProductId": product_id,
+            "Quantity": int(previous_quantity) + int(delta),
+            "LastMovementId": last_movement_id,
+            "MovementCount": movement_count,
+            "AsOf": as_of,
+            "CreatedAt": datetime.utcnow(),
+        }
+        for row_tenant_id, product_id, previous_quantity, delta, last_movement_id, movement_count in db.execute(pending)
+    ]
+    if snapshots:
+        db.execute(insert(StockSnapshot), snapshots)
+
+    if prune_before is not None:
+        # Every movement up to `boundary` is covered by a snapshot at this point
+        prune = delete(StockMovement).where(
+            StockMovement.Id <= boundary,
+            StockMovement.CreatedAt < min(prune_before, as_of),
+        )
+        if tenant_id:
+            prune = prune.where(StockMovement.TenantId == tenant_id)
+        db.execute(prune)
+
+    db.commit()
+    logger.info(f"Wrote {len(snapshots)} stock snapshots as of {as_of.isoformat()} "
+                f"for {'tenant ' + str(tenant_id) if tenant_id else 'all tenants'}")
+    return len(snapshots)
+
+def drift(db: Session, tenant_id: int):
+    """Products whose Product.Quantity disagrees with snapshot + ledger (should be empty)."""
+    mismatches = []
+    for product in db.query(Product.Id, Product.Quantity).filter(Product.TenantId == tenant_id, Product.isDeleted == False):
+        ledger = stock_at(db, product.Id)
+        if ledger != product.Quantity:
+            mismatches.append((product.Id, product.Quantity, ledger))
+    return mismatches
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Inventory ledger maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subcommands.add_parser("compact", help="Compact stock movements into snapshots")
+    compact_parser.add_argument("--tenant-id", type=int, default=None, help="Only compact this tenant")
+    compact_parser.add_argument("--prune-days", type=int, default=None,
+                                help="Delete movements older than this many days once snapshotted")
+    verify_parser = subcommands.add_parser("verify", help="Report products whose stock disagrees with the ledger")
+    verify_parser.add_argument("--tenant-id", type=int, required=True)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "compact":
+            prune_before = datetime.utcnow() - timedelta(days=args.prune_days) if args.prune_days is not None else None
+            compact(db, args.tenant_id, prune_before=prune_before)
+        else:
+            for product_id, quantity, ledger in drift(db, args.tenant_id):
+                print(f"product {product_id}: Quantity={quantity} ledger={ledger}")
+    finally:
+        db.close()
@@ -2,12 +2,16 @@ from fastapi import FastAPI, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
-from backend.api import products, orders, users, tenants, businesses
+from backend.compression import CompressionMiddleware
+from backend.runtime_config import runtime_config
+from backend.entitlements import entitlement_cache
+from backend.api import products, orders, users, tenants, businesses, analytics, inventory
 from backend.logging_config import setup_logging, get_logger, log_request, log_response, log_error
 from backend.env_validation import validate_environment, validate_gcs_connection, log_environment_summary
 from backend.credentials_setup import setup_google_credentials, validate_google_credentials
 import os
 import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -60,7 +64,17 @@ if environment == "production":
     else:
         logger.info("GCS connection test passed")
 
-app = FastAPI(title="Warehouse Inventory Management System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load runtime configuration/feature flags and keep them refreshed in the background
+    runtime_config.start()
+    # Tenant entitlements read plan limits from runtime configuration, so load them second
+    entitlement_cache.start()
+    yield
+    entitlement_cache.stop()
+    runtime_config.stop()
+
+app = FastAPI(title="Warehouse Inventory Management System", lifespan=lifespan)
 
 # Request/Response logging middleware
 @app.middleware("http")
@@ -119,12 +133,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip/brotli for responses above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
 # Include API routers FIRST
 app.include_router(products.router, prefix="/api/v1/products", tags=["Products"])
 app.include_router(orders.router, prefix="/api/v1/orders", tags=["Orders"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(tenants.router, prefix="/api/v1/tenants", tags=["Tenants"])
 app.include_router(businesses.router, prefix="/api/v1/businesses", tags=["Businesses"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
+app.include_router(inventory.router, prefix="/api/v1/inventory", tags=["Inventory"])
 
 @app.get("/api/v1/health")
 def health_check():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, DECIMAL, JSON
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Text, Enum, DECIMAL, JSON, Index, UniqueConstraint, event
 from sqlalchemy.orm import relationship
 from backend.database import Base
 import enum
@@ -35,6 +35,16 @@ class DiscountTypeEnum(str, enum.Enum):
     Fixed = "Fixed"
     Percentage = "Percentage"
 
+class OutboxStatusEnum(str, enum.Enum):
+    Pending = "Pending"
+    Done = "Done"
+    Failed = "Failed"
+
+class StockMovementTypeEnum(str, enum.Enum):
+    Booking = "Booking"
+    Cancellation = "Cancellation"
+    Adjustment = "Adjustment"
+
 class Tenant(Base):
     __tablename__ = "tenants"
     TenantId = Column(Integer, primary_key=True, autoincrement=True)
@@ -92,6 +102,14 @@ class User(Base):
     PhoneNumber = Column(String(20))
     Description = Column(Text)
     UserStatus = Column(Enum(UserStatusEnum), default=UserStatusEnum.Active, nullable=False)
+    # Bumped to revoke issued tokens (see backend.auth.revoke_tokens)
+    TokenVersion = Column(Integer, default=1, server_default="1", nullable=False)
+    # Normalized lookup columns, kept in sync by the listeners below (see user_lookup_values):
+    # lower-cased UserName/Email for indexed equality and prefix lookups, and the
+    # lower-cased Name/UserName/Email text behind the ngram FULLTEXT search index
+    UserNameKey = Column(String(100))
+    EmailKey = Column(String(255))
+    SearchText = Column(String(620))
     isDeleted = Column(Boolean, default=False, nullable=False)
     ModifiedBy = Column(Integer)
     CreatedBy = Column(Integer)
@@ -100,6 +118,26 @@ class User(Base):
     tenant = relationship("Tenant", back_populates="users")
     business = relationship("Business", back_populates="users")
 
+    __table_args__ = (
+        Index("ix_users_username_key", "UserNameKey"),
+        Index("ix_users_email_key", "EmailKey"),
+        Index("ft_users_search", "SearchText", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+    )
+
+def user_lookup_values(user_name: str, email: str, name: str) -> dict:
+    """Normalized lookup column values for a user; also used by bulk inserts that bypass the ORM."""
+    return {
+        "UserNameKey": (user_name or "").lower(),
+        "EmailKey": (email or "").lower(),
+        "SearchText": " ".join(part for part in (name, user_name, email) if part).lower(),
+    }
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _set_user_lookup_values(mapper, connection, target):
+    for column, value in user_lookup_values(target.UserName, target.Email, target.Name).items():
+        setattr(target, column, value)
+
 class Product(Base):
     __tablename__ = "products"
     Id = Column(Integer, primary_key=True, autoincrement=True)
@@ -121,6 +159,11 @@ class Product(Base):
     CreatedBy = Column(Integer)
     CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
     ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Row version for optimistic concurrency: every ORM UPDATE is "... WHERE Version = <loaded>"
+    # and bumps it, so concurrent edits raise StaleDataError instead of overwriting each other
+    Version = Column(Integer, default=1, server_default="1", nullable=False)
+
+    __mapper_args__ = {"version_id_col": Version}
 
 class Order(Base):
     __tablename__ = "orders"
@@ -130,6 +173,7 @@ class Order(Base):
     Type = Column(Enum(OrderTypeEnum), nullable=False)
     SubType = Column(String(100))
     OrderStatus = Column(Enum(OrderStatusEnum), default=OrderStatusEnum.New, nullable=False)
+    StatusChangedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
     OrderDateTime = Column(DateTime, default=datetime.utcnow, nullable=False)
     AdditionalData = Column(JSON)
     isDeleted = Column(Boolean, default=False, nullable=False)
@@ -137,6 +181,13 @@ class Order(Base):
     CreatedBy = Column(Integer)
     CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
     ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    Version = Column(Integer, default=1, server_default="1", nullable=False)
+
+    __mapper_args__ = {"version_id_col": Version}
+    __table_args__ = (
+        # "orders in status X since before T" (stuck orders / SLA checks)
+        Index("ix_orders_tenant_status_changed", "TenantId", "OrderStatus", "StatusChangedAt"),
+    )
 
 class OrderedProduct(Base):
     __tablename__ = "ordered_products"
@@ -204,3 +255,111 @@ class Subscription(Base):
     CreatedBy = Column(Integer)
     CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
     ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class DailySalesRollup(Base):
+    __tablename__ = "daily_sales_rollups"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    SalesDate = Column(Date, nullable=False)
+    BusinessId = Column(Integer, nullable=False)
+    ProductId = Column(Integer, nullable=False)
+    OrderType = Column(Enum(OrderTypeEnum), nullable=False)
+    OrderCount = Column(Integer, default=0, nullable=False)
+    Quantity = Column(Integer, default=0, nullable=False)
+    TotalCost = Column(DECIMAL(14, 2), default=0, nullable=False)
+    ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("TenantId", "SalesDate", "BusinessId", "ProductId", "OrderType", name="uq_daily_sales_rollup"),
+        Index("ix_daily_sales_rollup_tenant_product", "TenantId", "ProductId", "SalesDate"),
+    )
+
+class DailyOrderRollup(Base):
+    """Distinct order counts per day/business/type; `daily_sales_rollups` counts orders per product."""
+    __tablename__ = "daily_order_rollups"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    SalesDate = Column(Date, nullable=False)
+    BusinessId = Column(Integer, nullable=False)
+    OrderType = Column(Enum(OrderTypeEnum), nullable=False)
+    OrderCount = Column(Integer, default=0, nullable=False)
+    ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("TenantId", "SalesDate", "BusinessId", "OrderType", name="uq_daily_order_rollup"),
+    )
+
+class StockLevelRollup(Base):
+    __tablename__ = "stock_level_rollups"
+    TenantId = Column(Integer, primary_key=True, autoincrement=False)
+    ProductCount = Column(Integer, default=0, nullable=False)
+    TotalQuantity = Column(Integer, default=0, nullable=False)
+    StockValue = Column(DECIMAL(16, 2), default=0, nullable=False)
+    OutOfStockCount = Column(Integer, default=0, nullable=False)
+    ModifiedAt = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+class StockMovement(Base):
+    """Append-only stock ledger: every change to Product.Quantity is recorded as a signed delta."""
+    __tablename__ = "stock_movements"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    ProductId = Column(Integer, nullable=False)
+    MovementType = Column(Enum(StockMovementTypeEnum), nullable=False)
+    QuantityDelta = Column(Integer, nullable=False)
+    OrderId = Column(Integer)
+    Note = Column(String(255))
+    CreatedBy = Column(Integer)
+    CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("ix_stock_movements_product_created", "ProductId", "CreatedAt"),
+        Index("ix_stock_movements_tenant_created", "TenantId", "CreatedAt"),
+    )
+
+class StockSnapshot(Base):
+    """Compacted stock level of a product: Quantity after applying every movement with Id <= LastMovementId."""
+    __tablename__ = "stock_snapshots"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    ProductId = Column(Integer, nullable=False)
+    Quantity = Column(Integer, nullable=False)
+    LastMovementId = Column(Integer, default=0, nullable=False)
+    # Movements folded in since the product's previous snapshot; NULL when unknown
+    # (the opening balance and snapshots written before this was recorded)
+    MovementCount = Column(Integer)
+    AsOf = Column(DateTime, nullable=False)
+    CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("ix_stock_snapshots_product_asof", "ProductId", "AsOf"),
+    )
+
+class OrderStatusHistory(Base):
+    """Append-only log of order status transitions."""
+    __tablename__ = "order_status_history"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    OrderId = Column(Integer, nullable=False)
+    FromStatus = Column(Enum(OrderStatusEnum))
+    ToStatus = Column(Enum(OrderStatusEnum), nullable=False)
+    ChangedBy = Column(Integer)
+    ChangedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (
+        Index("ix_order_status_history_order", "OrderId", "ChangedAt"),
+        Index("ix_order_status_history_tenant_status", "TenantId", "ToStatus", "ChangedAt"),
+    )
+
+class OutboxEvent(Base):
+    """Transactional outbox: written with the change that caused it, delivered later by backend.outbox."""
+    __tablename__ = "outbox_events"
+    Id = Column(Integer, primary_key=True, autoincrement=True)
+    TenantId = Column(Integer, nullable=False)
+    AggregateType = Column(String(50), nullable=False)
+    AggregateId = Column(Integer, nullable=False)
+    EventType = Column(String(100), nullable=False)
+    Payload = Column(JSON)
+    Status = Column(Enum(OutboxStatusEnum), default=OutboxStatusEnum.Pending, nullable=False)
+    Attempts = Column(Integer, default=0, nullable=False)
+    AvailableAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    LastError = Column(Text)
+    CreatedAt = Column(DateTime, default=datetime.utcnow, nullable=False)
+    ProcessedAt = Column(DateTime)
+    __table_args__ = (
+        Index("ix_outbox_events_status_available", "Status", "AvailableAt", "Id"),
+    )
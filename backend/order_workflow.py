@@ -0,0 +1,84 @@
+"""
+Order status state machine.
+
+    New -> InProgress -> Done
+    any (except Cancelled) -> Cancelled
+
+Orders are always created as New. Cancelled is terminal. Staying in the same status is always allowed (a no-op).
+Every transition is appended to `order_status_history`, and `Order.StatusChangedAt`
+records when the order entered its current status. That column is indexed
+together with TenantId and OrderStatus, so "orders in status X for more than
+N days" is an index range scan. Each transition also queues an
+order.status_changed event in the outbox (see backend.outbox).
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from backend.models import Order, OrderStatusEnum, OrderStatusHistory
+from backend import outbox
+
+ORDER_TRANSITIONS = {
+    OrderStatusEnum.New: {OrderStatusEnum.InProgress, OrderStatusEnum.Cancelled},
+    OrderStatusEnum.InProgress: {OrderStatusEnum.Done, OrderStatusEnum.Cancelled},
+    OrderStatusEnum.Done: {OrderStatusEnum.Cancelled},
+    OrderStatusEnum.Cancelled: set(),
+}
+
+# Orders still being worked on
+OPEN_STATUSES = (OrderStatusEnum.New, OrderStatusEnum.InProgress)
+
+def parse_status(value) -> OrderStatusEnum:
+    try:
+        return OrderStatusEnum(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid status: {value}")
+
+def check_initial(value) -> OrderStatusEnum:
+    """Status for a new order; anything but New would skip the state machine (and stock handling)."""
+    new_status = parse_status(value or OrderStatusEnum.New.value)
+    if new_status != OrderStatusEnum.New:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Orders are created as {OrderStatusEnum.New.value}; cannot create one as {new_status.value}",
+        )
+    return new_status
+
+def can_transition(current, target) -> bool:
+    current, target = OrderStatusEnum(current), OrderStatusEnum(target)
+    return current == target or target in ORDER_TRANSITIONS[current]
+
+def transition_error(current, target) -> str:
+    allowed = ", ".join(sorted(s.value for s in ORDER_TRANSITIONS[OrderStatusEnum(current)])) or "none"
+    return f"Cannot change order status from {OrderStatusEnum(current).value} to {OrderStatusEnum(target).value} (allowed: {allowed})"
+
+def check_transition(current, target):
+    """Raise 409 if the state machine does not allow moving from `current` to `target`."""
+    if not can_transition(current, target):
+        raise HTTPException(status_code=409, detail=transition_error(current, target))
+
+def history_row(order: Order, from_status: Optional[OrderStatusEnum], to_status: OrderStatusEnum,
+                user_id: Optional[int], changed_at: Optional[datetime] = None) -> dict:
+    return {
+        "TenantId": order.TenantId,
+        "OrderId": order.Id,
+        "FromStatus": from_status,
+        "ToStatus": to_status,
+        "ChangedBy": user_id,
+        "ChangedAt": changed_at or datetime.utcnow(),
+        # Not stored; carried along for the order.status_changed event
+        "BusinessId": order.BusinessId,
+    }
+
+def record_history(db: Session, rows: Iterable[dict]):
+    """Append status transitions in a single multi-row INSERT and queue an
+    order.status_changed outbox event for each actual transition."""
+    rows = list(rows)
+    if rows:
+        db.execute(insert(OrderStatusHistory), [
+            {key: value for key, value in row.items() if key != "BusinessId"} for row in rows
+        ])
+        outbox.enqueue(db, [outbox.status_changed_event(row) for row in rows if row["FromStatus"] is not None])
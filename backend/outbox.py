@@ -0,0 +1,239 @@
+"""
+Transactional outbox for order side effects.
+
+Order writes append events to `outbox_events` in the same transaction as the
+order change, so an event exists if and only if the change committed. A
+separate worker process delivers them to the registered handlers
+(notifications, ERP sync, ...) off the request path:
+
+    python -m backend.outbox worker [--batch-size 100] [--poll-seconds 2] [--once]
+    python -m backend.outbox retry-failed
+    python -m backend.outbox purge --days 30
+
+The worker claims batches with SELECT ... FOR UPDATE SKIP LOCKED, so several
+workers can run side by side. Failed deliveries are retried with exponential
+backoff; after OUTBOX_MAX_ATTEMPTS an event is parked as Failed.
+
+Configuration:
+    OUTBOX_BATCH_SIZE       events per batch (default 100)
+    OUTBOX_POLL_SECONDS     idle sleep between polls (default 2)
+    OUTBOX_MAX_ATTEMPTS     deliveries before an event is marked Failed (default 10)
+    OUTBOX_BACKOFF_SECONDS  base retry delay, doubled per attempt (default 5, capped at 1 hour)
+    OUTBOX_WEBHOOK_URL      if set, every event is POSTed here as JSON (ERP/integration sync)
+"""
+import argparse
+import json
+import os
+import random
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from backend.models import OutboxEvent, OutboxStatusEnum
+from backend.logging_config import get_logger, log_error
+from backend.serialization import plain
+
+logger = get_logger("outbox")
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_BACKOFF_SECONDS = int(os.getenv("OUTBOX_BACKOFF_SECONDS", "5"))
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+OUTBOX_WEBHOOK_URL = os.getenv("OUTBOX_WEBHOOK_URL")
+
+ORDER_CREATED = "order.created"
+ORDER_UPDATED = "order.updated"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_DELETED = "order.deleted"
+
+# event type ("*" for all) -> handlers; a handler raising marks the event for retry
+HANDLERS: Dict[str, List[Callable[[dict], None]]] = {}
+
+def handler(event_type: str = "*"):
+    """Register a function that receives each delivered event as a dict."""
+    def register(func):
+        HANDLERS.setdefault(event_type, []).append(func)
+        return func
+    return register
+
+def event(tenant_id: int, aggregate_type: str, aggregate_id: int, event_type: str, payload: dict) -> dict:
+    now = datetime.utcnow()
+    return {
+        "TenantId": tenant_id,
+        "AggregateType": aggregate_type,
+        "AggregateId": aggregate_id,
+        "EventType": event_type,
+        "Payload": {key: plain(value) for key, value in payload.items()},
+        "Status": OutboxStatusEnum.Pending,
+        "Attempts": 0,
+        "AvailableAt": now,
+        "CreatedAt": now,
+    }
+
+def order_event(order, event_type: str, **extra) -> dict:
+    """Outbox row for an order event; `extra` goes into the payload."""
+    return event(order.TenantId, "order", order.Id, event_type, {
+        "OrderId": order.Id,
+        "BusinessId": order.BusinessId,
+        "Type": order.Type,
+        "OrderStatus": order.OrderStatus,
+        **extra,
+    })
+
+def status_changed_event(history_row: dict) -> dict:
+    """order.status_changed event for a row built with order_workflow.history_row."""
+    return event(history_row["TenantId"], "order", history_row["OrderId"], ORDER_STATUS_CHANGED, {
+        "OrderId": history_row["OrderId"],
+        "BusinessId": history_row["BusinessId"],
+        "FromStatus": history_row["FromStatus"],
+        "ToStatus": history_row["ToStatus"],
+        "ChangedBy": history_row["ChangedBy"],
+        "ChangedAt": history_row["ChangedAt"],
+    })
+
+# Session.info key under which enqueued events wait for the transaction to commit;
+# backend.events pushes them to live subscribers once it does
+UNCOMMITTED_KEY = "outbox_uncommitted"
+
+def enqueue(db: Session, events: Iterable[dict]):
+    """Add events to the outbox in one multi-row INSERT; commits with the caller's transaction."""
+    events = list(events)
+    if events:
+        db.execute(insert(OutboxEvent), events)
+        db.info.setdefault(UNCOMMITTED_KEY, []).extend(events)
+
+def _event_dict(event: OutboxEvent) -> dict:
+    return {
+        "id": event.Id,
+        "type": event.EventType,
+        "tenantId": event.TenantId,
+        "aggregateType": event.AggregateType,
+        "aggregateId": event.AggregateId,
+        "createdAt": event.CreatedAt.isoformat(),
+        "payload": event.Payload,
+    }
+
+@handler()
+def log_event(event: dict):
+    logger.info(f"Outbox event {event['id']} {event['type']} for {event['aggregateType']} {event['aggregateId']}")
+
+@handler()
+def post_webhook(event: dict):
+    if not OUTBOX_WEBHOOK_URL:
+        return
+    body = json.dumps(event).encode("utf-8")
+    webhook = urllib.request.Request(
+        OUTBOX_WEBHOOK_URL, data=body, method="POST",
+        headers={"Content-Type": "application/json", "Idempotency-Key": f"outbox-{event['id']}"},
+    )
+    with urllib.request.urlopen(webhook, timeout=10) as response:
+        if response.status >= 300:
+            raise RuntimeError(f"Webhook returned HTTP {response.status}")
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter for the given number of failed attempts."""
+    delay = min(OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+def deliver(event: OutboxEvent):
+    data = _event_dict(event)
+    for func in HANDLERS.get("*", []) + HANDLERS.get(event.EventType, []):
+        func(data)
+
+def process_batch(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> int:
+    """Deliver one batch of due events. Returns the number of events claimed."""
+    now = datetime.utcnow()
+    events = (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.Status == OutboxStatusEnum.Pending, OutboxEvent.AvailableAt <= now)
+        .order_by(OutboxEvent.Id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    for event in events:
+        try:
+            deliver(event)
+            event.Status = OutboxStatusEnum.Done
+            event.ProcessedAt = datetime.utcnow()
+        except Exception as e:
+            event.Attempts += 1
+            event.LastError = str(e)[:2000]
+            if event.Attempts >= OUTBOX_MAX_ATTEMPTS:
+                event.Status = OutboxStatusEnum.Failed
+                log_error(logger, e, context=f"Outbox event {event.Id} failed permanently after {event.Attempts} attempts")
+            else:
+                event.AvailableAt = datetime.utcnow() + timedelta(seconds=backoff_seconds(event.Attempts))
+                logger.warning(f"Outbox event {event.Id} failed (attempt {event.Attempts}), retrying: {str(e)}")
+    db.commit()
+    return len(events)
+
+def run_worker(batch_size: int = OUTBOX_BATCH_SIZE, poll_seconds: float = OUTBOX_POLL_SECONDS, once: bool = False):
+    from backend.database import SessionLocal
+
+    logger.info(f"Outbox worker started (batch size {batch_size}, poll {poll_seconds}s)")
+    while True:
+        db = SessionLocal()
+        try:
+            claimed = process_batch(db, batch_size)
+        except Exception as e:
+            db.rollback()
+            log_error(logger, e, context="Outbox batch failed")
+            claimed = 0
+        finally:
+            db.close()
+        if once and claimed < batch_size:
+            return
+        if claimed < batch_size:
+            # Drained: wait for new events; a full batch means more are likely waiting
+            time.sleep(poll_seconds)
+
+def retry_failed(db: Session) -> int:
+    result = db.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.Status == OutboxStatusEnum.Failed)
+        .values(Status=OutboxStatusEnum.Pending, Attempts=0, AvailableAt=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+def purge(db: Session, days: int) -> int:
+    result = db.execute(
+        delete(OutboxEvent).where(
+            OutboxEvent.Status == OutboxStatusEnum.Done,
+            OutboxEvent.ProcessedAt < datetime.utcnow() - timedelta(days=days),
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Outbox worker and maintenance")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subcommands.add_parser("worker", help="Deliver pending events")
+    worker_parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    worker_parser.add_argument("--poll-seconds", type=float, default=OUTBOX_POLL_SECONDS)
+    worker_parser.add_argument("--once", action="store_true", help="Exit once the outbox is drained")
+    subcommands.add_parser("retry-failed", help="Requeue events that exhausted their retries")
+    purge_parser = subcommands.add_parser("purge", help="Delete delivered events")
+    purge_parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        run_worker(args.batch_size, args.poll_seconds, args.once)
+    else:
+        db = SessionLocal()
+        try:
+            if args.command == "retry-failed":
+                print(f"Requeued {retry_failed(db)} events")
+            else:
+                print(f"Deleted {purge(db, args.days)} events")
+        finally:
+            db.close()
@@ -0,0 +1,52 @@
+"""
+Partial updates for PATCH endpoints.
+
+Only the columns present in the payload (and actually different from the
+stored values) are written, with a single `UPDATE ... WHERE Id = ? AND
+Version = ?`. The written values are merged into the already loaded row in
+memory (synchronize_session="evaluate"), so the response is built without a
+refresh SELECT.
+"""
+from datetime import datetime
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from sqlalchemy import Enum, update
+from sqlalchemy.orm import Session
+
+from backend.http_cache import CONFLICT_DETAIL
+from backend.serialization import plain
+
+def changed_values(row, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The subset of `payload` that differs from `row`. Explicit nulls on NOT NULL
+    columns and unknown enum values are rejected with 400.
+    """
+    columns = type(row).__table__.columns
+    changes = {}
+    for key, value in payload.items():
+        column = columns[key]
+        if value is None and not column.nullable:
+            raise HTTPException(status_code=400, detail=f"{key} cannot be null")
+        if value is not None and isinstance(column.type, Enum) and plain(value) not in column.type.enums:
+            raise HTTPException(status_code=400, detail=f"Invalid {key}: {value}")
+        if plain(getattr(row, key)) != plain(value):
+            changes[key] = value
+    return changes
+
+def versioned_update(db: Session, row, changes: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    """
+    Write `changes` to `row` guarded by its loaded Version, bumping the version.
+    Raises 409 if another writer got there first. Returns everything written.
+    """
+    model = type(row)
+    values = {**changes, "Version": row.Version + 1, "ModifiedAt": datetime.utcnow(), "ModifiedBy": user_id}
+    result = db.execute(
+        update(model)
+        .where(model.Id == row.Id, model.Version == row.Version)
+        .values(**values)
+        .execution_options(synchronize_session="evaluate")
+    )
+    if result.rowcount != 1:
+        raise HTTPException(status_code=409, detail=CONFLICT_DETAIL)
+    return values
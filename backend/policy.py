@@ -0,0 +1,120 @@
+"""
+Role-based access policy.
+
+`POLICY` lists which roles may perform each action on each resource. It is
+compiled at import into a set of (role, resource, action) decisions, so `allowed`
+and `require` are a single set lookup per request.
+
+Row visibility is per role as well, compiled into `SCOPES`:
+    platform roles (SuperAdmin, TechAdmin, SalesAdmin)  every tenant
+    wholesaler roles                                    their own tenant
+    dealer roles                                        their own tenant and business
+`scope_clauses` turns that into SQLAlchemy filter clauses for any model with a
+tenant (and optionally business) column; `can_access` is the in-memory check for a
+row that is already loaded.
+"""
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+from backend.models import UserRoleEnum
+
+PLATFORM_ROLES = frozenset({UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin, UserRoleEnum.SalesAdmin})
+WHOLESALER_ROLES = frozenset({UserRoleEnum.WholesalerAdmin, UserRoleEnum.Wholesaler})
+DEALER_ROLES = frozenset({UserRoleEnum.DealerAdmin, UserRoleEnum.Dealer})
+ALL_ROLES = PLATFORM_ROLES | WHOLESALER_ROLES | DEALER_ROLES
+# Roles that run the business side: manage orders, stock and (for admins) businesses
+OPERATOR_ROLES = PLATFORM_ROLES | WHOLESALER_ROLES
+TENANT_ADMIN_ROLES = frozenset({UserRoleEnum.SuperAdmin, UserRoleEnum.TechAdmin})
+
+POLICY = {
+    "orders": {
+        "read": ALL_ROLES,
+        "create": ALL_ROLES,
+        "update": OPERATOR_ROLES,
+        "delete": OPERATOR_ROLES,
+        "manage": OPERATOR_ROLES,  # bulk changes, stuck-order reports
+    },
+    "products": {
+        "read": ALL_ROLES,
+        "create": ALL_ROLES,
+        "update": ALL_ROLES,
+        "delete": ALL_ROLES,
+    },
+    "inventory": {
+        "read": OPERATOR_ROLES,  # stock levels and ledgers are the wholesaler's
+        "adjust": OPERATOR_ROLES,
+    },
+    "analytics": {
+        "read": ALL_ROLES,
+    },
+    "tenants": {
+        "read": ALL_ROLES,
+        "read_any": PLATFORM_ROLES,
+        "create": TENANT_ADMIN_ROLES,
+        "update": TENANT_ADMIN_ROLES,
+        "delete": TENANT_ADMIN_ROLES,
+    },
+    "businesses": {
+        "read": ALL_ROLES,
+        "create": TENANT_ADMIN_ROLES | {UserRoleEnum.WholesalerAdmin},
+        "update": TENANT_ADMIN_ROLES | {UserRoleEnum.WholesalerAdmin},
+        "delete": TENANT_ADMIN_ROLES | {UserRoleEnum.WholesalerAdmin},
+    },
+}
+
+DECISIONS = frozenset(
+    (role, resource, action)
+    for resource, actions in POLICY.items()
+    for action, roles in actions.items()
+    for role in roles
+)
+
+# role -> (sees every tenant, restricted to own business)
+SCOPES = {
+    role: (role in PLATFORM_ROLES, role in DEALER_ROLES)
+    for role in ALL_ROLES
+}
+
+def allowed(user, resource: str, action: str) -> bool:
+    return (user.Role, resource, action) in DECISIONS
+
+def require(user, resource: str, action: str, detail: str = "Not enough permissions"):
+    """Raise 403 unless the user's role may perform `action` on `resource`."""
+    if (user.Role, resource, action) not in DECISIONS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+def is_platform(user) -> bool:
+    return SCOPES.get(user.Role, (False, False))[0]
+
+def is_dealer(user) -> bool:
+    return SCOPES.get(user.Role, (False, False))[1]
+
+def tenant_for(user, tenant_id: Optional[int] = None) -> int:
+    """The tenant a list request works on: `tenant_id` if a platform user asked for one, else their own."""
+    if tenant_id and is_platform(user):
+        return tenant_id
+    return user.TenantId
+
+def scope_clauses(user, tenant_column, business_column=None, tenant_id: Optional[int] = None) -> List:
+    """
+    Filter clauses restricting a query to the rows the user may see. `tenant_id`
+    pins platform users to one tenant (they see every tenant otherwise); other
+    roles are always limited to their own tenant, dealers also to their business.
+    """
+    all_tenants, own_business = SCOPES.get(user.Role, (False, True))
+    clauses = []
+    if not all_tenants:
+        clauses.append(tenant_column == user.TenantId)
+    elif tenant_id:
+        clauses.append(tenant_column == tenant_id)
+    if own_business and business_column is not None:
+        clauses.append(business_column == user.BusinessId)
+    return clauses
+
+def can_access(user, tenant_id: int, business_id: Optional[int] = None) -> bool:
+    """In-memory counterpart of `scope_clauses` for an already loaded row."""
+    all_tenants, own_business = SCOPES.get(user.Role, (False, True))
+    if not all_tenants and tenant_id != user.TenantId:
+        return False
+    return not (own_business and business_id is not None and business_id != user.BusinessId)
@@ -0,0 +1,211 @@
+"""
+Precomputed sales and stock rollups.
+
+The rollup tables are maintained incrementally from the order and product
+write paths (in the same transaction as the write) so analytics reads never
+have to aggregate over `orders`/`ordered_products`. `rebuild_rollups` recomputes
+them from scratch and can be run as a job:
+
+    python -m backend.rollups [--tenant-id N]
+"""
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+from sqlalchemy.orm import Session
+
+from backend.models import (
+    DailySalesRollup, DailyOrderRollup, StockLevelRollup, Order, OrderedProduct, Product, OrderStatusEnum
+)
+from backend.logging_config import get_logger
+
+logger = get_logger("rollups")
+
+SALES_KEYS = ("TenantId", "SalesDate", "BusinessId", "ProductId", "OrderType")
+ORDER_KEYS = ("TenantId", "SalesDate", "BusinessId", "OrderType")
+STOCK_KEYS = ("TenantId",)
+
+def _to_decimal(value) -> Decimal:
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+def _upsert_increment(db: Session, model, keys: Tuple[str, ...], values: dict):
+    """Insert a rollup row or add `values` onto the existing row with the same keys."""
+    table = model.__table__
+    counters = [c for c in values if c not in keys]
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(**values, ModifiedAt=datetime.utcnow())
+        stmt = stmt.on_duplicate_key_update(
+            {**{c: table.c[c] + stmt.inserted[c] for c in counters}, "ModifiedAt": stmt.inserted.ModifiedAt}
+        )
+    else:
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = dialect_insert(table).values(**values, ModifiedAt=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={**{c: table.c[c] + stmt.excluded[c] for c in counters}, "ModifiedAt": stmt.excluded.ModifiedAt},
+        )
+    db.execute(stmt)
+
+def record_order(db: Session, order: Order, ordered_products: Iterable[OrderedProduct], sign: int = 1):
+    """
+    Add (sign=1) or remove (sign=-1) an order's line items from the daily sales rollup,
+    and the order itself from the daily order count.
+    Must be called after the order has been flushed so OrderDateTime is populated.
+    """
+    totals: Dict[int, list] = defaultdict(lambda: [0, Decimal(0)])
+    for op in ordered_products:
+        totals[op.ProductId][0] += op.Quantity
+        totals[op.ProductId][1] += _to_decimal(op.TotalCost)
+
+    sales_date = (order.OrderDateTime or datetime.utcnow()).date()
+    order_type = order.Type.value if hasattr(order.Type, "value") else order.Type
+    for product_id, (quantity, total_cost) in totals.items():
+        _upsert_increment(db, DailySalesRollup, SALES_KEYS, {
+            "TenantId": order.TenantId,
+            "SalesDate": sales_date,
+            "BusinessId": order.BusinessId,
+            "ProductId": product_id,
+            "OrderType": order_type,
+            "OrderCount": sign,
+            "Quantity": sign * quantity,
+            "TotalCost": sign * total_cost,
+        })
+    # Counted once per order here; the per-product OrderCount above would count it once per product
+    if totals:
+        _upsert_increment(db, DailyOrderRollup, ORDER_KEYS, {
+            "TenantId": order.TenantId,
+            "SalesDate": sales_date,
+            "BusinessId": order.BusinessId,
+            "OrderType": order_type,
+            "OrderCount": sign,
+        })
+
+def counts_toward_sales(order: Order) -> bool:
+    """Cancelled and deleted orders are excluded from the sales rollup."""
+    return not order.isDeleted and order.OrderStatus != OrderStatusEnum.Cancelled
+
+def product_stock_state(product: Product) -> Optional[Tuple[int, Decimal]]:
+    """Snapshot of the fields the stock rollup depends on, or None if the product doesn't count."""
+    if product is None or product.isDeleted:
+        return None
+    return (product.Quantity or 0, _to_decimal(product.MRP))
+
+def stock_delta(before: Optional[Tuple[int, Decimal]], after: Optional[Tuple[int, Decimal]]) -> dict:
+    """Difference in the stock rollup counters when a product moves from `before` to `after`."""
+    delta = {"ProductCount": 0, "TotalQuantity": 0, "StockValue": Decimal(0), "OutOfStockCount": 0}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        quantity, mrp = state
+        delta["ProductCount"] += sign
+        delta["TotalQuantity"] += sign * quantity
+        delta["StockValue"] += sign * quantity * mrp
+        delta["OutOfStockCount"] += sign * (1 if quantity <= 0 else 0)
+    return delta
+
+def apply_stock_deltas(db: Session, tenant_id: int, *deltas: dict):
+    """Apply one or more `stock_delta` results to the tenant's stock rollup in a single upsert."""
+    total = {"ProductCount": 0, "TotalQuantity": 0, "StockValue": Decimal(0), "OutOfStockCount": 0}
+    for delta in deltas:
+        for key, value in delta.items():
+            total[key] += value
+    if not any(total.values()):
+        return
+    _upsert_increment(db, StockLevelRollup, STOCK_KEYS, {"TenantId": tenant_id, **total})
+
+def rebuild_rollups(db: Session, tenant_id: Optional[int] = None):
+    """Recompute all rollup rows (optionally for a single tenant) from the transactional tables."""
+    sales_filter = [DailySalesRollup.TenantId == tenant_id] if tenant_id else []
+    order_filter = [DailyOrderRollup.TenantId == tenant_id] if tenant_id else []
+    stock_filter = [StockLevelRollup.TenantId == tenant_id] if tenant_id else []
+    db.execute(delete(DailySalesRollup).where(*sales_filter))
+    db.execute(delete(DailyOrderRollup).where(*order_filter))
+    db.execute(delete(StockLevelRollup).where(*stock_filter))
+
+    now = datetime.utcnow()
+    sales_date = func.date(Order.OrderDateTime)
+    counted = (
+        Order.isDeleted == False,
+        OrderedProduct.isDeleted == False,
+        Order.OrderStatus != OrderStatusEnum.Cancelled,
+    )
+    sales_query = (
+        select(
+            Order.TenantId,
+            sales_date,
+            Order.BusinessId,
+            OrderedProduct.ProductId,
+            Order.Type,
+            func.count(func.distinct(Order.Id)),
+            func.sum(OrderedProduct.Quantity),
+            func.sum(OrderedProduct.TotalCost),
+            literal(now, DateTime),
+        )
+        .join(OrderedProduct, OrderedProduct.OrderId == Order.Id)
+        .where(*counted)
+        .group_by(Order.TenantId, sales_date, Order.BusinessId, OrderedProduct.ProductId, Order.Type)
+    )
+    order_query = (
+        select(
+            Order.TenantId,
+            sales_date,
+            Order.BusinessId,
+            Order.Type,
+            func.count(func.distinct(Order.Id)),
+            literal(now, DateTime),
+        )
+        .join(OrderedProduct, OrderedProduct.OrderId == Order.Id)
+        .where(*counted)
+        .group_by(Order.TenantId, sales_date, Order.BusinessId, Order.Type)
+    )
+    if tenant_id:
+        sales_query = sales_query.where(Order.TenantId == tenant_id)
+        order_query = order_query.where(Order.TenantId == tenant_id)
+    db.execute(insert(DailySalesRollup).from_select(
+        list(SALES_KEYS) + ["OrderCount", "Quantity", "TotalCost", "ModifiedAt"], sales_query
+    ))
+    db.execute(insert(DailyOrderRollup).from_select(
+        list(ORDER_KEYS) + ["OrderCount", "ModifiedAt"], order_query
+    ))
+
+    stock_query = (
+        select(
+            Product.TenantId,
+            func.count(Product.Id),
+            func.coalesce(func.sum(Product.Quantity), 0),
+            func.coalesce(func.sum(Product.Quantity * Product.MRP), 0),
+            func.sum(case((Product.Quantity <= 0, 1), else_=0)),
+            literal(now, DateTime),
+        )
+        .where(Product.isDeleted == False)
+        .group_by(Product.TenantId)
+    )
+    if tenant_id:
+        stock_query = stock_query.where(Product.TenantId == tenant_id)
+    db.execute(insert(StockLevelRollup).from_select(
+        ["TenantId", "ProductCount", "TotalQuantity", "StockValue", "OutOfStockCount", "ModifiedAt"], stock_query
+    ))
+    db.commit()
+    logger.info(f"Rebuilt analytics rollups for {'tenant ' + str(tenant_id) if tenant_id else 'all tenants'}")
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild the analytics rollup tables")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Only rebuild rollups for this tenant")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuild_rollups(db, args.tenant_id)
+    finally:
+        db.close()
@@ -0,0 +1,254 @@
+"""
+Runtime configuration and feature flags.
+
+The `configurations` and `features` tables are loaded into an immutable,
+typed in-process snapshot. Request handlers only read the current snapshot
+(plain dict lookups, no database access); a background thread polls both tables
+for rows with a newer `ModifiedAt` every RUNTIME_CONFIG_REFRESH_SECONDS and
+swaps in a new snapshot, bumping its `version`, when anything changed.
+
+Settings are `configurations` rows:
+    Type="Global", RefId="*"          default for every tenant
+    Type="Tenant", RefId=<TenantId>   override for one tenant
+    Type="Feature", RefId=<TenantId>  per-tenant override of a feature flag (Key = FeatureKey)
+`ValueType` is one of int, float, bool, json or string; rows whose value does not
+parse are logged and ignored.
+
+Feature flags are `features` rows keyed by FeatureKey; a flag is on when it is
+Active, inside its optional Start/End window and its value is truthy.
+
+Known settings (defaults in SETTING_DEFAULTS):
+    page_size.max           largest `size` accepted by list endpoints
+    upload.max_image_bytes  largest product image upload
+    limits.max_users, limits.max_skus, limits.max_orders_per_month
+                            tenant plan limits (unset = unlimited, see backend.entitlements)
+
+Configuration:
+    RUNTIME_CONFIG_REFRESH_SECONDS  polling interval (default 30, 0 disables the background refresh)
+"""
+from abc import ABC, abstractmethod
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from backend.models import Configuration, Feature
+from backend.logging_config import get_logger
+
+logger = get_logger("runtime_config")
+
+RUNTIME_CONFIG_REFRESH_SECONDS = float(os.getenv("RUNTIME_CONFIG_REFRESH_SECONDS", "30"))
+
+GLOBAL = "Global"
+TENANT = "Tenant"
+FEATURE = "Feature"
+GLOBAL_REF = "*"
+
+PAGE_SIZE_MAX = "page_size.max"
+UPLOAD_MAX_IMAGE_BYTES = "upload.max_image_bytes"
+LIMIT_MAX_USERS = "limits.max_users"
+LIMIT_MAX_SKUS = "limits.max_skus"
+LIMIT_MAX_ORDERS_PER_MONTH = "limits.max_orders_per_month"
+
+# Absolute upper bound for `size` on list endpoints; page_size.max can be set anywhere below it
+PAGE_SIZE_CEILING = 1000
+
+SETTING_DEFAULTS = {
+    PAGE_SIZE_MAX: 100,
+    UPLOAD_MAX_IMAGE_BYTES: 10 * 1024 * 1024,
+}
+
+def parse_value(value: str, value_type: str) -> Any:
+    value_type = (value_type or "string").lower()
+    if value_type in ("int", "integer"):
+        return int(value)
+    if value_type in ("float", "decimal", "number"):
+        return float(value)
+    if value_type in ("bool", "boolean"):
+        normalized = value.strip().lower()
+        if normalized in ("1", "true", "yes", "on"):
+            return True
+        if normalized in ("0", "false", "no", "off", ""):
+            return False
+        raise ValueError(f"Not a boolean: {value!r}")
+    if value_type == "json":
+        return json.loads(value)
+    if value_type in ("string", "str", "text"):
+        return value
+    raise ValueError(f"Unknown ValueType {value_type!r}")
+
+class FeatureFlag:
+    def __init__(self, key: str, value: Any, active: bool, start: Optional[datetime], end: Optional[datetime]):
+        self.key = key
+        self.value = value
+        self.active = active
+        self.start = start
+        self.end = end
+
+    def enabled(self, now: datetime) -> bool:
+        if not self.active or not self.value:
+            return False
+        if self.start and now < self.start:
+            return False
+        return not (self.end and now >= self.end)
+
+class ConfigSnapshot:
+    """Immutable view of the configuration tables; replaced wholesale on refresh."""
+
+    def __init__(self, version: int, settings: Dict[Tuple[str, str, str], Any], features: Dict[str, FeatureFlag]):
+        self.version = version
+        self.settings = settings
+        self.features = features
+        self.loaded_at = datetime.utcnow()
+
+    def setting(self, key: str, tenant_id=None, default: Any = None) -> Any:
+        if tenant_id is not None:
+            value = self.settings.get((TENANT, str(tenant_id), key))
+            if value is not None:
+                return value
+        value = self.settings.get((GLOBAL, GLOBAL_REF, key))
+        if value is not None:
+            return value
+        return SETTING_DEFAULTS.get(key) if default is None else default
+
+    def feature_enabled(self, key: str, tenant_id=None, now: Optional[datetime] = None) -> bool:
+        if tenant_id is not None:
+            override = self.settings.get((FEATURE, str(tenant_id), key))
+            if override is not None:
+                return bool(override)
+        flag = self.features.get(key)
+        return flag.enabled(now or datetime.utcnow()) if flag else False
+
+class PeriodicRefresh(ABC):
+    """In-process state reloaded from the database by a daemon thread; subclasses implement `refresh(db)`."""
+
+    name = "refresh"
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @abstractmethod
+    def refresh(self, db: Session) -> bool:
+        """Reload from the database; returns whether anything changed."""
+
+    def refresh_now(self):
+        from backend.database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            if self.refresh(db):
+                logger.info(f"{self.name} refreshed")
+        except Exception as e:
+            logger.error(f"{self.name} refresh failed: {str(e)}")
+        finally:
+            db.close()
+
+    def _poll(self, interval: float):
+        while not self._stop.wait(interval):
+            self.refresh_now()
+
+    def start(self, interval: float):
+        """Load now and start the background refresh thread (once per process; interval <= 0 loads once)."""
+        self.refresh_now()
+        if interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, args=(interval,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+class RuntimeConfig(PeriodicRefresh):
+    """Holds the current snapshot and refreshes it incrementally from the database."""
+
+    name = "runtime-config"
+
+    def __init__(self):
+        super().__init__()
+        self._snapshot = ConfigSnapshot(0, {}, {})
+        self._configuration_rows: Dict[int, tuple] = {}
+        self._feature_rows: Dict[int, tuple] = {}
+        self._configurations_seen: Optional[datetime] = None
+        self._features_seen: Optional[datetime] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        return self._snapshot
+
+    def _changed_rows(self, db: Session, model, seen: Optional[datetime]):
+        query = db.query(model)
+        if seen is not None:
+            # >= so rows written within the same timestamp as the last poll are not missed;
+            # re-applying an unchanged row is harmless
+            query = query.filter(model.ModifiedAt >= seen)
+        return query.all()
+
+    def refresh(self, db: Session) -> bool:
+        """Apply rows modified since the last refresh; returns whether the snapshot changed."""
+        with self._refresh_lock:
+            configurations = self._changed_rows(db, Configuration, self._configurations_seen)
+            features = self._changed_rows(db, Feature, self._features_seen)
+            changed = False
+            for rows, current, attrs in (
+                (configurations, self._configuration_rows, ("Type", "RefId", "Key", "Value", "ValueType", "isDeleted")),
+                (features, self._feature_rows,
+                 ("FeatureKey", "FeatureValue", "ValueType", "Status", "StartDateTime", "EndDateTime", "isDeleted")),
+            ):
+                for row in rows:
+                    values = tuple(getattr(row, attr) for attr in attrs)
+                    if current.get(row.Id) != values:
+                        current[row.Id] = values
+                        changed = True
+            if configurations:
+                self._configurations_seen = max(row.ModifiedAt for row in configurations)
+            if features:
+                self._features_seen = max(row.ModifiedAt for row in features)
+            if changed or self._snapshot.version == 0:
+                self._snapshot = self._build(self._snapshot.version + 1)
+            return changed
+
+    def _build(self, version: int) -> ConfigSnapshot:
+        settings = {}
+        for row_id, (type_, ref_id, key, value, value_type, is_deleted) in self._configuration_rows.items():
+            if is_deleted:
+                continue
+            try:
+                settings[(type_, ref_id, key)] = parse_value(value, value_type)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Ignoring configuration {row_id} ({key}): {str(e)}")
+        features = {}
+        for row_id, (key, value, value_type, status, start, end, is_deleted) in self._feature_rows.items():
+            if is_deleted:
+                continue
+            try:
+                features[key] = FeatureFlag(key, parse_value(value, value_type), status == "Active", start, end)
+            except (ValueError, TypeError) as e:
+                logger.error(f"Ignoring feature {row_id} ({key}): {str(e)}")
+        return ConfigSnapshot(version, settings, features)
+
+    def start(self, interval: float = RUNTIME_CONFIG_REFRESH_SECONDS):
+        super().start(interval)
+
+runtime_config = RuntimeConfig()
+
+def setting(key: str, tenant_id=None, default: Any = None) -> Any:
+    return runtime_config.snapshot.setting(key, tenant_id, default)
+
+def feature_enabled(key: str, tenant_id=None) -> bool:
+    return runtime_config.snapshot.feature_enabled(key, tenant_id)
+
+def check_page_size(size: int, tenant_id=None):
+    """Reject list requests asking for more than the tenant's configured page size."""
+    limit = int(setting(PAGE_SIZE_MAX, tenant_id))
+    if size > limit:
+        raise HTTPException(status_code=400, detail=f"size must be at most {limit}")
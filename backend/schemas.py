@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 
 class Token(BaseModel):
     access_token: str
@@ -41,11 +41,26 @@ class ProductBase(BaseModel):
 class ProductCreate(ProductBase):
     pass
 
+class ProductPatch(BaseModel):
+    """Sparse product update: only the fields sent are written."""
+    ProductId: Optional[str] = None
+    Name: Optional[str] = None
+    Description: Optional[str] = None
+    Quantity: Optional[int] = None
+    MRP: Optional[float] = None
+    DiscountType: Optional[str] = None
+    DiscountAmount: Optional[float] = None
+    TaxType: Optional[str] = None
+    TaxAmount: Optional[float] = None
+    ImageLink: Optional[str] = None
+    ImagePath: Optional[str] = None
+
 class ProductResponse(ProductBase):
     Id: int
     TenantId: int
     CreatedAt: datetime
     ModifiedAt: datetime
+    Version: int = 1
     class Config:
         from_attributes = True
 
@@ -85,12 +100,22 @@ class OrderCreate(BaseModel):
     AdditionalData: Optional[dict] = None
     ordered_products: List[OrderedProductCreate]
 
+class OrderPatch(BaseModel):
+    """Sparse order update: only the fields sent are written. Line items are not patchable."""
+    BusinessId: Optional[int] = None
+    Type: Optional[str] = None
+    SubType: Optional[str] = None
+    OrderStatus: Optional[str] = None
+    AdditionalData: Optional[dict] = None
+
 class OrderResponse(OrderBase):
     Id: int
     TenantId: int
     OrderDateTime: datetime
     CreatedAt: datetime
     ModifiedAt: datetime
+    Version: int = 1
+    StatusChangedAt: Optional[datetime] = None
     ordered_products: List[OrderedProductResponse] = []
     dealerName: Optional[str] = None
     dealerEmail: Optional[str] = None
@@ -98,6 +123,38 @@ class OrderResponse(OrderBase):
     class Config:
         from_attributes = True
 
+class BulkOrderIds(BaseModel):
+    OrderIds: List[int]
+
+class BulkOrderStatusUpdate(BaseModel):
+    OrderIds: List[int]
+    status: str
+
+class BulkOrderResult(BaseModel):
+    Id: int
+    Status: str  # updated, unchanged or not_found
+    Detail: Optional[str] = None
+
+class OrderStatusHistoryResponse(BaseModel):
+    Id: int
+    OrderId: int
+    FromStatus: Optional[str] = None
+    ToStatus: str
+    ChangedBy: Optional[int] = None
+    ChangedAt: datetime
+
+    class Config:
+        from_attributes = True
+
+class StuckOrderResponse(BaseModel):
+    Id: int
+    TenantId: int
+    BusinessId: int
+    Type: str
+    OrderStatus: str
+    StatusChangedAt: datetime
+    DaysInStatus: int
+
 class OrderCreateRequest(BaseModel):
     orders: List[OrderCreate]
 
@@ -157,6 +214,36 @@ class TenantDetailResponse(TenantResponse):
     class Config:
         from_attributes = True
 
+class DealerImportResult(BaseModel):
+    Line: int
+    Name: str
+    Email: Optional[str] = None
+    Status: str  # created, skipped or rejected
+    BusinessId: Optional[int] = None
+    AdminUserId: Optional[int] = None
+    Detail: Optional[str] = None
+
+class DealerImportResponse(BaseModel):
+    Created: int
+    Skipped: int
+    Rejected: int
+    DryRun: bool = False
+    Results: List[DealerImportResult]
+
+class BusinessOverview(BusinessResponse):
+    UserCount: int = 0
+    OpenOrderCount: int = 0
+    ProductCount: int = 0
+    StockValue: float = 0
+
+class TenantOverviewResponse(TenantResponse):
+    UserCount: int = 0
+    ProductCount: int = 0
+    OpenOrderCount: int = 0
+    StockValue: float = 0
+    wholesaler: Optional[BusinessOverview] = None
+    dealers: List[BusinessOverview] = []
+
 class OrderStatusUpdate(BaseModel):
     status: str
 
@@ -177,6 +264,16 @@ class UserCreate(BaseModel):
     PhoneNumber: Optional[str] = None
     Description: Optional[str] = None
 
+class BulkUserCreate(BaseModel):
+    Users: List[UserCreate]
+
+class BulkUserResult(BaseModel):
+    Index: int
+    UserName: str
+    Status: str  # created or rejected
+    Id: Optional[int] = None
+    Detail: Optional[str] = None
+
 class UserUpdate(BaseModel):
     TenantId: Optional[int] = None
     BusinessId: Optional[int] = None
@@ -206,3 +303,48 @@ class UserListResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+# Analytics Schemas
+class SalesRollupRow(BaseModel):
+    SalesDate: Optional[date] = None
+    BusinessId: Optional[int] = None
+    ProductId: Optional[int] = None
+    OrderType: Optional[str] = None
+    OrderCount: int
+    Quantity: int
+    TotalCost: float
+
+class StockLevelResponse(BaseModel):
+    TenantId: int
+    ProductCount: int = 0
+    TotalQuantity: int = 0
+    StockValue: float = 0
+    OutOfStockCount: int = 0
+    ModifiedAt: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Inventory ledger schemas
+class StockMovementResponse(BaseModel):
+    Id: int
+    TenantId: int
+    ProductId: int
+    MovementType: str
+    QuantityDelta: int
+    OrderId: Optional[int] = None
+    Note: Optional[str] = None
+    CreatedBy: Optional[int] = None
+    CreatedAt: datetime
+
+    class Config:
+        from_attributes = True
+
+class StockAdjustmentCreate(BaseModel):
+    QuantityDelta: int
+    Note: Optional[str] = None
+
+class StockAtResponse(BaseModel):
+    ProductId: int
+    At: datetime
+    Quantity: int
@@ -0,0 +1,150 @@
+"""
+Fast response serialization.
+
+Order responses are built once as plain dicts straight from ORM rows or row
+tuples (attribute access works for both) and rendered by `FastJSONResponse`,
+which uses orjson when it is installed. Returning a Response from an endpoint
+skips FastAPI's response_model re-validation, so only use this for shapes built
+here from trusted database values; the response_model stays on the route for docs.
+
+`api_response` negotiates the body format: clients sending
+`Accept: application/x-msgpack` get the same structure as MessagePack (when the
+`msgpack` package is installed), everyone else gets JSON.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency, falls back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional dependency, JSON only without it
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/x-msgpack", "application/msgpack", "application/vnd.msgpack")
+
+def _default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class MsgPackResponse(Response):
+    media_type = "application/x-msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_default, use_bin_type=True)
+
+def wants_msgpack(request: Request) -> bool:
+    """True if the client asked for MessagePack (with a non-zero q) and we can produce it."""
+    if msgpack is None:
+        return False
+    for part in request.headers.get("accept", "").split(","):
+        media_type, _, params = part.strip().partition(";")
+        if media_type.strip().lower() in MSGPACK_MEDIA_TYPES:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+def api_response(request: Request, content: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """Render `content` as MessagePack or JSON depending on the request's Accept header."""
+    headers = {**(headers or {}), "Vary": "Accept"}
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    return response_class(content, status_code=status_code, headers=headers)
+
+def plain(value: Any) -> Any:
+    """Convert a column value to its JSON-native form (what model_dump(mode="json") would produce)."""
+    if isinstance(value, (Decimal, Enum, datetime, date)):
+        return _default(value)
+    return value
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    profiles: Optional[Dict[str, List[str]]] = None,
+    required: Sequence[str] = ("Id",),
+) -> Optional[List[str]]:
+    """
+    Resolve a `fields=` query value (comma separated field names and/or profile
+    names) into an ordered field list. None means the full representation.
+    """
+    if not fields:
+        return None
+    names = []
+    for name in (part.strip() for part in fields.split(",")):
+        if not name:
+            continue
+        if profiles and name in profiles:
+            names.extend(profiles[name])
+        elif name in allowed:
+            names.append(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+    return list(dict.fromkeys([*required, *names]))
+
+def project(row, fields: Sequence[str]) -> dict:
+    return {field: plain(getattr(row, field)) for field in fields}
+
+def _enum_value(value):
+    return value.value if isinstance(value, Enum) else value
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+def ordered_product_dict(op) -> dict:
+    """Same shape as OrderedProductResponse."""
+    return {
+        "ProductId": op.ProductId,
+        "Quantity": op.Quantity,
+        "Price": _float(op.Price),
+        "DiscountType": _enum_value(op.DiscountType),
+        "DiscountAmount": _float(op.DiscountAmount),
+        "TaxType": op.TaxType,
+        "TaxAmount": _float(op.TaxAmount),
+        "TotalCost": _float(op.TotalCost),
+        "Id": op.Id,
+        "OrderId": op.OrderId,
+        "CreatedAt": op.CreatedAt,
+        "ModifiedAt": op.ModifiedAt,
+    }
+
+def order_dict(order, ordered_products: Iterable = (), dealer=None) -> dict:
+    """Same shape as OrderResponse; `dealer` is any object with Name/Email/PhoneNumber."""
+    return {
+        "BusinessId": order.BusinessId,
+        "Type": _enum_value(order.Type),
+        "SubType": order.SubType,
+        "OrderStatus": _enum_value(order.OrderStatus),
+        "AdditionalData": order.AdditionalData,
+        "Id": order.Id,
+        "TenantId": order.TenantId,
+        "OrderDateTime": order.OrderDateTime,
+        "CreatedAt": order.CreatedAt,
+        "ModifiedAt": order.ModifiedAt,
+        "Version": order.Version,
+        "StatusChangedAt": order.StatusChangedAt,
+        "ordered_products": [ordered_product_dict(op) for op in ordered_products],
+        "dealerName": dealer.Name if dealer else None,
+        "dealerEmail": dealer.Email if dealer else None,
+        "dealerPhone": dealer.PhoneNumber if dealer else None,
+    }
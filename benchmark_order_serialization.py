@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for order list serialization.
+
+Compares the legacy path (from_orm -> dict -> OrderResponse(**) followed by
+FastAPI's response_model validation and jsonable_encoder) with the fast path
+(order_dict + FastJSONResponse) on an in-memory page of orders. No database
+is needed.
+
+    python benchmark_order_serialization.py [--orders 100] [--lines 5] [--repeat 50]
+"""
+import argparse
+import timeit
+import warnings
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.schemas import OrderResponse, OrderedProductResponse
+from backend.serialization import FastJSONResponse, order_dict, orjson
+
+warnings.filterwarnings("ignore")
+
+def build_page(order_count: int, line_count: int):
+    now = datetime.utcnow()
+    dealer = SimpleNamespace(Name="Metro Electronics", Email="metro@example.com", PhoneNumber="555-0100")
+    page = []
+    for i in range(order_count):
+        order = SimpleNamespace(
+            Id=i + 1, TenantId=1, BusinessId=2, Type="Booked", SubType=None, OrderStatus="New",
+            OrderDateTime=now, AdditionalData={"note": "benchmark"}, CreatedAt=now, ModifiedAt=now, Version=1,
+            StatusChangedAt=now,
+        )
+        lines = [
+            SimpleNamespace(
+                Id=i * line_count + j + 1, OrderId=i + 1, ProductId=j + 1, Quantity=3, Price=Decimal("199.99"),
+                DiscountType="Percentage", DiscountAmount=Decimal("5.00"), TaxType="GST", TaxAmount=Decimal("18.00"),
+                TotalCost=Decimal("587.97"), CreatedAt=now, ModifiedAt=now,
+            )
+            for j in range(line_count)
+        ]
+        page.append((order, lines, dealer))
+    return page
+
+response_adapter = TypeAdapter(List[OrderResponse])
+
+def legacy(page) -> bytes:
+    result = []
+    for o, ordered_products, dealer in page:
+        o_dict = OrderResponse.from_orm(o).dict()
+        o_dict["ordered_products"] = [OrderedProductResponse.from_orm(op) for op in ordered_products]
+        o_dict["dealerName"] = dealer.Name if dealer else None
+        o_dict["dealerEmail"] = dealer.Email if dealer else None
+        o_dict["dealerPhone"] = dealer.PhoneNumber if dealer else None
+        result.append(OrderResponse(**o_dict))
+    # What FastAPI does with response_model before rendering
+    validated = response_adapter.validate_python(result, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+def fast(page) -> bytes:
+    return FastJSONResponse([order_dict(o, lines, dealer) for o, lines, dealer in page]).body
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=5, help="ordered products per order")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    page = build_page(args.orders, args.lines)
+    print(f"{args.orders} orders x {args.lines} lines, {args.repeat} runs, encoder: {'orjson' if orjson else 'json'}")
+    results = {}
+    for name, fn in (("legacy", legacy), ("fast", fast)):
+        best = min(timeit.repeat(lambda: fn(page), number=1, repeat=args.repeat))
+        results[name] = best
+        print(f"  {name:<7} {best * 1000:8.2f} ms/page  ({len(fn(page))} bytes)")
+    print(f"  speedup {results['legacy'] / results['fast']:.1f}x")
@@ -0,0 +1,92 @@
+"""
+Shared fixtures: the app bound to an in-memory SQLite database, a fresh
+in-process cache per test, a recorder for the SQL statements each request
+executes and a small seeded tenant (`shop`).
+"""
+import os
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from backend import database
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+database.engine = engine
+database.SessionLocal.configure(bind=engine)
+
+from backend.main import app  # noqa: E402  (must import after rebinding the engine)
+from backend.database import Base, SessionLocal  # noqa: E402
+from backend import cache, models  # noqa: E402
+from backend.auth import get_current_user  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    """A fresh in-process cache per test; row Ids repeat across tests."""
+    monkeypatch.setattr(cache, "_backend", cache.MemoryCache())
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+
+@pytest.fixture
+def client(db):
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+@pytest.fixture
+def statements():
+    """SQL statements executed while the fixture is active, in order."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def shop(db):
+    """A tenant with one dealer and one product (100 in stock), acting as its WholesalerAdmin."""
+    tenant = models.Tenant(TenantName="T1", TenantStatus="Active")
+    db.add(tenant)
+    db.flush()
+    dealer = models.Business(TenantId=tenant.TenantId, Type="DEALER", Name="D", Email="d@example.com")
+    product = models.Product(ProductId="P", TenantId=tenant.TenantId, Name="P", MRP=10, Quantity=100)
+    wadmin = models.User(
+        TenantId=tenant.TenantId, Role="WholesalerAdmin", UserName="wadmin", PasswordHash="x",
+        Name="wadmin", Email="wadmin@example.com",
+    )
+    db.add_all([dealer, product, wadmin])
+    db.commit()
+    db.refresh(wadmin)
+    db.expunge(wadmin)
+    app.dependency_overrides[get_current_user] = lambda: wadmin
+    return dealer.Id, product.Id
+
+@pytest.fixture
+def place_order(client, shop):
+    """Post a booked order for the shop's product; returns the response."""
+    dealer_id, product_id = shop
+
+    def place(status="New", quantity=3):
+        return client.post("/api/v1/orders/", json={"orders": [{
+            "BusinessId": dealer_id, "Type": "Booked", "OrderStatus": status,
+            "ordered_products": [{
+                "ProductId": product_id, "Quantity": quantity, "Price": 10, "DiscountType": None,
+                "DiscountAmount": None, "TaxType": None, "TaxAmount": None, "TotalCost": 10 * quantity,
+            }],
+        }]})
+
+    return place
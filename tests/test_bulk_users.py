@@ -0,0 +1,25 @@
+"""Bulk user creation rejects usernames and emails already taken, ignoring case."""
+from backend import auth, models
+
+def new_user(db, username, email):
+    return {
+        "TenantId": db.query(models.Tenant.TenantId).scalar(), "Role": "Wholesaler",
+        "UserName": username, "Password": "secret", "Name": username, "Email": email,
+    }
+
+def test_bulk_create_dedupes_case_insensitively(client, db, shop, monkeypatch):
+    monkeypatch.setattr(auth, "PASSWORD_HASH_WORKERS", 1)
+    rows = [
+        ("Alice", "alice@example.com", "created", None),
+        ("ALICE", "other@example.com", "rejected", "Duplicate username in request"),
+        ("bob", "Alice@Example.com", "rejected", "Duplicate email in request"),
+        ("WAdmin", "new@example.com", "rejected", "Username already exists"),
+        ("carol", "WADMIN@example.com", "rejected", "Email already exists"),
+    ]
+    response = client.post("/api/v1/users/bulk", json={"Users": [new_user(db, u, e) for u, e, _, _ in rows]})
+
+    assert response.status_code == 201, response.text
+    results = response.json()
+    assert [(r["Status"], r["Detail"]) for r in results] == [(status, detail) for _, _, status, detail in rows]
+    assert results[0]["Id"] is not None
+    assert sorted(name for (name,) in db.query(models.User.UserName)) == ["Alice", "wadmin"]
@@ -0,0 +1,27 @@
+"""The business directory reloads a tenant after its businesses change."""
+import pytest
+
+from backend import cache, models
+from backend.business_directory import BusinessDirectory, invalidate
+
+@pytest.fixture
+def dealer(db):
+    tenant = models.Tenant(TenantName="T1", TenantStatus="Active")
+    db.add(tenant)
+    db.flush()
+    business = models.Business(TenantId=tenant.TenantId, Type="DEALER", Name="Old", Email="d@example.com")
+    db.add(business)
+    db.commit()
+    return business
+
+@pytest.mark.parametrize("backend", [cache.MemoryCache, cache.NullCache])
+def test_rename_is_seen_after_invalidate(monkeypatch, db, dealer, backend):
+    monkeypatch.setattr(cache, "_backend", backend())
+    directory = BusinessDirectory()
+    assert directory.get(db, dealer.TenantId, dealer.Id).Name == "Old"
+
+    dealer.Name = "New"
+    db.commit()
+    invalidate(dealer.TenantId)
+
+    assert directory.get(db, dealer.TenantId, dealer.Id).Name == "New"
@@ -0,0 +1,39 @@
+"""Compressed responses carry a weak ETag and vary on Accept-Encoding."""
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from backend.compression import CompressionMiddleware
+
+ETAG = '"abc"'
+
+def resource(request):
+    if request.headers.get("if-none-match"):
+        return Response(status_code=304, headers={"ETag": ETAG})
+    return Response(b"x" * 4096, media_type="application/json", headers={"ETag": ETAG})
+
+app = Starlette(routes=[Route("/", resource)])
+app.add_middleware(CompressionMiddleware)
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def test_identity_response_keeps_strong_etag(client):
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == ETAG
+
+def test_compressed_response_has_weak_etag(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f"W/{ETAG}"
+    assert "Accept-Encoding" in response.headers["vary"]
+
+def test_not_modified_matches_compressed_response(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": f"W/{ETAG}"})
+    assert response.status_code == 304
+    assert response.headers["etag"] == f"W/{ETAG}"
+    assert "Accept-Encoding" in response.headers["vary"]
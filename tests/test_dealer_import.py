@@ -0,0 +1,33 @@
+"""Dealer import skips dealers the tenant already has, so re-running it is safe."""
+from backend import models
+
+CSV = """Name,Email,PhoneNumber
+Existing,D@EXAMPLE.com,
+North,north@example.com,123
+North again,North@Example.com,
+South,south@example.com,
+"""
+
+def import_csv(client, db, text):
+    tenant_id = db.query(models.Tenant.TenantId).scalar()
+    response = client.post(
+        "/api/v1/businesses/import", params={"tenantId": tenant_id},
+        files={"file": ("dealers.csv", text.encode("utf-8"), "text/csv")},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_import_skips_existing_emails(client, db, shop):
+    dealer_id, _ = shop
+    report = import_csv(client, db, CSV)
+
+    assert (report["Created"], report["Skipped"], report["Rejected"]) == (2, 2, 0)
+    statuses = [(r["Name"], r["Status"], r["BusinessId"]) for r in report["Results"]]
+    assert statuses[0] == ("Existing", "skipped", dealer_id)
+    assert [s[1] for s in statuses[1:]] == ["created", "skipped", "created"]
+    emails = sorted(email for (email,) in db.query(models.Business.Email))
+    assert emails == ["d@example.com", "north@example.com", "south@example.com"]
+
+    again = import_csv(client, db, CSV)
+    assert (again["Created"], again["Skipped"]) == (0, 4)
+    assert db.query(models.Business).count() == 3
@@ -0,0 +1,31 @@
+"""Stock at a point in time is exact, or unknown once the movements it needs are pruned."""
+from datetime import datetime
+
+from backend import inventory, models
+
+def day(n):
+    return datetime(2026, 1, n)
+
+def test_stock_at_after_pruning(client, db, shop):
+    _, product_id = shop
+    tenant_id = db.query(models.Tenant.TenantId).scalar()
+    for delta, created_at in ((100, day(1)), (-10, day(3)), (5, day(5))):
+        db.add(models.StockMovement(
+            TenantId=tenant_id, ProductId=product_id, MovementType=models.StockMovementTypeEnum.Adjustment,
+            QuantityDelta=delta, CreatedAt=created_at,
+        ))
+    db.commit()
+
+    inventory.compact(db, tenant_id, as_of=day(4))
+    assert inventory.stock_at(db, product_id, day(2)) == 100
+
+    inventory.compact(db, tenant_id, as_of=day(6), prune_before=day(4))
+    assert db.query(models.StockMovement).count() == 1
+    assert inventory.stock_at(db, product_id, day(2)) is None
+    assert inventory.stock_at(db, product_id, datetime(2026, 1, 4, 12)) == 90
+    assert inventory.stock_at(db, product_id, day(7)) == 95
+    assert inventory.stock_at(db, product_id) == 95
+
+    url = f"/api/v1/inventory/products/{product_id}/stock"
+    assert client.get(url, params={"at": day(2).isoformat()}).status_code == 404
+    assert client.get(url, params={"at": day(7).isoformat()}).json()["Quantity"] == 95
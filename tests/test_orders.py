@@ -0,0 +1,108 @@
+"""Order creation, status changes and the stock they hold."""
+import pytest
+from sqlalchemy import event
+
+from backend import database, models
+
+def product_quantity(db, product_id):
+    db.expire_all()
+    return db.get(models.Product, product_id).Quantity
+
+@pytest.mark.parametrize("status", ["Cancelled", "InProgress", "Done"])
+def test_order_cannot_be_created_past_new(client, db, shop, place_order, status):
+    _, product_id = shop
+    response = place_order(status)
+
+    assert response.status_code == 409
+    assert product_quantity(db, product_id) == 100
+    assert db.query(models.Order).count() == 0
+    assert db.query(models.StockMovement).count() == 0
+
+def test_order_is_created_as_new(client, db, shop, place_order):
+    _, product_id = shop
+    response = place_order()
+
+    assert response.status_code == 201, response.text
+    assert response.json()["booked_order"]["OrderStatus"] == "New"
+    assert product_quantity(db, product_id) == 97
+
+def create_order(place_order):
+    response = place_order()
+    assert response.status_code == 201, response.text
+    return response.json()["booked_order"]["Id"]
+
+def cancellations(db, product_id):
+    return [
+        m.QuantityDelta for m in db.query(models.StockMovement).filter(
+            models.StockMovement.ProductId == product_id,
+            models.StockMovement.MovementType == models.StockMovementTypeEnum.Cancellation,
+        )
+    ]
+
+@pytest.mark.parametrize("release", ["cancel", "delete", "bulk-cancel"])
+def test_releasing_booked_order_restores_stock(client, db, shop, place_order, release):
+    _, product_id = shop
+    order_id = create_order(place_order)
+    assert product_quantity(db, product_id) == 97
+
+    if release == "cancel":
+        response = client.patch(f"/api/v1/orders/{order_id}/status", json={"status": "Cancelled"})
+    elif release == "delete":
+        response = client.delete(f"/api/v1/orders/{order_id}")
+    else:
+        response = client.post("/api/v1/orders/bulk-cancel", json={"OrderIds": [order_id]})
+    assert response.status_code in (200, 204), response.text
+
+    assert product_quantity(db, product_id) == 100
+    assert cancellations(db, product_id) == [3]
+
+def test_bulk_cancel_conflict_is_rolled_back(client, db, shop, place_order):
+    _, product_id = shop
+    order_ids = [create_order(place_order) for _ in range(2)]
+
+    def cancel_one_concurrently(conn, cursor, statement, parameters, context, executemany):
+        # Another request cancels the first order between our locking read and the bulk UPDATE
+        if statement.startswith("UPDATE orders SET") and "OrderStatus" in statement:
+            cursor.execute("UPDATE orders SET \"OrderStatus\" = 'Cancelled' WHERE \"Id\" = ?", (order_ids[0],))
+
+    event.listen(database.engine, "before_cursor_execute", cancel_one_concurrently)
+    try:
+        response = client.post("/api/v1/orders/bulk-cancel", json={"OrderIds": order_ids})
+    finally:
+        event.remove(database.engine, "before_cursor_execute", cancel_one_concurrently)
+
+    assert response.status_code == 409
+    assert product_quantity(db, product_id) == 94
+    assert cancellations(db, product_id) == []
+
+@pytest.mark.parametrize("path", ["InProgress,New", "InProgress,Done,InProgress"])
+def test_invalid_transition_is_rejected(client, db, shop, place_order, path):
+    _, product_id = shop
+    order_id = create_order(place_order)
+    *allowed, invalid = path.split(",")
+    for status in allowed:
+        assert client.patch(f"/api/v1/orders/{order_id}/status", json={"status": status}).status_code == 200
+
+    response = client.patch(f"/api/v1/orders/{order_id}/status", json={"status": invalid})
+
+    assert response.status_code == 409
+    db.expire_all()
+    assert db.get(models.Order, order_id).OrderStatus.value == allowed[-1]
+    history = db.query(models.OrderStatusHistory).filter(models.OrderStatusHistory.OrderId == order_id)
+    assert [h.ToStatus.value for h in history.order_by(models.OrderStatusHistory.Id)] == ["New", *allowed]
+
+def test_put_keeps_line_items(client, db, shop, place_order):
+    dealer_id, product_id = shop
+    order_id = create_order(place_order)
+    body = {
+        "BusinessId": dealer_id, "Type": "Booked", "OrderStatus": "InProgress", "SubType": "rush",
+        "ordered_products": [],
+    }
+
+    response = client.put(f"/api/v1/orders/{order_id}", json=body)
+
+    assert response.status_code == 200, response.text
+    order = response.json()
+    assert (order["OrderStatus"], order["SubType"]) == ("InProgress", "rush")
+    assert [(line["ProductId"], line["Quantity"]) for line in order["ordered_products"]] == [(product_id, 3)]
+    assert product_quantity(db, product_id) == 97
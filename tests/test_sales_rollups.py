@@ -0,0 +1,68 @@
+"""Sales analytics count each order once, however many products it has."""
+from datetime import datetime
+
+import pytest
+
+from backend import models, rollups
+from backend.auth import get_current_user
+from backend.main import app
+
+@pytest.fixture
+def sales(db):
+    tenant = models.Tenant(TenantName="T1", TenantStatus="Active")
+    db.add(tenant)
+    db.flush()
+    dealer = models.Business(TenantId=tenant.TenantId, Type="DEALER", Name="D", Email="d@example.com")
+    products = [
+        models.Product(ProductId=f"P{i}", TenantId=tenant.TenantId, Name=f"P{i}", MRP=10)
+        for i in range(2)
+    ]
+    db.add_all([dealer, *products])
+    db.flush()
+
+    # One order with both products, one with just the first
+    for order_products in (products, products[:1]):
+        order = models.Order(
+            TenantId=tenant.TenantId, BusinessId=dealer.Id, Type="Booked", OrderDateTime=datetime(2026, 10, 1, 12)
+        )
+        db.add(order)
+        db.flush()
+        lines = [
+            models.OrderedProduct(OrderId=order.Id, ProductId=p.Id, Quantity=2, Price=10, TotalCost=20)
+            for p in order_products
+        ]
+        db.add_all(lines)
+        db.flush()
+        rollups.record_order(db, order, lines)
+
+    admin = models.User(
+        TenantId=tenant.TenantId, Role="WholesalerAdmin", UserName="wadmin", PasswordHash="x",
+        Name="wadmin", Email="wadmin@example.com",
+    )
+    db.add(admin)
+    db.commit()
+    db.refresh(admin)
+    db.expunge(admin)
+    return admin, [p.Id for p in products]
+
+def get_sales(client, user, **params):
+    app.dependency_overrides[get_current_user] = lambda: user
+    response = client.get("/api/v1/analytics/sales", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.mark.parametrize("rebuild", [False, True])
+def test_order_count_is_distinct_orders(client, db, sales, rebuild):
+    admin, product_ids = sales
+    if rebuild:
+        rollups.rebuild_rollups(db)
+
+    (day,) = get_sales(client, admin, group_by="day,type")
+    assert day["OrderCount"] == 2
+    assert day["Quantity"] == 6
+
+    per_product = {row["ProductId"]: row["OrderCount"] for row in get_sales(client, admin, group_by="product")}
+    assert per_product == {product_ids[0]: 2, product_ids[1]: 1}
+
+    (only_second,) = get_sales(client, admin, group_by="day", productId=product_ids[1])
+    assert only_second["OrderCount"] == 1
@@ -0,0 +1,71 @@
+"""Single-row product and order endpoints only find rows the caller may see."""
+import pytest
+
+from backend import models
+from backend.auth import get_current_user
+from backend.main import app
+
+@pytest.fixture
+def rows(db):
+    tenants = [models.Tenant(TenantName=f"T{i}", TenantStatus="Active") for i in range(2)]
+    db.add_all(tenants)
+    db.flush()
+    foreign_dealer = models.Business(TenantId=tenants[1].TenantId, Type="DEALER", Name="D", Email="d@example.com")
+    foreign_product = models.Product(ProductId="P", TenantId=tenants[1].TenantId, Name="P", MRP=10)
+    db.add_all([foreign_dealer, foreign_product])
+    db.flush()
+    foreign_order = models.Order(TenantId=tenants[1].TenantId, BusinessId=foreign_dealer.Id, Type="Requested")
+    wadmin = models.User(
+        TenantId=tenants[0].TenantId, Role="WholesalerAdmin", UserName="wadmin", PasswordHash="x",
+        Name="wadmin", Email="wadmin@example.com",
+    )
+    db.add_all([foreign_order, wadmin])
+    db.commit()
+    db.refresh(wadmin)
+    db.expunge(wadmin)
+    return wadmin, foreign_product.Id, foreign_order.Id
+
+def as_user(user):
+    app.dependency_overrides[get_current_user] = lambda: user
+
+@pytest.mark.parametrize("method", ["get", "put", "patch", "delete"])
+def test_other_tenants_product_is_not_found(client, rows, method):
+    wadmin, product_id, _ = rows
+    as_user(wadmin)
+    body = {"ProductId": "P", "Name": "Renamed", "MRP": 1, "Quantity": 1}
+    kwargs = {"json": body} if method in ("put", "patch") else {}
+    response = client.request(method.upper(), f"/api/v1/products/{product_id}", **kwargs)
+    assert response.status_code == 404
+
+def test_cached_product_is_not_served_across_tenants(client, db, rows):
+    wadmin, product_id, _ = rows
+    owner = models.User(
+        TenantId=db.get(models.Product, product_id).TenantId, Role="WholesalerAdmin", UserName="owner",
+        PasswordHash="x", Name="owner", Email="owner@example.com",
+    )
+    as_user(owner)
+    assert client.get(f"/api/v1/products/{product_id}").status_code == 200
+    as_user(wadmin)
+    assert client.get(f"/api/v1/products/{product_id}").status_code == 404
+
+@pytest.mark.parametrize("method", ["put", "delete"])
+def test_other_tenants_order_is_not_found(client, rows, method):
+    wadmin, _, order_id = rows
+    as_user(wadmin)
+    body = {"BusinessId": 1, "Type": "Requested", "OrderStatus": "New", "ordered_products": []}
+    kwargs = {"json": body} if method == "put" else {}
+    response = client.request(method.upper(), f"/api/v1/orders/{order_id}", **kwargs)
+    assert response.status_code == 404
+
+@pytest.mark.parametrize("path", ["stock", "movements"])
+def test_inventory_reads_are_scoped(client, db, rows, path):
+    wadmin, product_id, _ = rows
+    as_user(wadmin)
+    assert client.get(f"/api/v1/inventory/products/{product_id}/{path}").status_code == 404
+
+    dealer = models.User(
+        TenantId=db.get(models.Product, product_id).TenantId, Role="Dealer", UserName="dealer",
+        PasswordHash="x", Name="dealer", Email="dealer@example.com",
+    )
+    as_user(dealer)
+    assert client.get(f"/api/v1/inventory/products/{product_id}/{path}").status_code == 403
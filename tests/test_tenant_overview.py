@@ -0,0 +1,26 @@
+"""The cached tenant overview reflects business writes right away."""
+from backend import models
+from backend.auth import get_current_user
+from backend.main import app
+
+def dealer_ids(client, tenant_id):
+    response = client.get(f"/api/v1/tenants/{tenant_id}/overview")
+    assert response.status_code == 200, response.text
+    return [d["Id"] for d in response.json()["dealers"]]
+
+def test_deleted_dealer_leaves_overview(client, db, shop):
+    dealer_id, _ = shop
+    tenant_id = db.query(models.Tenant.TenantId).scalar()
+    admin = models.User(
+        TenantId=tenant_id, Role="SuperAdmin", UserName="super", PasswordHash="x", Name="super", Email="super@example.com"
+    )
+    db.add(admin)
+    db.commit()
+    db.refresh(admin)
+    db.expunge(admin)
+    app.dependency_overrides[get_current_user] = lambda: admin
+    assert dealer_ids(client, tenant_id) == [dealer_id]
+
+    assert client.delete(f"/api/v1/businesses/{dealer_id}").status_code == 200
+
+    assert dealer_ids(client, tenant_id) == []
@@ -0,0 +1,38 @@
+"""Bumping a user's TokenVersion makes the tokens issued before it fail with 401."""
+import pytest
+
+from backend import auth, models, schemas
+from backend.auth import get_current_user
+from backend.crud import user as crud_user
+from backend.main import app
+
+@pytest.fixture(params=[False, True], ids=["lookup", "embedded-claims"])
+def embed_claims(request, monkeypatch):
+    monkeypatch.setattr(auth, "JWT_EMBED_CLAIMS", request.param)
+    return request.param
+
+@pytest.fixture
+def dealer_user(db, shop):
+    dealer_id, _ = shop
+    app.dependency_overrides.pop(get_current_user, None)
+    user = models.User(
+        TenantId=db.query(models.Tenant.TenantId).scalar(), BusinessId=dealer_id, Role="Dealer",
+        UserName="dealer", PasswordHash=auth.get_password_hash("old-secret"), Name="dealer", Email="dealer@example.com",
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+def login(client, password):
+    response = client.post("/api/v1/users/login", json={"username": "dealer", "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_password_change_revokes_old_token(client, db, dealer_user, embed_claims):
+    old = login(client, "old-secret")
+    assert client.get("/api/v1/users/me", headers=old).status_code == 200
+
+    crud_user.update_user(db, dealer_user.Id, schemas.UserUpdate(Password="new-secret"), modified_by=dealer_user.Id)
+
+    assert client.get("/api/v1/users/me", headers=old).status_code == 401
+    assert client.get("/api/v1/users/me", headers=login(client, "new-secret")).status_code == 200
@@ -0,0 +1,62 @@
+"""User listing loads each user's business in the listing query itself."""
+import pytest
+
+from backend import models
+from backend.auth import get_current_user
+from backend.main import app
+
+@pytest.fixture
+def tenant_users(db):
+    tenant = models.Tenant(TenantName="T1", TenantStatus="Active")
+    db.add(tenant)
+    db.flush()
+    wholesaler = models.Business(TenantId=tenant.TenantId, Type="WHOLESALER", Name="W", Email="w@example.com")
+    dealers = [
+        models.Business(TenantId=tenant.TenantId, Type="DEALER", Name=f"D{i}", Email=f"d{i}@example.com")
+        for i in range(3)
+    ]
+    db.add_all([wholesaler, *dealers])
+    db.flush()
+
+    def user(role, business, name):
+        return models.User(
+            TenantId=tenant.TenantId, BusinessId=business.Id if business else None, Role=role,
+            UserName=name, PasswordHash="x", Name=name, Email=f"{name}@example.com",
+        )
+
+    users = {
+        "super": user("SuperAdmin", None, "super"),
+        "wadmin": user("WholesalerAdmin", wholesaler, "wadmin"),
+        "dealer": user("Dealer", dealers[0], "dealer"),
+    }
+    db.add_all(users.values())
+    db.add_all(user("Dealer", dealer, f"dealer{i}") for i, dealer in enumerate(dealers))
+    db.commit()
+    for u in users.values():
+        db.refresh(u)
+        db.expunge(u)
+    return users
+
+def list_users(client, statements, current_user):
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    statements.clear()
+    response = client.get("/api/v1/users/", params={"limit": 100})
+    assert response.status_code == 200, response.text
+    return response.json(), [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+@pytest.mark.parametrize("role", ["wadmin", "dealer"])
+def test_listing_with_inner_join_is_one_select(client, statements, tenant_users, role):
+    users, selects = list_users(client, statements, tenant_users[role])
+
+    assert len(selects) == 1
+    assert len(users) > 1
+    assert all(u["businessName"] for u in users)
+
+def test_listing_with_outer_join_is_one_select(client, statements, tenant_users):
+    users, selects = list_users(client, statements, tenant_users["super"])
+
+    assert len(selects) == 1
+    by_name = {u["UserName"]: u["businessName"] for u in users}
+    assert by_name["super"] is None
+    assert by_name["wadmin"] == "W"
+    assert by_name["dealer0"] == "D0"
@@ -0,0 +1,28 @@
+"""User updates check username and email uniqueness case-insensitively, like creation."""
+import pytest
+
+from backend import models
+
+@pytest.fixture
+def wholesaler_user(db, shop):
+    user = models.User(
+        TenantId=db.query(models.Tenant.TenantId).scalar(), Role="Wholesaler", UserName="w1",
+        PasswordHash="x", Name="w1", Email="w1@example.com",
+    )
+    db.add(user)
+    db.commit()
+    return user.Id
+
+@pytest.mark.parametrize("change, detail", [
+    ({"Email": "WAdmin@Example.com"}, "Email already exists"),
+    ({"UserName": "WADMIN"}, "Username already exists"),
+])
+def test_taken_username_or_email_is_rejected(client, wholesaler_user, change, detail):
+    response = client.put(f"/api/v1/users/{wholesaler_user}", json=change)
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+
+def test_changing_case_of_own_username_and_email_is_allowed(client, wholesaler_user):
+    response = client.put(f"/api/v1/users/{wholesaler_user}", json={"UserName": "W1", "Email": "W1@example.com"})
+    assert response.status_code == 200, response.text
+    assert response.json()["UserName"] == "W1"
@@ -0,0 +1,28 @@
+"""Writes carrying a stale If-Match are rejected instead of overwriting newer data."""
+import pytest
+
+def test_stale_product_etag_conflicts(client, shop):
+    _, product_id = shop
+    etag = client.get(f"/api/v1/products/{product_id}").headers["etag"]
+
+    first = client.patch(f"/api/v1/products/{product_id}", json={"Name": "First"}, headers={"If-Match": etag})
+    assert first.status_code == 200, first.text
+    assert first.headers["etag"] != etag
+
+    second = client.patch(f"/api/v1/products/{product_id}", json={"Name": "Second"}, headers={"If-Match": etag})
+    assert second.status_code == 409
+    assert client.get(f"/api/v1/products/{product_id}").json()["Name"] == "First"
+
+@pytest.mark.parametrize("method", ["patch", "status"])
+def test_stale_order_etag_conflicts(client, place_order, method):
+    order_id = place_order().json()["booked_order"]["Id"]
+    etag = client.get(f"/api/v1/orders/{order_id}").headers["etag"]
+    assert client.patch(f"/api/v1/orders/{order_id}", json={"SubType": "first"}, headers={"If-Match": etag}).status_code == 200
+
+    if method == "patch":
+        response = client.patch(f"/api/v1/orders/{order_id}", json={"SubType": "second"}, headers={"If-Match": etag})
+    else:
+        response = client.patch(f"/api/v1/orders/{order_id}/status", json={"status": "InProgress"}, headers={"If-Match": etag})
+    assert response.status_code == 409
+    order = client.get(f"/api/v1/orders/{order_id}").json()
+    assert (order["SubType"], order["OrderStatus"]) == ("first", "New")